@@ -1,20 +1,23 @@
 # Allow type hints to refer to things not defined yet.
 from __future__ import annotations
-# Standard library module for interacting with SQLite databases.
-import sqlite3
 # Provides list/optional annotations and protocol for defining typed interfaces.
-from typing import List, Optional, Protocol
+from typing import Iterable, List, Optional, Protocol
 # Import Models.
 from models.appointment import Appointment
+# Import Data.
+from data.change_feed import Change, ChangeFeed
+from data.retry import execute_write, run_write
 
 
 class AppointmentRepositoryProtocol(Protocol):
     """Outlines what a Appointment repository must implement.""" 
 
     def add(self, appointment: Appointment) -> Appointment: ...
+    def add_many(self, appointments: Iterable[Appointment]) -> List[Appointment]: ...
     def get_all(self) -> List[Appointment]: ...
     def get_by_id(self, appointment_id: str) -> Optional[Appointment]: ...
     def update(self, appointment: Appointment) -> Appointment: ...
+    def update_many(self, appointments: Iterable[Appointment]) -> List[Appointment]: ...
     def delete(self, appointment_id: str) -> None: ...
 
 
@@ -22,8 +25,10 @@ class AppointmentRepositoryProtocol(Protocol):
 class AppointmentRepository(AppointmentRepositoryProtocol):
     """SQLite-backed repository for Appointment objects."""
 
-    def __init__(self, db: sqlite3.Connection):
-        self.db =db
+    def __init__(self, db, change_feed: Optional[ChangeFeed] = None):
+        self.db = db
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
         self._create_table()
 
     def _create_table(self):
@@ -50,23 +55,28 @@ class AppointmentRepository(AppointmentRepositoryProtocol):
         Insert the given Appointment into storage.
         Returns the fully populated Appointment(Incuding any repo assigned fields)
         """
-        cursor = self.db.execute(
-            """
-            INSERT INTO appointments (title, date, time, location, notes)
-            VALUES (?, ?, ?, ?, ?)
-            """,
+        def insert() -> int:
+            cursor = self.db.execute(
+                """
+                INSERT INTO appointments (title, date, time, location, notes)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+
+                (appointment.title, 
+                 appointment.date, 
+                 appointment.time, 
+                 appointment.location,
+                 appointment.notes)
+            )
+            self.db.commit()
+            return cursor.lastrowid
 
-            (appointment.title, 
-             appointment.date, 
-             appointment.time, 
-             appointment.location,
-             appointment.notes)
-        )
-        self.db.commit()
+        new_id = run_write(self.db, insert, "insert appointment")
+        self._publish(str(new_id), "add")
 
         # Return a new appointment instance with the generated ID.
         return Appointment(
-            id=str(cursor.lastrowid),
+            id=str(new_id),
             title=appointment.title,
             date=appointment.date,
             time=appointment.time,
@@ -74,6 +84,51 @@ class AppointmentRepository(AppointmentRepositoryProtocol):
             notes=appointment.notes,
         )
     
+    def add_many(self, appointments: Iterable[Appointment]) -> List[Appointment]:
+        """
+        Insert many Appointments in one transaction.
+        Returns them with their repo assigned IDs, in input order.
+        """
+
+        appointments = list(appointments)
+        for appointment in appointments:
+            self._validate_required(appointment)
+
+        if not appointments:
+            return []
+
+        def insert() -> List[int]:
+            # Row by row, so each ID is read back rather than assumed to
+            # be consecutive; the single commit still covers the batch.
+            ids = [
+                self.db.execute(
+                    """
+                    INSERT INTO appointments (title, date, time, location, notes)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (a.title, a.date, a.time, a.location, a.notes),
+                ).lastrowid
+                for a in appointments
+            ]
+            self.db.commit()
+            return ids
+
+        new_ids = run_write(self.db, insert, "insert appointments")
+
+        for new_id in new_ids:
+            self._publish(str(new_id), "add")
+        return [
+            Appointment(
+                id=str(new_id),
+                title=a.title,
+                date=a.date,
+                time=a.time,
+                location=a.location,
+                notes=a.notes,
+            )
+            for new_id, a in zip(new_ids, appointments)
+        ]
+
     def get_all(self) -> List[Appointment]:
         """Return every Appointment stored in the repository."""
 
@@ -124,7 +179,8 @@ class AppointmentRepository(AppointmentRepositoryProtocol):
         Assume the Appointment already exists: Callers handle missing IDS.
         """
 
-        cursor = self.db.execute(
+        execute_write(
+            self.db,
             """
             UPDATE appointments
             SET title = ?, date = ?, time = ?, location = ?, notes = ?
@@ -137,13 +193,63 @@ class AppointmentRepository(AppointmentRepositoryProtocol):
                 appointment.location,
                 appointment.notes,
                 appointment.id,
-            )
+            ),
+            "update appointment",
         )
-        self.db.commit()
+        self._publish(appointment.id, "update")
         return appointment
     
+    def update_many(self, appointments: Iterable[Appointment]) -> List[Appointment]:
+        """Overwrite many stored Appointments in one transaction."""
+
+        appointments = list(appointments)
+        for appointment in appointments:
+            self._validate_required(appointment)
+            if not appointment.id:
+                raise ValueError("Appointments must have an id to be updated.")
+
+        if not appointments:
+            return []
+
+        execute_write(
+            self.db,
+            """
+            UPDATE appointments
+            SET title = ?, date = ?, time = ?, location = ?, notes = ?
+            WHERE id = ?
+            """,
+            [
+                (a.title, a.date, a.time, a.location, a.notes, a.id)
+                for a in appointments
+            ],
+            "update appointments",
+            many=True,
+        )
+
+        for appointment in appointments:
+            self._publish(appointment.id, "update")
+        return appointments
+
     def delete(self, appointment_id: str) -> None:
         """Delete the Appointment by the given ID."""
         
-        self.db.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
-        self.db.commit()
\ No newline at end of file
+        execute_write(
+            self.db,
+            "DELETE FROM appointments WHERE id = ?",
+            (appointment_id,),
+            "delete appointment",
+        )
+        self._publish(appointment_id, "delete")
+
+    def _publish(self, appointment_id: Optional[str], kind: str) -> None:
+        """Announce a committed write on the change feed, if there is one."""
+
+        if self.change_feed is not None:
+            self.change_feed.publish(Change("appointment", appointment_id, kind))
+
+    @staticmethod
+    def _validate_required(appointment: Appointment) -> None:
+        """Reject Appointments missing a column the table requires."""
+
+        if not appointment.title or not appointment.date or not appointment.time:
+            raise ValueError("Appointments need a title, date and time.")
@@ -0,0 +1,135 @@
+# Lets async UI handlers await repository calls instead of blocking on them.
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+# Import Data.
+from data.database import Database
+from data.write_queue import WRITE_METHODS, WriteQueue
+
+T = TypeVar("T")
+
+# Database attributes that get an awaitable twin on AsyncDatabase.
+REPOSITORIES = (
+    "medications",
+    "schedules",
+    "appointments",
+    "reminders",
+    "intake_logs",
+    "reminder_events",
+    "user_profile",
+)
+
+
+def _call(fn: Callable, args: tuple, kwargs: dict) -> Any:
+    """Run fn on the database thread, draining any generator it returns."""
+
+    result = fn(*args, **kwargs)
+    # iter_all() and friends must not be stepped from the UI loop.
+    if inspect.isgenerator(result):
+        result = list(result)
+    return result
+
+
+class AsyncRepository:
+    """
+    Awaitable view of one repository: every method call is shipped to the
+    database thread (or, for writes, to the write queue if there is one)
+    and returns a coroutine. Attributes that are not callable
+    (change_feed, cache, ...) are returned as they are.
+    """
+
+    def __init__(
+        self, repository: Any, run: Callable, write: Optional[Callable] = None
+    ):
+        self._repository = repository
+        self._run = run
+        self._write = write
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._repository, name)
+        if not callable(attr):
+            return attr
+
+        if self._write is not None and name in WRITE_METHODS:
+            @functools.wraps(attr)
+            async def write(*args, **kwargs):
+                return await self._write(self._repository, name, args, kwargs)
+
+            return write
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+
+        return call
+
+
+class AsyncDatabase:
+    """
+    asyncio facade over a Database. All calls run one at a time on a single
+    dedicated thread, which the ConnectionManager gives its own connection,
+    so the event loop only ever pays for handing the call over.
+
+    Given a started WriteQueue, writes and transactions go to it instead,
+    so the UI shares the app's single writer with the background services.
+
+        meds = await adb.medications.get_all(with_schedules=False)
+        await adb.transaction(lambda: (
+            db.medications.delete(med_id),
+            db.schedules.delete_by_medication(med_id),
+        ))
+    """
+
+    def __init__(self, db: Database, writer: Optional[WriteQueue] = None):
+        self.db = db
+        self.writer = writer
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+
+        write = None
+        if writer is not None:
+            write = functools.partial(self._queue_write, writer)
+        for name in REPOSITORIES:
+            setattr(self, name, AsyncRepository(getattr(db, name), self.run, write))
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Await fn(*args, **kwargs) executed on the database thread."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _call, fn, args, kwargs
+        )
+
+    async def transaction(self, fn: Callable[[], T]) -> T:
+        """Await fn() run inside db.transaction() on the database thread."""
+
+        if self.writer is not None:
+            # The writer already runs each batch inside db.transaction().
+            return await asyncio.wrap_future(self.writer.submit(fn))
+
+        def unit_of_work() -> T:
+            with self.db.transaction():
+                return fn()
+
+        return await self.run(unit_of_work)
+
+    @staticmethod
+    async def _queue_write(
+        writer: WriteQueue, repository: Any, name: str, args: tuple, kwargs: dict
+    ) -> Any:
+        """Await a repository write made by the write queue."""
+
+        future: Future
+        if name in ("add", "update", "delete") and len(args) == 1 and not kwargs:
+            # Keyed, so the queue can coalesce repeated saves of one row.
+            future = getattr(writer, name)(repository, args[0])
+        else:
+            future = writer.submit(getattr(repository, name), *args, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """Finish queued calls and stop the database thread."""
+
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,90 @@
+# Lets background services learn about writes without polling.
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class Change:
+    """Describes one write made through a repository."""
+
+    # Which kind of record changed - "schedule", "reminder", etc.
+    entity: str
+    # ID of the changed record, or None when a bulk write hit several rows.
+    entity_id: Optional[str]
+    # What happened to it - "add", "update" or "delete".
+    kind: str
+    # Owning medication, when the repository knows it.
+    medication_id: Optional[str] = None
+
+
+class ChangeFeed:
+    """
+    A minimal in-process publish/subscribe channel for repository writes.
+    Subscribers run synchronously on the writing thread, so they should
+    only record the change and return (e.g. set a flag or an Event).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[Change], None]] = []
+        # Per-thread buffer of changes held back by deferred().
+        self._local = threading.local()
+
+    def subscribe(self, callback: Callable[[Change], None]) -> Callable[[], None]:
+        """Register a callback; returns a function that unsubscribes it."""
+
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """
+        Hold back changes published on this thread until the block ends.
+        They are delivered if it exits normally and dropped if it raises,
+        so subscribers never hear about writes that were rolled back.
+        """
+
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            # Nested: the outermost block decides.
+            yield
+            return
+
+        self._local.pending = []
+        try:
+            yield
+        except BaseException:
+            self._local.pending = None
+            raise
+
+        held, self._local.pending = self._local.pending, None
+        for change in held:
+            self.publish(change)
+
+    def publish(self, change: Change) -> None:
+        """Deliver a change to every subscriber."""
+
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(change)
+            return
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception:
+                # A broken subscriber must never fail the write that
+                # triggered it; the data is already committed.
+                continue
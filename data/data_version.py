@@ -0,0 +1,113 @@
+# Notices writes that did not go through our repositories.
+import threading
+from datetime import timedelta
+from typing import Callable, Optional
+
+# Imports from Data.
+from data.change_feed import Change, ChangeFeed
+
+# How often the background monitor checks PRAGMA data_version.
+DEFAULT_POLL_INTERVAL = timedelta(seconds=2)
+
+
+class DataVersionMonitor:
+    """
+    Polls PRAGMA data_version on a dedicated connection and publishes
+    Change("database", None, "external") when the file was written by
+    something other than this process' repositories: another app
+    instance, a sync tool, or a connection that has no change feed.
+
+    SQLite bumps data_version for commits made on any other connection,
+    including our own repositories', so those are told apart with
+    local_commits (ConnectionManager.commits). A local and an external
+    commit landing in the same interval are reported as local only.
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable,
+        change_feed: ChangeFeed,
+        local_commits: Callable[[], int] = lambda: 0,
+        interval: timedelta = DEFAULT_POLL_INTERVAL,
+    ):
+        """Set up where to read data_version and where to announce changes."""
+
+        # Opens the monitor's own connection on first poll.
+        self.connection_factory = connection_factory
+        self.change_feed = change_feed
+        self.local_commits = local_commits
+        self.interval = interval
+        # Worker state.
+        self.running = False
+        self.thread = None
+        self._stop = threading.Event()
+        self._conn = None
+        self._last_version: Optional[int] = None
+        self._last_commits = 0
+
+    def poll(self) -> bool:
+        """
+        Check once; return True if an external write was announced.
+        The first call only records the starting point.
+        """
+
+        if self._conn is None:
+            self._conn = self.connection_factory()
+
+        # Read the counter first: a local commit landing in between
+        # then shows up as a (harmless) extra external change.
+        commits = self.local_commits()
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+        changed = (
+            self._last_version is not None
+            and version != self._last_version
+            and commits == self._last_commits
+        )
+        self._last_version = version
+        self._last_commits = commits
+
+        if changed:
+            self.change_feed.publish(Change("database", None, "external"))
+        return changed
+
+    def start(self) -> None:
+        """Poll once per interval in a daemon thread."""
+
+        # Prevent duplicate worker threads.
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background loop."""
+
+        self.running = False
+        self._stop.set()
+
+    def close(self) -> None:
+        """Stop polling and release the monitor's connection."""
+
+        self.stop()
+        if self.thread is not None:
+            self.thread.join()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _run_loop(self) -> None:
+        """Poll, then sleep until the next interval or stop()."""
+
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                # A locked or busy file just means trying again later.
+                pass
+
+            # Returns True as soon as stop() is called.
+            if self._stop.wait(self.interval.total_seconds()):
+                return
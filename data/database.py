@@ -1,7 +1,14 @@
 # Access to SQLite database and its functions.
 import sqlite3
+# Gives every thread its own connection slot.
+import threading
+# Builds the transaction() context managers.
+from contextlib import contextmanager
+# Marks the storage profile as a small, immutable settings object.
+from dataclasses import dataclass
 # Object for working with files and folder paths.
 from pathlib import Path
+from typing import Iterator, List
 # Import Data.
 from data.appointment_repository import AppointmentRepository
 from data.medication_repository import MedicationRepository
@@ -9,38 +16,353 @@ from data.schedule_repository import ScheduleRepository
 from data.reminder_repository import ReminderRepository
 from data.intake_log_repository import IntakeLogRepository
 from data.user_profile_repository import UserProfileRepository
+from data.reminder_event_repository import ReminderEventRepository
+from data.migrations import migrate
+from data.change_feed import ChangeFeed
+from data.errors import DatabaseError
+from data.validation import DEFAULT_VALIDATION, ValidationPolicy
+from data.identity_map import DEFAULT_CACHE_SIZE
+from data.data_version import DataVersionMonitor
+from data.retry import DEFAULT_RETRY, RetryPolicy, RetryStats
 
 
 # Path to the SQLite database file (stored inside the data folder)
 DB_PATH = Path(__file__).parent / "app.db"
 
 
-def get_connection():
+@dataclass(frozen=True)
+class StorageProfile:
+    """Tunable SQLite settings applied to every connection we open."""
+
+    # Page cache per connection. Negative values are KiB (SQLite convention).
+    cache_size: int = -8000
+    # Bytes of the database file to memory-map for reads (0 disables it).
+    mmap_size: int = 64 * 1024 * 1024
+    # NORMAL is durable under WAL and skips the fsync on every commit.
+    synchronous: str = "NORMAL"
+    # How long (ms) a connection waits on a lock before "database is locked".
+    busy_timeout_ms: int = 5000
+
+    def __post_init__(self):
+        """Reject synchronous levels SQLite does not understand."""
+
+        if self.synchronous.upper() not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+            raise ValueError(f"Unsupported synchronous level '{self.synchronous}'.")
+
+
+# Profile used by the app unless a caller asks for something else.
+DEFAULT_PROFILE = StorageProfile()
+
+
+def get_connection(path=DB_PATH, profile: StorageProfile = DEFAULT_PROFILE):
     """
-    Returns a SQLITE connection with foreign keys enabled.
-    All repositories will use this function.
+    Returns a SQLITE connection with foreign keys enabled, WAL journaling
+    and the given storage profile applied.
     """
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    # check_same_thread=False only so ConnectionManager.close() can close
+    # connections owned by other threads; each one is used by a single thread.
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        timeout=profile.busy_timeout_ms / 1000,
+    )
     conn.row_factory = sqlite3.Row  # Enables dict-like row access
     conn.execute("PRAGMA foreign_keys = ON;")  # Enforce FK constraints
+    # WAL lets readers keep going while a writer commits.
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)};")
+    conn.execute(f"PRAGMA synchronous = {profile.synchronous.upper()};")
+    conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)};")
+    conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)};")
+    return conn
+
+
+def get_read_only_connection(path=DB_PATH, profile: StorageProfile = DEFAULT_PROFILE):
+    """
+    Returns a SQLITE connection opened with mode=ro, for code that only
+    reads. It can never take the write lock, so under WAL it reads
+    alongside any writer. The database must already exist (in WAL mode).
+    """
+
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(
+        uri,
+        uri=True,
+        check_same_thread=False,
+        timeout=profile.busy_timeout_ms / 1000,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)};")
+    conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)};")
+    conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)};")
     return conn
 
 
+@contextmanager
+def read_snapshot(connection: sqlite3.Connection) -> Iterator[None]:
+    """
+    Hold one read transaction on a plain connection for the whole block,
+    so every query in it sees the database as of the block's start.
+    Under WAL this never blocks writers (they commit to the log and the
+    snapshot just stops seeing them). Nested blocks join the outer one.
+    """
+
+    if connection.in_transaction:
+        yield
+        return
+
+    connection.execute("BEGIN")
+    # The snapshot is fixed by the first read, so take it now.
+    connection.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+    try:
+        yield
+    finally:
+        # Nothing was written; ending the transaction releases the snapshot.
+        connection.rollback()
+
+
+class ConnectionManager:
+    """
+    Hands each thread its own connection to the same database file.
+
+    Exposes the subset of the sqlite3.Connection API the repositories use,
+    so a manager can be passed anywhere a connection was passed before.
+    """
+
+    def __init__(
+        self,
+        path=DB_PATH,
+        profile: StorageProfile = DEFAULT_PROFILE,
+        retry: RetryPolicy = DEFAULT_RETRY,
+        read_only: bool = False,
+    ):
+        self.path = path
+        self.profile = profile
+        # Read-only managers hand out mode=ro connections.
+        self.read_only = read_only
+        # How run_write() backs off when a write finds the database locked,
+        # and how often it had to.
+        self.retry_policy = retry
+        self.retry_stats = RetryStats()
+        # One connection per thread, created lazily on first use.
+        self._local = threading.local()
+        # Every connection handed out, so close() can release them all.
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        # Commits that wrote something, across all of this manager's
+        # connections. Lets DataVersionMonitor tell our writes from others.
+        self.commits = 0
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it if needed."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            connect = get_read_only_connection if self.read_only else get_connection
+            conn = connect(self.path, self.profile)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def in_transaction(self) -> bool:
+        """True while the calling thread is inside transaction()."""
+
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Group every write made on this thread into one transaction.
+        Repository commits inside the block are deferred to its end; any
+        exception rolls everything back. Nested blocks join the outer one.
+        """
+
+        conn = self.connection()
+        depth = getattr(self._local, "depth", 0)
+
+        if depth == 0:
+            # Close out any implicit transaction left open by a plain write.
+            if conn.in_transaction:
+                conn.commit()
+                self._count_commit()
+            # Take the write lock up front: a deferred BEGIN that reads
+            # first can fail with SQLITE_BUSY_SNAPSHOT when it upgrades,
+            # which waiting cannot fix.
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.rollback_only = False
+
+        self._local.depth = depth + 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+            raise
+
+        self._local.depth = depth
+        if depth > 0:
+            return
+
+        if self._local.rollback_only:
+            # A repository hit an error inside the block and the caller
+            # swallowed it; committing would keep a half-done batch.
+            conn.rollback()
+            raise DatabaseError("Transaction rolled back after a failed write.")
+
+        try:
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise DatabaseError(f"Failed to commit transaction: {e}") from e
+        self._count_commit()
+
+    # sqlite3.Connection-compatible surface used by the repositories.
+    def cursor(self) -> sqlite3.Cursor:
+        return self.connection().cursor()
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self.connection().executemany(sql, seq_of_parameters)
+
+    def commit(self) -> None:
+        # Inside transaction() the block commits once on exit.
+        if not self.in_transaction:
+            conn = self.connection()
+            # Only commits that close a write count as changes.
+            wrote = conn.in_transaction
+            conn.commit()
+            if wrote:
+                self._count_commit()
+
+    def rollback(self) -> None:
+        if self.in_transaction:
+            # Leave the actual rollback to the outermost block.
+            self._local.rollback_only = True
+        else:
+            self.connection().rollback()
+
+    def _count_commit(self) -> None:
+        with self._lock:
+            self.commits += 1
+
+    def close(self) -> None:
+        """Close every connection this manager has opened."""
+
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class ReadSnapshot:
+    """
+    The read side of a Database: repositories for the tables pure readers
+    need, on read-only connections. Get it through Database.snapshot().
+    """
+
+    def __init__(self, connection: ConnectionManager, validation: ValidationPolicy):
+        # No change feed (they never write) and no identity map (a cached
+        # object could be newer than the snapshot being read).
+        self.schedules = ScheduleRepository(connection, validation=validation)
+        self.medications = MedicationRepository(
+            connection, self.schedules, validation=validation
+        )
+        self.reminders = ReminderRepository(connection, validation=validation)
+        self.intake_logs = IntakeLogRepository(connection, validation=validation)
+
+
 class Database:
     """A wrapper around SQLite providing simple, safe database access."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        path=DB_PATH,
+        profile: StorageProfile = DEFAULT_PROFILE,
+        validation: ValidationPolicy = DEFAULT_VALIDATION,
+        retry: RetryPolicy = DEFAULT_RETRY,
+    ):
+
+        # Thread-aware connection handle shared by all repositories.
+        # Each thread (UI handlers, scheduler) gets its own connection.
+        self.conn = ConnectionManager(path, profile, retry)
 
-        # Obtain the shared DB connection used by all repositories
-        self.conn = get_connection()
+        # Announces repository writes to background services.
+        self.changes = ChangeFeed()
 
         # Pass the same connection to all repositories.
         # This is the order of dependency.
-        self.schedules = ScheduleRepository(self.conn)
-        self.medications = MedicationRepository(self.conn, self.schedules)
-        self.appointments = AppointmentRepository(self.conn)
-        self.reminders = ReminderRepository(self.conn)
-        self.intake_logs = IntakeLogRepository(self.conn)
-        self.user_profile = UserProfileRepository(self.conn)
-        
\ No newline at end of file
+        # Validated repositories share one read-validation policy.
+        # Medications and schedules keep an identity map for get_by_id.
+        self.schedules = ScheduleRepository(
+            self.conn, self.changes, validation, cache_size=DEFAULT_CACHE_SIZE
+        )
+        self.medications = MedicationRepository(
+            self.conn, self.schedules, self.changes, validation,
+            cache_size=DEFAULT_CACHE_SIZE,
+        )
+        self.appointments = AppointmentRepository(self.conn, self.changes)
+        self.reminders = ReminderRepository(self.conn, self.changes, validation)
+        self.intake_logs = IntakeLogRepository(self.conn, self.changes, validation)
+        self.reminder_events = ReminderEventRepository(self.conn, self.changes)
+        self.user_profile = UserProfileRepository(self.conn, self.changes)
+
+        # Evolve the baseline tables to the current schema version.
+        self.schema_version = migrate(self.conn)
+
+        # Read-only connections (one per thread) for views and services
+        # that only read; see snapshot(). Opened after the migration, so
+        # the file and its tables exist.
+        self.reader = ConnectionManager(path, profile, read_only=True)
+        self._reads = ReadSnapshot(self.reader, validation)
+
+        # Announces writes made outside these repositories (started by
+        # the app; tests can call poll() directly).
+        self.external_writes = DataVersionMonitor(
+            lambda: get_read_only_connection(path, profile),
+            self.changes,
+            local_commits=lambda: self.conn.commits,
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run several repository calls as one unit of work.
+        Everything commits together on exit, or nothing does if the block
+        raises. Change events are held back until the commit succeeds.
+
+            with db.transaction():
+                db.medications.delete(med_id)
+                db.schedules.delete_by_medication(med_id)
+        """
+
+        with self.changes.deferred(), self.conn.transaction():
+            yield
+
+    @contextmanager
+    def snapshot(self) -> Iterator[ReadSnapshot]:
+        """
+        Read-only repositories that all see one consistent state of the
+        database, on the calling thread's read-only connection. Long
+        scans inside the block never hold up writers.
+
+            with db.snapshot() as snap:
+                meds = snap.medications.get_all(with_schedules=False)
+                logs = list(snap.intake_logs.iter_all())
+        """
+
+        with read_snapshot(self.reader.connection()):
+            yield self._reads
+
+    def close(self) -> None:
+        """Release every connection opened for this database."""
+
+        self.external_writes.close()
+        self.reader.close()
+        self.conn.close()
@@ -0,0 +1,57 @@
+# Integer encodings for the timestamp columns.
+# Datetimes are stored as UTC epoch microseconds and dates as days since
+# 1970-01-01, so range filters, ordering and indexes compare plain
+# integers that mean the same instant whatever offset the text carried.
+# Naive datetimes are the app's local wall-clock time (what
+# IntakeLogValidator compares against). They are encoded as wall-clock
+# microseconds, read as if they were UTC, so the stored integer does not
+# depend on the machine's time zone or skip/repeat around DST changes.
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+# Day number of 1970-01-01 in the proleptic Gregorian ordinal calendar.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_ONE_US = timedelta(microseconds=1)
+# Zero points for aware instants and for naive wall-clock values.
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_WALL = datetime(1970, 1, 1)
+
+
+def datetime_to_epoch_us(value: Optional[datetime]) -> Optional[int]:
+    """Encode a datetime as UTC epoch microseconds (naive means wall-clock)."""
+
+    if value is None:
+        return None
+
+    # timedelta arithmetic is exact, unlike float timestamps.
+    epoch = _EPOCH_UTC if value.tzinfo is not None else _EPOCH_WALL
+    return (value - epoch) // _ONE_US
+
+
+def epoch_us_to_datetime(value: Optional[int], aware: bool = False) -> Optional[datetime]:
+    """
+    Decode UTC epoch microseconds. Returns naive wall-clock time by
+    default, or an aware UTC datetime when aware=True.
+    """
+
+    if value is None:
+        return None
+
+    return (_EPOCH_UTC if aware else _EPOCH_WALL) + timedelta(microseconds=value)
+
+
+def date_to_epoch_day(value: Optional[date]) -> Optional[int]:
+    """Encode a date as days since 1970-01-01."""
+
+    if value is None:
+        return None
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def epoch_day_to_date(value: Optional[int]) -> Optional[date]:
+    """Decode days since 1970-01-01."""
+
+    if value is None:
+        return None
+    return date.fromordinal(value + _EPOCH_ORDINAL)
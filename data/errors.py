@@ -4,6 +4,12 @@ class DatabaseError(Exception):
     pass
 
 
+class DuplicateIntakeLogError(DatabaseError):
+    """Raised when a scheduled dose already has an intake log."""
+
+    pass
+
+
 class NotFoundError(Exception):
     """Raised when a requested record does not exist."""
     
@@ -0,0 +1,100 @@
+# Bounded read-through cache that repositories keep in front of get_by_id.
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Entries kept per repository when the Database turns caching on.
+DEFAULT_CACHE_SIZE = 256
+
+
+class IdentityMap(Generic[T]):
+    """
+    Maps an ID to the one loaded object for it, evicting the least
+    recently used entry once capacity is reached. A capacity of 0
+    turns caching off: every lookup goes to the loader.
+
+    Shared between threads, so every operation takes a lock. Loads run
+    outside the lock; a load that overlaps an invalidation is returned
+    but not stored, so a write can never be shadowed by an older read.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_SIZE):
+        if capacity < 0:
+            raise ValueError("capacity must be 0 or more.")
+
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, T]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; see get_or_load.
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get_or_load(
+        self, key: Hashable, loader: Callable[[], T], store: bool = True
+    ) -> T:
+        """
+        Return the cached object for key, or call loader and remember
+        its result. Pass store=False to load without caching (e.g. while
+        a transaction holds uncommitted rows).
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        if store and self.capacity:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = value
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.capacity:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget one entry."""
+
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[T], bool]) -> None:
+        """Forget every entry whose object matches the predicate."""
+
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, v in self._entries.items() if predicate(v)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget everything. The hit/miss counters are kept."""
+
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Current size, capacity and hit/miss counters."""
+
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,31 +1,109 @@
 from __future__ import annotations
 
+# Tells a duplicate dose apart from other write failures.
+import sqlite3
 # Used for storing and formatting timestamps.
 from datetime import datetime
-from typing import List, Protocol
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Set, Tuple
 # Import Models.
 from models.intake_log import IntakeLog
 # Import Validators.
 from validators.intake_log_validator import IntakeLogValidator
 # Import Data.
-from data.errors import DatabaseError, NotFoundError
+from data.errors import DatabaseError, DuplicateIntakeLogError, NotFoundError
+from data.change_feed import Change, ChangeFeed
+from data.validation import DEFAULT_VALIDATION, IntegrityIssue, ValidationPolicy
+from data.epoch import datetime_to_epoch_us, epoch_us_to_datetime
+from data.rows import select_list, tuple_cursor
+from data.retry import execute_write
+
+# Upper bound on IDs bound into a single IN (...) query.
+_MAX_IDS_PER_QUERY = 500
+
+# Sort directions accepted by get_between.
+_ORDERS = {"asc": "ASC", "desc": "DESC"}
+
+# Rows pulled per fetchmany() call by the streaming iterators.
+DEFAULT_CHUNK_SIZE = 500
+
+# Columns read back, in the order _row_to_intake_log unpacks them.
+_COLUMNS = (
+    "id", "medication_id", "scheduled_time", "taken_time",
+    "amount_taken", "notes", "created_at",
+    "scheduled_us", "taken_us", "created_us",
+)
+_SELECT = f"SELECT {select_list(_COLUMNS)} FROM intake_logs"
+
+# Shared by add/add_many and update/update_many.
+# The ISO text columns are still written next to their integer
+# (epoch microsecond) twins so older readers keep working.
+_INSERT_SQL = """
+    INSERT INTO intake_logs (
+        id, medication_id, scheduled_time, taken_time,
+        amount_taken, notes, created_at,
+        scheduled_us, taken_us, created_us
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_UPDATE_SQL = """
+    UPDATE intake_logs
+    SET medication_id = ?, scheduled_time = ?, taken_time = ?,
+        amount_taken = ?, notes = ?, scheduled_us = ?, taken_us = ?
+    WHERE id = ?
+"""
 
 class IntakeLogRepositoryProtocol(Protocol): 
     """Outlines what a Intake log repository must implement."""  
 
     def add(self, log: IntakeLog) -> IntakeLog: ... 
+    def add_many(self, logs: Iterable[IntakeLog]) -> List[IntakeLog]: ...
     def update(self, log: IntakeLog) -> IntakeLog: ... 
+    def update_many(self, logs: Iterable[IntakeLog]) -> List[IntakeLog]: ...
     def delete(self, log_id: str) -> None: ... 
     def get_by_id(self, log_id: str) -> IntakeLog: ... 
     def get_all(self) -> List[IntakeLog]: ... 
+    def iter_all(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[IntakeLog]: ...
+    def iter_range(
+        self, start: datetime, end: datetime, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntakeLog]: ...
     def get_by_medication(self, medication_id: str) -> List[IntakeLog]: ...
+    def get_between(
+        self,
+        start: datetime,
+        end: datetime,
+        medication_ids: Optional[Iterable[str]] = None,
+        order: str = "asc",
+    ) -> List[IntakeLog]: ...
+    def count_between(
+        self,
+        start: datetime,
+        end: datetime,
+        medication_ids: Optional[Iterable[str]] = None,
+    ) -> int: ...
+    def latest_per_medication(self) -> Dict[str, IntakeLog]: ...
+    def get_taken_keys(
+        self, window_start: datetime, window_end: datetime
+    ) -> Set[Tuple[str, int]]: ...
+    def is_taken(self, medication_id: str, scheduled_time: datetime) -> bool: ...
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]: ...
 
 
 class IntakeLogRepository(IntakeLogRepositoryProtocol):
     """SQLite-backed repository for Intake Log objects."""
 
-    def __init__(self, connection) -> None:
+    def __init__(
+        self,
+        connection,
+        change_feed: Optional[ChangeFeed] = None,
+        validation: ValidationPolicy = DEFAULT_VALIDATION,
+    ) -> None:
         self.connection = connection
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
+        # Rows are validated when written; this decides about reads.
+        self.validation = validation
         self._create_table()
 
     def _create_table(self) -> None:
@@ -43,7 +121,7 @@ class IntakeLogRepository(IntakeLogRepositoryProtocol):
                 amount_taken REAL NOT NULL,
                 notes TEXT,
                 created_at TEXT NOT NULL,
-                FOREIGN KEY (medication_id) REFERENCES medication(id) ON DELETE CASCADE
+                FOREIGN KEY (medication_id) REFERENCES medications(id) ON DELETE CASCADE
             );
             """
         )
@@ -58,29 +136,8 @@ class IntakeLogRepository(IntakeLogRepositoryProtocol):
         # Validate before writing to the database.
         IntakeLogValidator.validate(log)
 
-        conn = self.connection
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            INSERT INTO intake_logs (
-                id, medication_id, scheduled_time, taken_time,
-                amount_taken, notes, created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, 
-            (
-                log.id,
-                log.medication_id,
-                log.scheduled_time.isoformat() if log.scheduled_time else None,
-                log.taken_time.isoformat(),
-                log.amount_taken,
-                log.notes,
-                log.created_at.isoformat(),
-            ),
-        )
-        
-        conn.commit()
+        self._write(_INSERT_SQL, self._insert_params(log), "insert intake log")
+        self._publish(log.id, "add", log.medication_id)
         return log
 
     def update(self, log: IntakeLog) -> IntakeLog:
@@ -92,44 +149,63 @@ class IntakeLogRepository(IntakeLogRepositoryProtocol):
         # Validate before updating.
         IntakeLogValidator.validate(log)
 
-        conn = self.connection
-        cursor = conn.cursor()
+        self._write(_UPDATE_SQL, self._update_params(log), "update intake log")
+        self._publish(log.id, "update", log.medication_id)
+        return log
 
-        cursor.execute("""
-            UPDATE intake_logs
-            SET medication_id = ?, scheduled_time = ?, taken_time = ?,
-                amount_taken = ?, notes = ?
-            WHERE id = ?
-        """, (
-            log.medication_id,
-            log.scheduled_time.isoformat() if log.scheduled_time else None,
-            log.taken_time.isoformat(),
-            log.amount_taken,
-            log.notes,
-            log.id,
-        ))
+    def add_many(self, logs: Iterable[IntakeLog]) -> List[IntakeLog]:
+        """
+        Store many Intake logs in one transaction.
+        Every log is validated before anything is written.
+        """
 
-        conn.commit()
-        return log
+        logs = list(logs)
+        for log in logs:
+            IntakeLogValidator.validate(log)
+
+        self._write_many(
+            _INSERT_SQL, [self._insert_params(log) for log in logs], "insert"
+        )
+
+        for log in logs:
+            self._publish(log.id, "add", log.medication_id)
+        return logs
+
+    def update_many(self, logs: Iterable[IntakeLog]) -> List[IntakeLog]:
+        """Overwrite many stored Intake logs in one transaction."""
+
+        logs = list(logs)
+        for log in logs:
+            IntakeLogValidator.validate(log)
+
+        self._write_many(
+            _UPDATE_SQL, [self._update_params(log) for log in logs], "update"
+        )
+
+        for log in logs:
+            self._publish(log.id, "update", log.medication_id)
+        return logs
 
     def delete(self, log_id: str) -> None:
         """Delete the Intake log by the given ID."""
 
-        conn = self.connection
-        cursor = conn.cursor()
-
-        cursor.execute("DELETE FROM intake_logs WHERE id = ?", (log_id,))
-        conn.commit()
+        execute_write(
+            self.connection,
+            "DELETE FROM intake_logs WHERE id = ?",
+            (log_id,),
+            "delete intake log",
+        )
+        self._publish(log_id, "delete")
 
     def get_by_id(self, log_id: str) -> IntakeLog:
         """Look up a single Intake log by its unique ID."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
 
-            cursor.execute("SELECT * FROM intake_logs WHERE id = ?", (log_id,))
+            cursor.execute(f"{_SELECT} WHERE id = ?", (log_id,))
             row = cursor.fetchone()
         except Exception as e:
             raise DatabaseError(f"Failed to fetch intake log: {e}")
@@ -138,51 +214,365 @@ class IntakeLogRepository(IntakeLogRepositoryProtocol):
             raise NotFoundError(f"Intake log with id {log_id} not found.")
         
         log = self._row_to_intake_log(row)
-        IntakeLogValidator.validate(log)
         return log
     
 
     def get_all(self) -> List[IntakeLog]:
         """Return every Intake log stored in the repository."""
 
-        conn = self.connection
-        cursor = conn.cursor()
+        return list(self.iter_all())
 
-        cursor.execute("SELECT * FROM intake_logs")
-        rows = cursor.fetchall()
-        
+    def iter_all(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[IntakeLog]:
+        """
+        Yield every Intake log, reading chunk_size rows at a time.
+        Memory use stays flat no matter how many logs are stored.
+        """
 
-        return [self._row_to_intake_log(r) for r in rows]
+        yield from self._stream(_SELECT, (), chunk_size)
+
+    def iter_range(
+        self, start: datetime, end: datetime, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntakeLog]:
+        """Yield logs taken in [start, end), oldest first, chunk by chunk."""
+
+        yield from self._stream(
+            f"""
+            {_SELECT}
+            WHERE taken_us >= ? AND taken_us < ?
+            ORDER BY taken_us
+            """,
+            (datetime_to_epoch_us(start), datetime_to_epoch_us(end)),
+            chunk_size,
+        )
 
     def get_by_medication(self, medication_id: str) -> List[IntakeLog]:
         """Fetch every Intake log recorded for the given medication."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         cursor.execute(
-            "SELECT * FROM intake_logs WHERE medication_id = ?", 
+            f"{_SELECT} WHERE medication_id = ?",
             (medication_id,)
         )
         rows = cursor.fetchall()
         
         return [self._row_to_intake_log(r) for r in rows]
 
+    def get_between(
+        self,
+        start: datetime,
+        end: datetime,
+        medication_ids: Optional[Iterable[str]] = None,
+        order: str = "asc",
+    ) -> List[IntakeLog]:
+        """
+        Return logs taken in [start, end), sorted by taken_time.
+        Pass medication_ids to limit the result to those medications,
+        and order="desc" for newest first.
+        """
+
+        if order not in _ORDERS:
+            raise ValueError(f"order must be one of {sorted(_ORDERS)}.")
+
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+        logs: List[IntakeLog] = []
+
+        for where, params in self._range_filters(start, end, medication_ids):
+            try:
+                cursor.execute(
+                    f"{_SELECT} WHERE {where} "
+                    f"ORDER BY taken_us {_ORDERS[order]}",
+                    params,
+                )
+                rows = cursor.fetchall()
+            except Exception as e:
+                raise DatabaseError(f"Failed to fetch intake logs: {e}")
+
+            logs.extend(self._row_to_intake_log(r) for r in rows)
+
+        # Several ID chunks each come back sorted; merge them.
+        if medication_ids is not None and len(logs) > 1:
+            logs.sort(key=lambda log: log.taken_time, reverse=order == "desc")
+        return logs
+
+    def count_between(
+        self,
+        start: datetime,
+        end: datetime,
+        medication_ids: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Count logs taken in [start, end) without loading them."""
+
+        conn = self.connection
+        cursor = conn.cursor()
+        total = 0
+
+        for where, params in self._range_filters(start, end, medication_ids):
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM intake_logs WHERE {where}", params)
+                total += cursor.fetchone()[0]
+            except Exception as e:
+                raise DatabaseError(f"Failed to count intake logs: {e}")
+
+        return total
+
+    def latest_per_medication(self) -> Dict[str, IntakeLog]:
+        """Return the most recently taken log of every medication."""
+
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+
+        try:
+            # SQLite fills bare columns from the row that holds the MAX.
+            cursor.execute(
+                f"""
+                SELECT {select_list(_COLUMNS)}, MAX(taken_us) FROM intake_logs
+                GROUP BY medication_id
+                """
+            )
+            rows = cursor.fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch latest intake logs: {e}")
+
+        # The trailing MAX(taken_us) column is not part of the model.
+        return {row[1]: self._row_to_intake_log(row[:-1]) for row in rows}
+
+    def get_taken_keys(
+        self, window_start: datetime, window_end: datetime
+    ) -> Set[Tuple[str, int]]:
+        """
+        Return (medication_id, scheduled_us) for every dose logged as
+        taken with a scheduled_time in [window_start, window_end).
+        Keyed on the same integer is_taken compares, so the two agree.
+        One query per call, so callers can check many doses with set lookups.
+        """
+
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+
+        try:
+            cursor.execute(
+                """
+                SELECT medication_id, scheduled_us FROM intake_logs
+                WHERE scheduled_us >= ? AND scheduled_us < ?
+                """,
+                (datetime_to_epoch_us(window_start), datetime_to_epoch_us(window_end)),
+            )
+            rows = cursor.fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch taken doses: {e}")
+
+        return set(rows)
+
+    def is_taken(self, medication_id: str, scheduled_time: datetime) -> bool:
+        """Return True if a log exists for this exact scheduled dose."""
+
+        conn = self.connection
+        cursor = conn.cursor()
+
+        try:
+            # Point lookup on the unique (medication_id, scheduled_us) index.
+            # The instant is compared, so "+01:00" and "Z" spellings match.
+            cursor.execute(
+                """
+                SELECT 1 FROM intake_logs
+                WHERE medication_id = ? AND scheduled_us = ?
+                LIMIT 1
+                """,
+                (medication_id, datetime_to_epoch_us(scheduled_time)),
+            )
+            row = cursor.fetchone()
+        except Exception as e:
+            raise DatabaseError(f"Failed to check intake log: {e}")
+
+        return row is not None
+
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]:
+        """
+        Decode and validate every stored row, yielding one issue per row
+        that fails. Streams the table, so it is safe to run in the background.
+        """
+
+        cursor = tuple_cursor(self.connection)
+
+        try:
+            cursor.execute(_SELECT)
+        except Exception as e:
+            raise DatabaseError(f"Failed to scan intake logs: {e}")
+
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    try:
+                        IntakeLogValidator.validate(self._row_to_intake_log(row))
+                    except Exception as e:
+                        yield IntegrityIssue("intake_log", row[0], str(e))
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _range_filters(
+        start: datetime,
+        end: datetime,
+        medication_ids: Optional[Iterable[str]],
+    ) -> Iterator[Tuple[str, list]]:
+        """
+        Yield (WHERE clause, parameters) pairs for a taken_time range,
+        one per chunk of medication IDs (or a single unfiltered pair).
+        """
+
+        bounds = [datetime_to_epoch_us(start), datetime_to_epoch_us(end)]
+
+        if medication_ids is None:
+            yield "taken_us >= ? AND taken_us < ?", bounds
+            return
+
+        ids = list(dict.fromkeys(medication_ids))
+        # Stay well below SQLite's bound-parameter limit.
+        for i in range(0, len(ids), _MAX_IDS_PER_QUERY):
+            chunk = ids[i:i + _MAX_IDS_PER_QUERY]
+            placeholders = ", ".join("?" for _ in chunk)
+            yield (
+                f"medication_id IN ({placeholders}) "
+                "AND taken_us >= ? AND taken_us < ?",
+                chunk + bounds,
+            )
+
+    def _stream(self, sql: str, params: tuple, chunk_size: int) -> Iterator[IntakeLog]:
+        """Run a query and decode its rows lazily, fetchmany() at a time."""
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+
+        # A private cursor, so other queries can run while this one streams.
+        cursor = tuple_cursor(self.connection)
+
+        try:
+            cursor.execute(sql, params)
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch intake logs: {e}")
+
+        try:
+            while True:
+                try:
+                    rows = cursor.fetchmany(chunk_size)
+                except Exception as e:
+                    raise DatabaseError(f"Failed to fetch intake logs: {e}")
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._row_to_intake_log(row)
+        finally:
+            cursor.close()
+
+    def _write_many(self, sql: str, params: List[tuple], action: str) -> None:
+        """Run one statement for every parameter row, then commit once."""
+
+        if not params:
+            return
+
+        self._write(sql, params, f"{action} intake logs", many=True)
+
+    def _write(self, sql: str, params, action: str, many: bool = False) -> None:
+        """execute_write, reporting a second log for a logged dose as such."""
+
+        try:
+            execute_write(self.connection, sql, params, action, many=many)
+        except DatabaseError as e:
+            cause = e.__cause__
+            # The one-log-per-dose index; a clash on the ID, or a NOT NULL
+            # failure on medication_id, stays generic.
+            if (
+                isinstance(cause, sqlite3.IntegrityError)
+                and str(cause).startswith("UNIQUE constraint failed")
+                and "intake_logs.medication_id" in str(cause)
+            ):
+                raise DuplicateIntakeLogError(
+                    f"Failed to {action}: that dose already has an intake log."
+                ) from e
+            raise
+
+    @staticmethod
+    def _insert_params(log: IntakeLog) -> tuple:
+        """Column values for _INSERT_SQL."""
+
+        return (
+            log.id,
+            log.medication_id,
+            log.scheduled_time.isoformat() if log.scheduled_time else None,
+            log.taken_time.isoformat(),
+            log.amount_taken,
+            log.notes,
+            log.created_at.isoformat(),
+            datetime_to_epoch_us(log.scheduled_time),
+            datetime_to_epoch_us(log.taken_time),
+            datetime_to_epoch_us(log.created_at),
+        )
+
+    @staticmethod
+    def _update_params(log: IntakeLog) -> tuple:
+        """Column values for _UPDATE_SQL."""
+
+        return (
+            log.medication_id,
+            log.scheduled_time.isoformat() if log.scheduled_time else None,
+            log.taken_time.isoformat(),
+            log.amount_taken,
+            log.notes,
+            datetime_to_epoch_us(log.scheduled_time),
+            datetime_to_epoch_us(log.taken_time),
+            log.id,
+        )
+
+    def _publish(
+        self, log_id: str, kind: str, medication_id: Optional[str] = None
+    ) -> None:
+        """Announce a committed write on the change feed, if there is one."""
+
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                Change("intake_log", log_id, kind, medication_id)
+            )
+
     def _row_to_intake_log(self, row) -> IntakeLog:
-        """Convert a SQLite row into an Intake log model."""
+        """Convert a row in _COLUMNS order into an Intake log model."""
+
+        (log_id, medication_id, scheduled_time, taken_time,
+         amount_taken, notes, created_at,
+         scheduled_us, taken_us, created_us) = row
 
         log = IntakeLog(
-            id=row["id"],
-            medication_id=row["medication_id"],
-            scheduled_time=datetime.fromisoformat(row["scheduled_time"]) 
-            if row["scheduled_time"] 
-            else None,
-            taken_time=datetime.fromisoformat(row["taken_time"]),
-            amount_taken=row["amount_taken"],
-            notes=row["notes"],
-            created_at=datetime.fromisoformat(row["created_at"]),
+            id=log_id,
+            medication_id=medication_id,
+            scheduled_time=_read_timestamp(scheduled_time, scheduled_us),
+            taken_time=_read_timestamp(taken_time, taken_us),
+            amount_taken=amount_taken,
+            notes=notes,
+            created_at=_read_timestamp(created_at, created_us),
         )
 
-        # Validate DB row after conversion (defensive programming).
-        IntakeLogValidator.validate(log)
-        return log
\ No newline at end of file
+        # Re-validate the stored row only if the read policy asks for it.
+        if self.validation.validate_read():
+            IntakeLogValidator.validate(log)
+        return log
+
+
+def _read_timestamp(text: Optional[str], epoch_us: Optional[int]) -> Optional[datetime]:
+    """
+    Decode a timestamp from whichever column the row has filled.
+    The ISO text is tried first: datetime.fromisoformat is implemented in C
+    and decodes faster per row than any integer conversion (see
+    tests/test_epoch.py). The integer column covers rows without text.
+    """
+
+    if text:
+        return datetime.fromisoformat(text)
+
+    return epoch_us_to_datetime(epoch_us)
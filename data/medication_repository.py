@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import List, Protocol
+# Builds _transaction(); nullcontext stands in when there is no feed.
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol
 from datetime import datetime
 # Import Models.
 from models.medication import Medication
@@ -7,26 +9,68 @@ from models.schedule import Schedule
 # Import Data.
 from data.schedule_repository import ScheduleRepositoryProtocol
 from data.errors import DatabaseError, NotFoundError
+from data.change_feed import Change, ChangeFeed
+from data.validation import DEFAULT_VALIDATION, IntegrityIssue, ValidationPolicy
+from data.epoch import datetime_to_epoch_us, epoch_us_to_datetime
+from data.rows import select_list, tuple_cursor
+from data.identity_map import IdentityMap
+from data.retry import execute_write, run_write
 # Import Validators.
 from validators.medication_validator import MedicationValidator
 
+# Upper bound on IDs bound into a single IN (...) query.
+_MAX_IDS_PER_QUERY = 500
+
+# Rows pulled per fetchmany() call when scanning the table.
+DEFAULT_CHUNK_SIZE = 500
+
+# Columns read back, in the order _row_to_medication unpacks them.
+_COLUMNS = (
+    "id", "name", "description", "dosage",
+    "notes", "is_active", "created_at", "created_us",
+)
+_SELECT = f"SELECT {select_list(_COLUMNS)} FROM medications"
+
 class MedicationRepositoryProtocol(Protocol): 
     """Outlines what a Medication repository must implement.""" 
 
     def add(self, medication: Medication) -> Medication: ... 
-    def get_all(self) -> List[Medication]: ... 
+    def get_all(self, with_schedules: bool = True) -> List[Medication]: ... 
+    def get_many(
+        self, medication_ids: Iterable[str], with_schedules: bool = True
+    ) -> List[Medication]: ...
     def get_by_id(self, medication_id: str) -> Medication: ... 
     def update(self, medication: Medication) -> Medication: ... 
     def delete(self, medication_id: str) -> None: ...
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]: ...
 
 
 class MedicationRepository(MedicationRepositoryProtocol):
     """SQLite-backed repository for Medication objects."""
 
-    def __init__(self, connection, schedule_repo: ScheduleRepositoryProtocol):
+    def __init__(
+        self,
+        connection,
+        schedule_repo: ScheduleRepositoryProtocol,
+        change_feed: Optional[ChangeFeed] = None,
+        validation: ValidationPolicy = DEFAULT_VALIDATION,
+        cache_size: int = 0,
+    ):
 
         self.connection = connection
         self.schedule_repo = schedule_repo
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
+        # Rows are validated when written; this decides about reads.
+        self.validation = validation
+        # get_by_id results, with their schedules; 0 disables it.
+        self.cache: IdentityMap[Medication] = IdentityMap(cache_size)
+        # Cached medications carry their schedules, so schedule writes
+        # (made through any repository on this feed) drop them too.
+        if change_feed is not None and cache_size:
+            change_feed.subscribe(self._on_change)
         self._create_table()
 
     def _create_table(self) -> None:
@@ -59,60 +103,111 @@ class MedicationRepository(MedicationRepositoryProtocol):
     def add(self, medication: Medication) -> Medication:
         """Validate and insert a new medication into the database."""
         MedicationValidator.validate(medication)
-        
-        # Save schedules first.
-        for sched in medication.schedule:
-            self.schedule_repo.add(sched)
 
         conn = self.connection
-        cursor = conn.cursor()
-
-        try:
-
-            cursor.execute(
-                """
-                INSERT INTO medications (id, name, description, dosage, notes, is_active, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, 
-                (
-                    medication.id,
-                    medication.name,
-                    medication.description,
-                    medication.dosage,
-                    medication.notes,
-                    1 if medication.is_active else 0,
-                    medication.created_at.isoformat(),
-                ),
-            )
-            conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to insert medication: {e}")
 
+        # The medication row and its schedules are saved together, and
+        # retried together if the database was locked.
+        def insert() -> None:
+            with self._transaction():
+                conn.execute(
+                    """
+                    INSERT INTO medications (id, name, description, dosage, notes, is_active, created_at, created_us)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, 
+                    (
+                        medication.id,
+                        medication.name,
+                        medication.description,
+                        medication.dosage,
+                        medication.notes,
+                        1 if medication.is_active else 0,
+                        medication.created_at.isoformat(),
+                        datetime_to_epoch_us(medication.created_at),
+                    ),
+                )
+                conn.commit()
+
+                # Save schedules once their medication exists (foreign key).
+                for sched in medication.schedule:
+                    self.schedule_repo.add(sched)
+
+        run_write(conn, insert, "insert medication")
+        self._publish(medication.id, "add")
         return medication
 
-    def get_all(self) -> List[Medication]:
-        """Return all medications from the database."""
+    def get_all(self, with_schedules: bool = True) -> List[Medication]:
+        """
+        Return all medications from the database.
+        Schedules are loaded in one batched query; pass with_schedules=False
+        when only the medication columns are needed.
+        """
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
+
+        try:
+            cursor.execute(_SELECT)
+            rows = cursor.fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch medications: {e}")
 
-        cursor.execute("SELECT * FROM medications")
-        rows = cursor.fetchall()
+        return self._rows_to_medications(rows, with_schedules)
 
+    def get_many(
+        self, medication_ids: Iterable[str], with_schedules: bool = True
+    ) -> List[Medication]:
+        """
+        Return the medications with the given IDs, in the order requested.
+        Unknown IDs are skipped rather than raising NotFoundError.
+        """
 
-        meds =  [self._row_to_medication(row) for row in rows]
+        ids = list(dict.fromkeys(medication_ids))
+        if not ids:
+            return []
 
-        return meds
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+        rows = []
+
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(ids), _MAX_IDS_PER_QUERY):
+            chunk = ids[start:start + _MAX_IDS_PER_QUERY]
+            placeholders = ", ".join("?" for _ in chunk)
+
+            try:
+                cursor.execute(
+                    f"{_SELECT} WHERE id IN ({placeholders})",
+                    chunk,
+                )
+                rows.extend(cursor.fetchall())
+            except Exception as e:
+                raise DatabaseError(f"Failed to fetch medications: {e}")
+
+        meds = {med.id: med for med in self._rows_to_medications(rows, with_schedules)}
+        return [meds[med_id] for med_id in ids if med_id in meds]
 
     def get_by_id(self, medication_id: str) -> Medication:
         """
         Return a single medication by ID, or raise NotFoundError if not found.
+        Served from the identity map when it is enabled.
         """
+
+        # Rows read inside an open transaction may still be rolled back.
+        return self.cache.get_or_load(
+            medication_id,
+            lambda: self._fetch_by_id(medication_id),
+            store=not getattr(self.connection, "in_transaction", False),
+        )
+
+    def _fetch_by_id(self, medication_id: str) -> Medication:
+        """Load one medication and its schedules from the database."""
+
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM medications WHERE id = ?", (medication_id,))
+            cursor.execute(f"{_SELECT} WHERE id = ?", (medication_id,))
             row = cursor.fetchone()
         except Exception as e:
             raise DatabaseError(f"Failed to fetch medication: {e}")
@@ -121,7 +216,6 @@ class MedicationRepository(MedicationRepositoryProtocol):
             raise NotFoundError(f"medication with id {medication_id} not found")
         
         med = self._row_to_medication(row)
-        MedicationValidator.validate(med)
         return med
 
     def update(self, medication: Medication) -> Medication:
@@ -130,59 +224,200 @@ class MedicationRepository(MedicationRepositoryProtocol):
         MedicationValidator.validate(medication)
 
         conn = self.connection
-        cursor = conn.cursor()
 
-        # Replace schedules.
-        if medication.schedule:
-            self.schedule_repo.delete_by_medication(medication.id)
-            for sched in medication.schedule:
-                self.schedule_repo.add(sched)
-
-        cursor.execute(
-            """
-            UPDATE medications
-            SET name = ?, description = ?, dosage = ?, notes = ?, is_active = ?
-            WHERE id = ?
-            """, 
-            (
-                medication.name,
-                medication.description,
-                medication.dosage,
-                medication.notes or "",
-                1 if medication.is_active else 0,
-                medication.id,
-            ),
-        )
-        conn.commit()
+        # Schedules and the medication row change together or not at all.
+        def update() -> None:
+            with self._transaction():
+                # Sync schedules by ID so untouched ones (and their reminders)
+                # are left alone.
+                if medication.schedule:
+                    self._sync_schedules(medication)
+
+                conn.execute(
+                    """
+                    UPDATE medications
+                    SET name = ?, description = ?, dosage = ?, notes = ?, is_active = ?
+                    WHERE id = ?
+                    """, 
+                    (
+                        medication.name,
+                        medication.description,
+                        medication.dosage,
+                        medication.notes or "",
+                        1 if medication.is_active else 0,
+                        medication.id,
+                    ),
+                )
+                conn.commit()
+
+        run_write(conn, update, "update medication")
+        self._publish(medication.id, "update")
         return medication
 
     def delete(self, medication_id: str) -> None:
         """Delete a medication by ID."""
 
-        conn = self.connection
-        cursor = conn.cursor()
-
-        cursor.execute("DELETE FROM medications WHERE id = ?", (medication_id,))
-        conn.commit()
+        execute_write(
+            self.connection,
+            "DELETE FROM medications WHERE id = ?",
+            (medication_id,),
+            "delete medication",
+        )
+        # Schedules and reminders cascade with it, without their own events.
+        self._publish(medication_id, "delete")
         
 
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]:
+        """
+        Decode and validate every stored row, yielding one issue per row
+        that fails. Streams the table, so it is safe to run in the background.
+        """
+
+        cursor = tuple_cursor(self.connection)
+
+        try:
+            cursor.execute(_SELECT)
+        except Exception as e:
+            raise DatabaseError(f"Failed to scan medications: {e}")
+
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    try:
+                        # Schedules are checked by ScheduleRepository.check_integrity.
+                        MedicationValidator.validate(self._row_to_medication(row, schedule=[]))
+                    except Exception as e:
+                        yield IntegrityIssue("medication", row[0], str(e))
+        finally:
+            cursor.close()
+
     # Internal helper methods.
-    def _row_to_medication(self, row) -> Medication:
-        """Convert a SQLite row into a Medication dataclass."""
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Join (or open) the connection's unit of work, holding change
+        events until it commits. Plain sqlite3 connections have none.
+        """
+
+        transaction = getattr(self.connection, "transaction", None)
+        if transaction is None:
+            yield
+            return
+
+        feed = self.change_feed
+        with (feed.deferred() if feed else nullcontext()), transaction():
+            yield
+
+    def _sync_schedules(self, medication: Medication) -> None:
+        """
+        Bring the stored schedules in line with medication.schedule,
+        issuing only the inserts, updates and deletes that are needed.
+        """
+
+        stored = {
+            s.id: s for s in self.schedule_repo.get_by_medication(medication.id)
+        }
+        incoming = {s.id: s for s in medication.schedule}
+
+        removed = [sid for sid in stored if sid not in incoming]
+        added = [s for sid, s in incoming.items() if sid not in stored]
+        changed = [
+            s for sid, s in incoming.items()
+            if sid in stored and _schedule_changed(stored[sid], s)
+        ]
+
+        # Deleting cascades to reminders, so only truly removed IDs go.
+        if removed:
+            self.schedule_repo.delete_many(removed)
+        if changed:
+            self.schedule_repo.update_many(changed)
+        if added:
+            self.schedule_repo.add_many(added)
+
+    def _on_change(self, change: Change) -> None:
+        """
+        Change feed callback: drop medications that were written or whose
+        schedules changed. Inside a transaction the feed delivers only
+        after the commit, which evicts anything another thread cached
+        from the old committed row while the transaction was open.
+        """
+
+        if change.entity == "database":
+            # Written outside the repositories; anything may be stale.
+            self.cache.clear()
+            return
+        if change.entity == "medication":
+            self.cache.invalidate(change.entity_id)
+            return
+        if change.entity != "schedule":
+            return
+        if change.medication_id is not None:
+            self.cache.invalidate(change.medication_id)
+        else:
+            # A delete by schedule ID does not say whose it was.
+            self.cache.clear()
+
+    def _publish(self, medication_id: str, kind: str) -> None:
+        """Announce a committed write on the change feed, if there is one."""
+
+        # Evicted again by _on_change once a surrounding transaction commits.
+        self.cache.invalidate(medication_id)
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                Change("medication", medication_id, kind, medication_id)
+            )
+
+    def _rows_to_medications(self, rows, with_schedules: bool) -> List[Medication]:
+        """
+        Convert many rows at once, stitching in schedules fetched with a
+        single query instead of one query per medication.
+        """
+
+        schedules: Dict[str, List[Schedule]] = {}
+        if with_schedules and rows:
+            schedules = self.schedule_repo.get_by_medications(
+                row[0] for row in rows
+            )
+
+        return [
+            self._row_to_medication(row, schedules.get(row[0], []))
+            for row in rows
+        ]
+
+    def _row_to_medication(
+        self, row, schedule: Optional[List[Schedule]] = None
+    ) -> Medication:
+        """
+        Convert a row in _COLUMNS order into a Medication dataclass.
+        Loads the schedules itself unless the caller already has them.
+        """
+
+        (med_id, name, description, dosage,
+         notes, is_active, created_at, created_us) = row
 
         med = Medication(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"] or "",
-            dosage=row["dosage"] or "",
-            notes=row["notes"] or "",
-            is_active=bool(row["is_active"]),
-            created_at=datetime.fromisoformat(row["created_at"]),
-            schedule=self._load_schedule(row["id"]),
+            id=med_id,
+            name=name,
+            description=description or "",
+            dosage=dosage or "",
+            notes=notes or "",
+            is_active=bool(is_active),
+            # Medication timestamps are UTC (see BaseModel).
+            created_at=datetime.fromisoformat(created_at)
+            if created_at
+            else epoch_us_to_datetime(created_us, aware=True),
+            schedule=schedule if schedule is not None
+            else self._load_schedule(med_id),
         )
 
-        # Validate Database row.
-        MedicationValidator.validate(med)
+        # Re-validate the stored row only if the read policy asks for it.
+        if self.validation.validate_read():
+            MedicationValidator.validate(med)
         return med
 
     def _load_schedule(self, medication_id: str) -> List[Schedule]:
@@ -195,4 +430,17 @@ class MedicationRepository(MedicationRepositoryProtocol):
 
        
 
-        
\ No newline at end of file
+        
+
+
+def _schedule_changed(stored: Schedule, incoming: Schedule) -> bool:
+    """True if any column ScheduleRepository.update writes differs."""
+
+    return (
+        stored.times != incoming.times
+        or stored.frequency != incoming.frequency
+        or stored.days_of_week != incoming.days_of_week
+        or stored.start_date != incoming.start_date
+        or stored.end_date != incoming.end_date
+        or stored.is_active != incoming.is_active
+    )
@@ -0,0 +1,383 @@
+# Versioned schema migrations keyed on SQLite's PRAGMA user_version.
+# Repositories create their baseline tables with CREATE TABLE IF NOT EXISTS;
+# the migrations below evolve those tables in place. Each migration runs
+# once, inside its own transaction, and bumps user_version on success.
+
+# Decodes the JSON schedule columns during backfills.
+import json
+# Access to SQLite database and its functions.
+import sqlite3
+# Marks each migration as a small, immutable record.
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, List, Sequence
+# Import Data.
+from data.errors import DatabaseError
+from data.epoch import date_to_epoch_day, datetime_to_epoch_us
+from data.schedule_repository import weekday_mask
+from models.schedule import Schedule
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single forward-only schema change."""
+
+    # Schema version this migration upgrades the database to.
+    version: int
+    # Short human readable summary, used in error messages.
+    description: str
+    # Applies the change using the given connection (no commit).
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _add_foreign_key_indexes(conn: sqlite3.Connection) -> None:
+    """Index the foreign keys every per-medication/per-schedule lookup uses."""
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedules_medication_id "
+        "ON schedules(medication_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminders_schedule_id "
+        "ON reminders(schedule_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminders_medication_id "
+        "ON reminders(medication_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_medication_scheduled "
+        "ON intake_logs(medication_id, scheduled_time)"
+    )
+
+
+def _fix_intake_logs_foreign_key(conn: sqlite3.Connection) -> None:
+    """
+    Rebuild intake_logs if it still references the non-existent
+    'medication' table (every insert failed with foreign keys enabled).
+    """
+
+    parents = {
+        row[2] for row in conn.execute("PRAGMA foreign_key_list(intake_logs)")
+    }
+    if parents == {"medications"}:
+        return
+
+    conn.execute(
+        """
+        CREATE TABLE intake_logs_new (
+            id TEXT PRIMARY KEY,
+            medication_id TEXT NOT NULL,
+            scheduled_time TEXT,
+            taken_time TEXT,
+            amount_taken REAL NOT NULL,
+            notes TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (medication_id) REFERENCES medications(id) ON DELETE CASCADE
+        )
+        """
+    )
+    # Only rows whose medication still exists can satisfy the new constraint.
+    conn.execute(
+        """
+        INSERT INTO intake_logs_new
+        SELECT * FROM intake_logs
+        WHERE medication_id IN (SELECT id FROM medications)
+        """
+    )
+    conn.execute("DROP TABLE intake_logs")
+    conn.execute("ALTER TABLE intake_logs_new RENAME TO intake_logs")
+    # The old indexes went with the dropped table.
+    _add_foreign_key_indexes(conn)
+
+
+def _set_aside_duplicate_doses(conn: sqlite3.Connection, dose_column: str) -> None:
+    """
+    Move every intake log but the first for the same (medication, dose)
+    into intake_logs_duplicates, so a unique index can go on and no
+    history is lost. The user can review and merge them from there.
+    """
+
+    duplicates = f"""
+        {dose_column} IS NOT NULL
+        AND rowid NOT IN (
+            SELECT MIN(rowid) FROM intake_logs
+            WHERE {dose_column} IS NOT NULL
+            GROUP BY medication_id, {dose_column}
+        )
+    """
+
+    # Same columns as intake_logs had when the table was first needed.
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS intake_logs_duplicates AS "
+        "SELECT * FROM intake_logs WHERE 0"
+    )
+    columns = ", ".join(
+        row[1] for row in conn.execute("PRAGMA table_info(intake_logs_duplicates)")
+    )
+    conn.execute(
+        f"INSERT INTO intake_logs_duplicates ({columns}) "
+        f"SELECT {columns} FROM intake_logs WHERE {duplicates}"
+    )
+    conn.execute(f"DELETE FROM intake_logs WHERE {duplicates}")
+
+
+def _unique_intake_per_dose(conn: sqlite3.Connection) -> None:
+    """
+    Allow at most one intake log per (medication, scheduled dose), so
+    "was this dose taken?" is a single unique-index point lookup.
+    """
+
+    _set_aside_duplicate_doses(conn, "scheduled_time")
+    # The unique index covers the same columns, so the plain one can go.
+    # Manual logs (NULL scheduled_time) never collide: NULLs are distinct.
+    conn.execute("DROP INDEX IF EXISTS idx_intake_logs_medication_scheduled")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_intake_logs_medication_scheduled "
+        "ON intake_logs(medication_id, scheduled_time)"
+    )
+
+
+def _index_intake_logs_by_taken_time(conn: sqlite3.Connection) -> None:
+    """
+    Serve time-range questions ("last 7 days", "latest per medication")
+    from indexes instead of a full scan of the intake history.
+    """
+
+    # Per-medication ranges and the latest log of each medication.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_medication_taken "
+        "ON intake_logs(medication_id, taken_time)"
+    )
+    # Ranges across every medication.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_taken "
+        "ON intake_logs(taken_time)"
+    )
+
+
+def _backfill(conn, table: str, columns: dict) -> None:
+    """
+    Fill new integer columns from their ISO text originals.
+    columns maps integer column -> (text column, encoder).
+    """
+
+    text_columns = [text for text, _ in columns.values()]
+    rows = conn.execute(
+        f"SELECT rowid, {', '.join(text_columns)} FROM {table}"
+    ).fetchall()
+
+    params = []
+    for row in rows:
+        values = []
+        for text, encode in columns.values():
+            raw = row[text]
+            values.append(encode(raw) if raw else None)
+        params.append((*values, row["rowid"]))
+
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    conn.executemany(f"UPDATE {table} SET {assignments} WHERE rowid = ?", params)
+
+
+def _add_epoch_columns(conn: sqlite3.Connection) -> None:
+    """
+    Shadow the ISO text timestamps with integer columns (UTC epoch
+    microseconds, or epoch days for dates). The text columns stay and are
+    still written, so older rows and older readers keep working.
+    """
+
+    def timestamp(raw: str) -> int:
+        return datetime_to_epoch_us(datetime.fromisoformat(raw))  # type:ignore
+
+    def day(raw: str) -> int:
+        return date_to_epoch_day(date.fromisoformat(raw[:10]))  # type:ignore
+
+    new_columns = {
+        "intake_logs": {
+            "taken_us": ("taken_time", timestamp),
+            "scheduled_us": ("scheduled_time", timestamp),
+            "created_us": ("created_at", timestamp),
+        },
+        "schedules": {
+            "start_day": ("start_date", day),
+            "end_day": ("end_date", day),
+            "created_us": ("created_at", timestamp),
+        },
+        "medications": {
+            "created_us": ("created_at", timestamp),
+        },
+    }
+
+    for table, columns in new_columns.items():
+        for column in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+        _backfill(conn, table, columns)
+
+    # Range queries now run on the integer columns.
+    conn.execute("DROP INDEX IF EXISTS idx_intake_logs_medication_taken")
+    conn.execute("DROP INDEX IF EXISTS idx_intake_logs_taken")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_medication_taken_us "
+        "ON intake_logs(medication_id, taken_us)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_taken_us "
+        "ON intake_logs(taken_us)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_intake_logs_scheduled_us "
+        "ON intake_logs(scheduled_us)"
+    )
+
+
+def _normalize_schedule_days_and_times(conn: sqlite3.Connection) -> None:
+    """
+    Make "which schedules fire on this weekday at this minute" answerable
+    in SQL: a weekday bitmask column plus one schedule_times row per time.
+    The JSON columns stay as the source the models are built from.
+    """
+
+    conn.execute("ALTER TABLE schedules ADD COLUMN weekday_mask INTEGER")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schedule_times (
+            schedule_id TEXT NOT NULL,
+            minute_of_day INTEGER NOT NULL
+                CHECK (minute_of_day BETWEEN 0 AND 1439),
+            PRIMARY KEY (schedule_id, minute_of_day),
+            FOREIGN KEY (schedule_id)
+                REFERENCES schedules(id)
+                ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_times_minute "
+        "ON schedule_times(minute_of_day)"
+    )
+
+    rows = conn.execute(
+        "SELECT id, times, days_of_week, frequency FROM schedules"
+    ).fetchall()
+
+    masks, minutes = [], []
+    for row in rows:
+        schedule = Schedule(
+            frequency=row["frequency"],
+            days_of_week=json.loads(row["days_of_week"]) or [],
+        )
+        masks.append((weekday_mask(schedule), row["id"]))
+        for hhmm in json.loads(row["times"]) or []:
+            minutes.append((row["id"], int(hhmm[:2]) * 60 + int(hhmm[3:5])))
+
+    conn.executemany("UPDATE schedules SET weekday_mask = ? WHERE id = ?", masks)
+    conn.executemany(
+        "INSERT OR IGNORE INTO schedule_times (schedule_id, minute_of_day) "
+        "VALUES (?, ?)",
+        minutes,
+    )
+
+
+def _match_doses_by_instant(conn: sqlite3.Connection) -> None:
+    """
+    Compare doses as epoch microseconds instead of ISO text, so the same
+    instant written with different UTC offsets is one dose: the unique
+    index moves to scheduled_us, and reminder events get a dose_us twin.
+    """
+
+    def timestamp(raw: str) -> int:
+        return datetime_to_epoch_us(datetime.fromisoformat(raw))  # type:ignore
+
+    # Logs that only now turn out to share an instant are set aside too.
+    _set_aside_duplicate_doses(conn, "scheduled_us")
+    conn.execute("DROP INDEX IF EXISTS ux_intake_logs_medication_scheduled")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_intake_logs_medication_scheduled_us "
+        "ON intake_logs(medication_id, scheduled_us)"
+    )
+
+    conn.execute("ALTER TABLE reminder_events ADD COLUMN dose_us INTEGER")
+    _backfill(conn, "reminder_events", {"dose_us": ("dose_time", timestamp)})
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminder_events_state_dose_us "
+        "ON reminder_events(state, dose_us)"
+    )
+
+
+def _encode_naive_as_wall_clock(conn: sqlite3.Connection) -> None:
+    """
+    Re-derive every epoch column from its ISO text. Naive timestamps used
+    to be encoded in the machine's time zone; they are now wall-clock
+    values, so the integers no longer change with TZ or collide at DST.
+    """
+
+    def timestamp(raw: str) -> int:
+        return datetime_to_epoch_us(datetime.fromisoformat(raw))  # type:ignore
+
+    # Re-encoding may make two logs share a dose, so the unique index
+    # comes off while they are found and set aside.
+    conn.execute("DROP INDEX IF EXISTS ux_intake_logs_medication_scheduled_us")
+    _backfill(conn, "intake_logs", {
+        "taken_us": ("taken_time", timestamp),
+        "scheduled_us": ("scheduled_time", timestamp),
+        "created_us": ("created_at", timestamp),
+    })
+    _set_aside_duplicate_doses(conn, "scheduled_us")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_intake_logs_medication_scheduled_us "
+        "ON intake_logs(medication_id, scheduled_us)"
+    )
+
+    _backfill(conn, "schedules", {"created_us": ("created_at", timestamp)})
+    _backfill(conn, "medications", {"created_us": ("created_at", timestamp)})
+    _backfill(conn, "reminder_events", {"dose_us": ("dose_time", timestamp)})
+
+
+# Ordered list of every migration. Append only; never edit a shipped entry.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Index hot foreign keys", _add_foreign_key_indexes),
+    Migration(2, "Point intake_logs at medications", _fix_intake_logs_foreign_key),
+    Migration(3, "One intake log per scheduled dose", _unique_intake_per_dose),
+    Migration(4, "Index intake logs by taken time", _index_intake_logs_by_taken_time),
+    Migration(5, "Integer epoch timestamp columns", _add_epoch_columns),
+    Migration(6, "Schedule weekday mask and times table", _normalize_schedule_days_and_times),
+    Migration(7, "Match doses by epoch instant", _match_doses_by_instant),
+    Migration(8, "Encode naive timestamps as wall-clock", _encode_naive_as_wall_clock),
+]
+
+
+def get_schema_version(conn) -> int:
+    """Return the schema version recorded in the database file."""
+
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """
+    Apply every migration newer than the database's user_version.
+    Returns the resulting schema version.
+    """
+
+    current = get_schema_version(conn)
+
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+
+        try:
+            # Explicit BEGIN so DDL and the version bump commit together.
+            conn.execute("BEGIN")
+            migration.apply(conn)
+            # PRAGMA does not accept bound parameters.
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise DatabaseError(
+                f"Migration {migration.version} "
+                f"({migration.description}) failed: {e}"
+            )
+
+        current = migration.version
+
+    return current
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+# Used for storing and formatting timestamps.
+from datetime import datetime
+from typing import Iterable, List, Optional, Protocol
+# Import Models.
+from models.reminder_event import (
+    ACKNOWLEDGED,
+    FIRED,
+    MISSED,
+    OPEN_STATES,
+    PENDING,
+    REMINDER_EVENT_STATES,
+    SNOOZED,
+    ReminderEvent,
+)
+# Import Data.
+from data.errors import DatabaseError
+from data.change_feed import Change, ChangeFeed
+from data.retry import execute_write
+from data.epoch import datetime_to_epoch_us
+
+class ReminderEventRepositoryProtocol(Protocol):
+    """Outlines what a Reminder event repository must implement."""
+
+    def ensure_pending(self, events: Iterable[ReminderEvent]) -> int: ...
+    def get(
+        self, schedule_id: str, reminder_id: str, dose_time: datetime
+    ) -> Optional[ReminderEvent]: ...
+    def get_open_for_schedule(self, schedule_id: str) -> List[ReminderEvent]: ...
+    def mark_fired(self, event: ReminderEvent) -> None: ...
+    def acknowledge(self, event: ReminderEvent) -> None: ...
+    def snooze(self, event: ReminderEvent, until: datetime) -> None: ...
+    def close_past(self, now: datetime, due_since: Optional[datetime] = None) -> int: ...
+
+
+class ReminderEventRepository(ReminderEventRepositoryProtocol):
+    """
+    SQLite-backed store of reminder firing state.
+    One row per (schedule, reminder, dose time), so each reminder fires
+    exactly once even across restarts.
+    """
+
+    def __init__(self, connection, change_feed: Optional[ChangeFeed] = None):
+        self.connection = connection
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
+        self._create_table()
+
+    def _create_table(self) -> None:
+        """
+        Ensures the required table structure is 
+        in place during database setup.
+        """
+        conn = self.connection
+        cursor = conn.cursor()
+
+        states = ", ".join(f"'{s}'" for s in sorted(REMINDER_EVENT_STATES))
+
+        try:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS reminder_events (
+                    schedule_id TEXT NOT NULL,
+                    reminder_id TEXT NOT NULL,
+                    dose_time TEXT NOT NULL,
+                    medication_id TEXT NOT NULL,
+                    fire_time TEXT NOT NULL,
+                    state TEXT NOT NULL CHECK (state IN ({states})),
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (schedule_id, reminder_id, dose_time),
+                    FOREIGN KEY (schedule_id)
+                        REFERENCES schedules(id)
+                        ON DELETE CASCADE,
+                    FOREIGN KEY (reminder_id)
+                        REFERENCES reminders(id)
+                        ON DELETE CASCADE
+                );
+                """
+            )
+            # Open rows are found by state and time, never by full scan.
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_reminder_events_state_dose
+                ON reminder_events(state, dose_time)
+                """
+            )
+            conn.commit()
+        except Exception as e:
+            raise DatabaseError(f"Failed to create reminder_events table: {e}")
+
+    def ensure_pending(self, events: Iterable[ReminderEvent]) -> int:
+        """
+        Record upcoming reminder events as pending.
+        Rows that already exist keep their state. Returns rows inserted.
+        """
+
+        now = datetime.now().isoformat()
+        params = [
+            (
+                e.schedule_id,
+                e.reminder_id,
+                e.schedule_time.isoformat(),
+                e.medication_id,
+                e.reminder_time.isoformat(),
+                PENDING,
+                now,
+                datetime_to_epoch_us(e.schedule_time),
+            )
+            for e in events
+        ]
+        if not params:
+            return 0
+
+        rowcount = execute_write(
+            self.connection,
+            """
+            INSERT OR IGNORE INTO reminder_events (
+                schedule_id, reminder_id, dose_time, medication_id,
+                fire_time, state, updated_at, dose_us
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            params,
+            "record reminder events",
+            many=True,
+        )
+
+        return rowcount
+
+    def get(
+        self, schedule_id: str, reminder_id: str, dose_time: datetime
+    ) -> Optional[ReminderEvent]:
+        """Look up one reminder event by its key, or None."""
+
+        conn = self.connection
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                SELECT * FROM reminder_events
+                WHERE schedule_id = ? AND reminder_id = ? AND dose_time = ?
+                """,
+                (schedule_id, reminder_id, dose_time.isoformat()),
+            )
+            row = cursor.fetchone()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch reminder event: {e}")
+
+        return self._row_to_event(row) if row is not None else None
+
+    def get_open_for_schedule(self, schedule_id: str) -> List[ReminderEvent]:
+        """Return the pending and snoozed events of one schedule."""
+
+        conn = self.connection
+        cursor = conn.cursor()
+        placeholders = ", ".join("?" for _ in OPEN_STATES)
+
+        try:
+            cursor.execute(
+                f"""
+                SELECT * FROM reminder_events
+                WHERE schedule_id = ? AND state IN ({placeholders})
+                ORDER BY fire_time
+                """,
+                (schedule_id, *sorted(OPEN_STATES)),
+            )
+            rows = cursor.fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch reminder events: {e}")
+
+        return [self._row_to_event(r) for r in rows]
+
+    def mark_fired(self, event: ReminderEvent) -> None:
+        """Record that the notification for this event was shown."""
+
+        self._set_state(event, FIRED)
+
+    def acknowledge(self, event: ReminderEvent) -> None:
+        """Record that the user dealt with this reminder."""
+
+        self._set_state(event, ACKNOWLEDGED)
+
+    def snooze(self, event: ReminderEvent, until: datetime) -> None:
+        """Re-arm this reminder so it fires again at the given time."""
+
+        self._set_state(event, SNOOZED, fire_time=until)
+
+    def close_past(self, now: datetime, due_since: Optional[datetime] = None) -> int:
+        """
+        Settle every open or fired event whose dose time has passed
+        (a snooze past the dose still fires first): acknowledged if an
+        intake log covers the dose, missed otherwise.
+        Pass due_since to leave doses that fell due after it, which the
+        caller has yet to fire (a reminder at offset 0 fires at its dose).
+        Returns the number of rows changed.
+        """
+
+        settle_until = now if due_since is None else min(now, due_since)
+
+        rowcount = execute_write(
+            self.connection,
+            """
+            UPDATE reminder_events
+            SET state = CASE
+                    WHEN EXISTS (
+                        SELECT 1 FROM intake_logs
+                        WHERE intake_logs.medication_id = reminder_events.medication_id
+                          AND intake_logs.scheduled_us = reminder_events.dose_us
+                    ) THEN ?
+                    ELSE ?
+                END,
+                updated_at = ?
+            WHERE state IN (?, ?, ?) AND dose_us <= ? AND fire_time <= ?
+            """,
+            (
+                ACKNOWLEDGED,
+                MISSED,
+                datetime.now().isoformat(),
+                PENDING,
+                SNOOZED,
+                FIRED,
+                datetime_to_epoch_us(settle_until),
+                now.isoformat(),
+            ),
+            "settle reminder events",
+        )
+
+        return rowcount
+
+    # Internal helper methods.
+    def _set_state(
+        self, event: ReminderEvent, state: str, fire_time: Optional[datetime] = None
+    ) -> None:
+        """Move one event to a new state, inserting it if it is unknown."""
+
+        fire = fire_time or event.reminder_time
+
+        execute_write(
+            self.connection,
+            """
+            INSERT INTO reminder_events (
+                schedule_id, reminder_id, dose_time, medication_id,
+                fire_time, state, updated_at, dose_us
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (schedule_id, reminder_id, dose_time)
+            DO UPDATE SET state = excluded.state,
+                          fire_time = excluded.fire_time,
+                          updated_at = excluded.updated_at
+            """,
+            (
+                event.schedule_id,
+                event.reminder_id,
+                event.schedule_time.isoformat(),
+                event.medication_id,
+                fire.isoformat(),
+                state,
+                datetime.now().isoformat(),
+                datetime_to_epoch_us(event.schedule_time),
+            ),
+            "update reminder event",
+        )
+
+        event.state = state
+        event.reminder_time = fire
+
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                Change("reminder_event", event.reminder_id, "update", event.medication_id)
+            )
+
+    def _row_to_event(self, row) -> ReminderEvent:
+        """Convert a SQLite row into a ReminderEvent."""
+
+        return ReminderEvent(
+            medication_id=row["medication_id"],
+            schedule_id=row["schedule_id"],
+            schedule_time=datetime.fromisoformat(row["dose_time"]),
+            reminder_time=datetime.fromisoformat(row["fire_time"]),
+            is_taken=row["state"] == ACKNOWLEDGED,
+            is_overdue=row["state"] == MISSED,
+            reminder_id=row["reminder_id"],
+            state=row["state"],
+        )
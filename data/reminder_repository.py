@@ -1,30 +1,75 @@
 from __future__ import annotations
-from typing import List, Protocol
+from typing import Iterable, Iterator, List, Optional, Protocol
 # Import Models
 from models.reminder import Reminder
 # Import Validators.
 from validators.reminder_validator import ReminderValidator
 # Import Data.
 from data.errors import DatabaseError, NotFoundError
+from data.change_feed import Change, ChangeFeed
+from data.validation import DEFAULT_VALIDATION, IntegrityIssue, ValidationPolicy
+from data.rows import select_list, tuple_cursor
+from data.retry import execute_write
+
+# Rows pulled per fetchmany() call when scanning the table.
+DEFAULT_CHUNK_SIZE = 500
+
+# Columns read back, in the order _row_to_reminder unpacks them.
+_COLUMNS = (
+    "id", "medication_id", "schedule_id",
+    "enabled", "reminder_offset_minutes",
+)
+_SELECT = f"SELECT {select_list(_COLUMNS)} FROM reminders"
+
+# Shared by add/add_many and update/update_many.
+_INSERT_SQL = """
+    INSERT INTO reminders (
+        id, medication_id, schedule_id,
+        enabled, reminder_offset_minutes
+    )
+    VALUES (?, ?, ?, ?, ?)
+"""
+_UPDATE_SQL = """
+    UPDATE reminders
+    SET medication_id = ?,
+        schedule_id = ?,
+        enabled = ?,
+        reminder_offset_minutes = ?
+    WHERE id = ?
+"""
 
 class ReminderRepositoryProtocol(Protocol): 
     """Outlines what a Reminder repository must implement.""" 
 
     def add(self, reminder: Reminder) -> Reminder: ... 
+    def add_many(self, reminders: Iterable[Reminder]) -> List[Reminder]: ...
     def update(self, reminder: Reminder) -> Reminder: ... 
+    def update_many(self, reminders: Iterable[Reminder]) -> List[Reminder]: ...
     def delete(self, reminder_id: str) -> None: ... 
     def get_by_id(self, reminder_id: str) -> Reminder: ... 
     def get_all(self) -> List[Reminder]: ... 
     def get_by_schedule(self, schedule_id: str) -> List[Reminder]: ... 
     def get_by_medication(self, medication_id: str) -> List[Reminder]: ...
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]: ...
 
 
 
 class ReminderRepository(ReminderRepositoryProtocol):
     """SQLite-backed repository for Reminder settings."""
 
-    def __init__(self, connection):
+    def __init__(
+        self,
+        connection,
+        change_feed: Optional[ChangeFeed] = None,
+        validation: ValidationPolicy = DEFAULT_VALIDATION,
+    ):
         self.connection = connection
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
+        # Rows are validated when written; this decides about reads.
+        self.validation = validation
         self._create_table()
 
     def _create_table(self) -> None:
@@ -65,30 +110,11 @@ class ReminderRepository(ReminderRepositoryProtocol):
         # Run validation rules before saving the reminder.
         ReminderValidator.validate(reminder)
 
-        conn = self.connection
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                """
-                INSERT INTO reminders (
-                    id, medication_id, schedule_id,
-                    enabled, reminder_offset_minutes
-                )
-                VALUES (?, ?, ?, ?, ?)
-                """, 
-                (
-                    reminder.id,
-                    reminder.medication_id,
-                    reminder.scheduled_id,
-                    1 if reminder.enabled else 0,
-                    reminder.reminder_offset_minutes,
-                ),
-            )
-            conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to insert reminder: {e}")
+        execute_write(
+            self.connection, _INSERT_SQL, self._insert_params(reminder), "insert reminder"
+        )
         
+        self._publish(reminder.id, "add", reminder.medication_id)
         return reminder
 
     def update(self, reminder: Reminder) -> Reminder:
@@ -100,55 +126,67 @@ class ReminderRepository(ReminderRepositoryProtocol):
         # Run validation rules before saving the reminder.
         ReminderValidator.validate(reminder)
 
-        conn = self.connection
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute(
-                """
-                UPDATE reminders
-                SET medication_id = ?,
-                    schedule_id = ?,
-                    enabled = ?,
-                    reminder_offset_minutes = ?
-                WHERE id = ?
-                """, 
-                (
-                    reminder.medication_id,
-                    reminder.scheduled_id,
-                    1 if reminder.enabled else 0,
-                    reminder.reminder_offset_minutes,
-                    reminder.id,
-                ),
-            )
-            conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to update reminder: {e}")
+        execute_write(
+            self.connection, _UPDATE_SQL, self._update_params(reminder), "update reminder"
+        )
         
-
+        self._publish(reminder.id, "update", reminder.medication_id)
         return reminder
 
+    def add_many(self, reminders: Iterable[Reminder]) -> List[Reminder]:
+        """
+        Save many reminders in one transaction.
+        Every reminder is validated before anything is written.
+        """
+
+        reminders = list(reminders)
+        for reminder in reminders:
+            ReminderValidator.validate(reminder)
+
+        self._write_many(
+            _INSERT_SQL, [self._insert_params(r) for r in reminders], "insert"
+        )
+
+        for reminder in reminders:
+            self._publish(reminder.id, "add", reminder.medication_id)
+        return reminders
+
+    def update_many(self, reminders: Iterable[Reminder]) -> List[Reminder]:
+        """Overwrite many stored reminders in one transaction."""
+
+        reminders = list(reminders)
+        for reminder in reminders:
+            ReminderValidator.validate(reminder)
+
+        self._write_many(
+            _UPDATE_SQL, [self._update_params(r) for r in reminders], "update"
+        )
+
+        for reminder in reminders:
+            self._publish(reminder.id, "update", reminder.medication_id)
+        return reminders
+
     def delete(self, reminder_id: str) -> None:
         """Delete a reminder from the database."""
 
-        conn = self.connection
-        cursor = conn.cursor()
+        execute_write(
+            self.connection,
+            "DELETE FROM reminders WHERE id = ?",
+            (reminder_id,),
+            "delete reminder",
+        )
 
-        try:
-            cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-            conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to delete reminder: {e}")
+        self._publish(reminder_id, "delete")
         
 
     def get_by_id(self, reminder_id: str) -> Reminder:
         """fetch a reminder from the database."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM reminders WHERE id = ?", (reminder_id,))
+            cursor.execute(f"{_SELECT} WHERE id = ?", (reminder_id,))
             row = cursor.fetchone()
         except Exception as e:
             raise DatabaseError(f"Failed to fetch reminder: {e}")
@@ -157,17 +195,16 @@ class ReminderRepository(ReminderRepositoryProtocol):
             raise NotFoundError(f"Reminder with id {reminder_id} not found")
 
         reminder = self._row_to_reminder(row)
-        ReminderValidator.validate(reminder)
         return reminder
 
     def get_all(self) -> List[Reminder]:
         """Return a list of all reminders."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM reminders")
+            cursor.execute(_SELECT)
             rows = cursor.fetchall()
         except Exception as e:
             raise DatabaseError(f"Failed to fetch reminders: {e}")
@@ -179,14 +216,11 @@ class ReminderRepository(ReminderRepositoryProtocol):
         """Return a list of reminders by schedule."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
             cursor.execute(
-                """
-                SELECT * FROM reminders
-                WHERE schedule_id = ?
-                """, 
+                f"{_SELECT} WHERE schedule_id = ?",
                 (schedule_id,)
             )
             rows = cursor.fetchall()
@@ -199,14 +233,11 @@ class ReminderRepository(ReminderRepositoryProtocol):
         """Return a list of reminders by medication."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
             cursor.execute(
-                """
-                SELECT * FROM reminders
-                WHERE medication_id = ?
-                """, 
+                f"{_SELECT} WHERE medication_id = ?",
                 (medication_id,)
             )
             rows = cursor.fetchall()
@@ -215,18 +246,90 @@ class ReminderRepository(ReminderRepositoryProtocol):
     
         return [self._row_to_reminder(r) for r in rows]
 
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]:
+        """
+        Decode and validate every stored row, yielding one issue per row
+        that fails. Streams the table, so it is safe to run in the background.
+        """
+
+        cursor = tuple_cursor(self.connection)
+
+        try:
+            cursor.execute(_SELECT)
+        except Exception as e:
+            raise DatabaseError(f"Failed to scan reminders: {e}")
+
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    try:
+                        ReminderValidator.validate(self._row_to_reminder(row))
+                    except Exception as e:
+                        yield IntegrityIssue("reminder", row[0], str(e))
+        finally:
+            cursor.close()
+
     # Internal helper methods.
+    def _write_many(self, sql: str, params: List[tuple], action: str) -> None:
+        """Run one statement for every parameter row, then commit once."""
+
+        if not params:
+            return
+
+        execute_write(self.connection, sql, params, f"{action} reminders", many=True)
+
+    @staticmethod
+    def _insert_params(reminder: Reminder) -> tuple:
+        """Column values for _INSERT_SQL."""
+
+        return (
+            reminder.id,
+            reminder.medication_id,
+            reminder.scheduled_id,
+            1 if reminder.enabled else 0,
+            reminder.reminder_offset_minutes,
+        )
+
+    @staticmethod
+    def _update_params(reminder: Reminder) -> tuple:
+        """Column values for _UPDATE_SQL."""
+
+        return (
+            reminder.medication_id,
+            reminder.scheduled_id,
+            1 if reminder.enabled else 0,
+            reminder.reminder_offset_minutes,
+            reminder.id,
+        )
+
+    def _publish(
+        self, reminder_id: str, kind: str, medication_id: Optional[str] = None
+    ) -> None:
+        """Announce a committed write on the change feed, if there is one."""
+
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                Change("reminder", reminder_id, kind, medication_id)
+            )
+
     def _row_to_reminder(self, row) -> Reminder:
-        """Returns a row of reminder information."""
+        """Build a Reminder from a row in _COLUMNS order."""
 
+        reminder_id, medication_id, schedule_id, enabled, offset = row
         reminder = Reminder(
-            id=row["id"],
-            medication_id=row["medication_id"],
-            scheduled_id=row["schedule_id"],
-            enabled=bool(row["enabled"]),
-            reminder_offset_minutes=row["reminder_offset_minutes"],
+            id=reminder_id,
+            medication_id=medication_id,
+            scheduled_id=schedule_id,
+            enabled=bool(enabled),
+            reminder_offset_minutes=offset,
         )
         
-        # Run validation rules before saving the reminder.
-        ReminderValidator.validate(reminder)
+        # Re-validate the stored row only if the read policy asks for it.
+        if self.validation.validate_read():
+            ReminderValidator.validate(reminder)
         return reminder
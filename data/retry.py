@@ -0,0 +1,183 @@
+# Retries repository writes that lost a race for the SQLite write lock.
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Optional, TypeVar
+
+# Import Data.
+from data.errors import DatabaseError
+
+T = TypeVar("T")
+
+# Primary result codes SQLite uses for lock contention.
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How long a write keeps retrying after "database is locked".
+    busy_timeout already waits inside SQLite; this covers the cases it
+    cannot, such as a read transaction upgrading to a write (which fails
+    at once to avoid deadlock) or a timeout under a long checkpoint.
+    """
+
+    # Wait before the first retry; doubles (times multiplier) each time.
+    initial_delay: timedelta = timedelta(milliseconds=10)
+    multiplier: float = 2.0
+    # Cap on a single wait.
+    max_delay: timedelta = timedelta(milliseconds=500)
+    # Total time spent waiting before giving up.
+    max_wait: timedelta = timedelta(seconds=5)
+
+    def __post_init__(self):
+        """Reject settings that would never back off or never stop."""
+
+        if self.multiplier < 1:
+            raise ValueError("multiplier must be at least 1.")
+        if self.initial_delay <= timedelta(0) or self.max_delay < self.initial_delay:
+            raise ValueError("Need 0 < initial_delay <= max_delay.")
+
+    def delay(self, attempt: int, rand: Callable[[], float] = random.random) -> float:
+        """
+        Seconds to sleep before retry number `attempt` (0-based), with
+        "full jitter": uniform between zero and the exponential step, so
+        writers that collided once do not collide again in lockstep.
+        """
+
+        step = self.initial_delay.total_seconds() * self.multiplier ** attempt
+        return rand() * min(step, self.max_delay.total_seconds())
+
+
+# Policy used unless a connection carries its own.
+DEFAULT_RETRY = RetryPolicy()
+
+
+class RetryStats:
+    """Thread-safe counters of retried and abandoned writes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.give_ups = 0
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_give_up(self) -> None:
+        with self._lock:
+            self.give_ups += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"retries": self.retries, "give_ups": self.give_ups}
+
+
+# Counters for connections that do not carry their own (plain sqlite3).
+DEFAULT_RETRY_STATS = RetryStats()
+
+
+def is_transient(error: BaseException) -> bool:
+    """True if the error (or what caused it) is lock contention."""
+
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, sqlite3.OperationalError):
+            code = getattr(current, "sqlite_errorcode", None)
+            if code is not None and code & 0xFF in (_SQLITE_BUSY, _SQLITE_LOCKED):
+                return True
+            message = str(current).lower()
+            if "locked" in message or "busy" in message:
+                return True
+        current = current.__cause__
+    return False
+
+
+def retry_transient(
+    connection,
+    work: Callable[[], T],
+    action: str,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """
+    Run work(), rolling back after any failure and retrying lock
+    contention per the connection's RetryPolicy. Other errors propagate
+    unchanged; running out of budget raises DatabaseError.
+
+    Inside an enclosing transaction() nothing is retried: the failed
+    statement may not be the first of the unit, so the error goes to
+    the code that owns the transaction.
+    """
+
+    policy = getattr(connection, "retry_policy", DEFAULT_RETRY)
+    stats = getattr(connection, "retry_stats", DEFAULT_RETRY_STATS)
+    nested = getattr(connection, "in_transaction", False)
+
+    waited = 0.0
+    attempt = 0
+
+    while True:
+        try:
+            return work()
+        except Exception as e:
+            connection.rollback()
+
+            if not is_transient(e):
+                raise
+
+            if nested:
+                # The transaction's owner decides whether to retry or give up.
+                raise DatabaseError(f"Failed to {action}: {e}") from e
+
+            delay = policy.delay(attempt)
+            if waited + delay > policy.max_wait.total_seconds():
+                stats.record_give_up()
+                raise DatabaseError(f"Failed to {action}: {e}") from e
+
+            stats.record_retry()
+            sleep(delay)
+            waited += delay
+            attempt += 1
+
+
+def run_write(
+    connection,
+    work: Callable[[], T],
+    action: str,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """
+    Shared execution helper for repository writes. Runs work() (its
+    statements and commit) under retry_transient, and raises anything
+    else as DatabaseError("Failed to <action>: ...").
+    """
+
+    try:
+        return retry_transient(connection, work, action, sleep)
+    except DatabaseError:
+        raise
+    except Exception as e:
+        raise DatabaseError(f"Failed to {action}: {e}") from e
+
+
+def execute_write(connection, sql: str, params, action: str, many: bool = False) -> int:
+    """
+    run_write for the common case of one statement plus a commit.
+    Pass many=True to run it with executemany. Returns the row count.
+    """
+
+    def work() -> int:
+        cursor = connection.cursor()
+        if many:
+            cursor.executemany(sql, params)
+        else:
+            cursor.execute(sql, params)
+        connection.commit()
+        return cursor.rowcount
+
+    return run_write(connection, work, action)
@@ -0,0 +1,22 @@
+# Tuple-based read path shared by the repositories.
+# Hot queries name their columns explicitly and read plain tuples, which
+# the per-model decoders unpack by position. That skips the per-field
+# name lookup sqlite3.Row does and keeps decoders independent of any
+# columns added to a table later.
+
+import sqlite3
+
+
+def tuple_cursor(connection) -> sqlite3.Cursor:
+    """Return a cursor that yields plain tuples instead of sqlite3.Row."""
+
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def select_list(columns, alias: str = "") -> str:
+    """Render a column tuple as a SELECT list, optionally table-qualified."""
+
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + column for column in columns)
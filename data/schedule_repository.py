@@ -2,32 +2,112 @@ from __future__ import annotations
 
 # Handles serializing and loading data in JSON format.
 import json
-from typing import List, Protocol
-from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol
+from datetime import date, datetime, time
 # Import Models.
 from models.schedule import Schedule
 # Import Validators.
 from validators.schedule_validator import ScheduleValidator
 # Import Data.
 from data.errors import DatabaseError, NotFoundError
+from data.change_feed import Change, ChangeFeed
+from data.validation import DEFAULT_VALIDATION, IntegrityIssue, ValidationPolicy
+from data.epoch import (
+    date_to_epoch_day, datetime_to_epoch_us, epoch_day_to_date, epoch_us_to_datetime
+)
+from data.rows import select_list, tuple_cursor
+from data.identity_map import IdentityMap
+from data.retry import execute_write, run_write
+
+# Upper bound on IDs bound into a single IN (...) query.
+_MAX_IDS_PER_QUERY = 500
+
+# Rows pulled per fetchmany() call by the streaming iterators.
+DEFAULT_CHUNK_SIZE = 500
+
+# Columns read back, in the order _row_to_schedule unpacks them.
+_COLUMNS = (
+    "id", "medication_id", "times", "days_of_week", "frequency",
+    "start_date", "end_date", "is_active", "created_at",
+    "start_day", "end_day", "created_us",
+)
+_SELECT = f"SELECT {select_list(_COLUMNS)} FROM schedules"
+
+# Shared by add/add_many and update/update_many.
+# Dates are written both as ISO text and as integer epoch days.
+_INSERT_SQL = """
+    INSERT INTO schedules (
+        id, medication_id, times, days_of_week, frequency,
+        start_date, end_date, is_active, created_at,
+        start_day, end_day, created_us, weekday_mask
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+_UPDATE_SQL = """
+    UPDATE schedules
+    SET times = ?,
+        frequency = ?, 
+        days_of_week = ?, 
+        start_date = ?, 
+        end_date = ?, 
+        is_active = ?,
+        start_day = ?,
+        end_day = ?,
+        weekday_mask = ?
+    WHERE id = ?;
+"""
+
+# Every weekday bit set (bit 0 = Monday ... bit 6 = Sunday).
+ALL_WEEKDAYS_MASK = 0b1111111
 
 class ScheduleRepositoryProtocol(Protocol): 
     """Outlines what a Schedule repository must implement.""" 
 
     def add(self, schedule: Schedule) -> Schedule: ... 
+    def add_many(self, schedules: Iterable[Schedule]) -> List[Schedule]: ...
     def get_all(self) -> List[Schedule]: ...
+    def iter_all(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Schedule]: ...
+    def iter_range(
+        self, start: date, end: date, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[Schedule]: ...
     def get_by_id(self, schedule_id: str) -> Schedule: ... 
+    def get_for_day(self, day: date) -> List[Schedule]: ...
+    def get_firing_at(self, moment: datetime) -> List[Schedule]: ...
     def get_by_medication(self, medication_id: str) -> List[Schedule]: ... 
+    def get_by_medications(
+        self, medication_ids: Iterable[str]
+    ) -> Dict[str, List[Schedule]]: ...
     def update(self, schedule: Schedule) -> Schedule: ... 
+    def update_many(self, schedules: Iterable[Schedule]) -> List[Schedule]: ...
     def delete(self, schedule_id: str) -> None: ... 
+    def delete_many(self, schedule_ids: Iterable[str]) -> None: ...
     def delete_by_medication(self, medication_id: str) -> None: ...
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]: ...
 
 
 class ScheduleRepository(ScheduleRepositoryProtocol):
     """SQLite-backed repository for Schedule objects."""
 
-    def __init__(self, connection):
+    def __init__(
+        self,
+        connection,
+        change_feed: Optional[ChangeFeed] = None,
+        validation: ValidationPolicy = DEFAULT_VALIDATION,
+        cache_size: int = 0,
+    ):
         self.connection = connection
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
+        # Rows are validated when written; this decides about reads.
+        self.validation = validation
+        # get_by_id results; 0 disables it.
+        self.cache: IdentityMap[Schedule] = IdentityMap(cache_size)
+        # Deleting a medication cascades to its schedules, and external
+        # writes may have touched anything.
+        if change_feed is not None and cache_size:
+            change_feed.subscribe(self._on_change)
         self._create_table()
 
     def _create_table(self) -> None:
@@ -67,57 +147,119 @@ class ScheduleRepository(ScheduleRepositoryProtocol):
         ScheduleValidator.validate(schedule)
 
         conn = self.connection
-        cursor = conn.cursor()
 
-        try: 
-            cursor.execute(
-                """
-                INSERT INTO schedules (
-                    id, medication_id, times, days_of_week, frequency,
-                    start_date, end_date, is_active, created_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-                """, 
-                (
-                    schedule.id,
-                    schedule.medication_id,
-                    json.dumps([t.strftime("%H:%M") for t in schedule.times]),
-                    json.dumps(schedule.days_of_week),
-                    schedule.frequency,
-                    schedule.start_date.isoformat(),
-                    schedule.end_date.isoformat() if schedule.end_date else None,
-                    1 if schedule.is_active else 0,
-                    schedule.created_at.isoformat(),
-                ),
-            )
+        def insert() -> None:
+            cursor = conn.cursor()
+            cursor.execute(_INSERT_SQL, self._insert_params(schedule))
+            self._write_times(cursor, [schedule])
             conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to insert schedule: {e}")
+
+        run_write(conn, insert, "insert schedule")
         
+        self._publish(schedule.id, "add", schedule.medication_id)
         return schedule
 
     def get_all(self) -> List[Schedule]:
         """Return a list of all schedules."""
 
+        return list(self.iter_all())
+
+    def iter_all(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Schedule]:
+        """Yield every schedule, reading chunk_size rows at a time."""
+
+        yield from self._stream(_SELECT, (), chunk_size)
+
+    def iter_range(
+        self, start: date, end: date, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[Schedule]:
+        """
+        Yield schedules whose date range overlaps [start, end),
+        reading chunk_size rows at a time.
+        """
+
+        yield from self._stream(
+            f"""
+            {_SELECT}
+            WHERE start_day < ? AND (end_day IS NULL OR end_day >= ?)
+            """,
+            (date_to_epoch_day(end), date_to_epoch_day(start)),
+            chunk_size,
+        )
+
+    def get_for_day(self, day: date) -> List[Schedule]:
+        """Return the schedules that dose on the given date."""
+
+        day_number = date_to_epoch_day(day)
+
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM schedules")
+            cursor.execute(
+                f"""
+                {_SELECT}
+                WHERE weekday_mask & ? != 0
+                  AND start_day <= ? AND (end_day IS NULL OR end_day >= ?)
+                """,
+                (1 << day.weekday(), day_number, day_number),
+            )
             rows = cursor.fetchall()
         except Exception as e:
-            raise DatabaseError(f"Failed to fetch schedules: {e}")
-        
+            raise DatabaseError(f"Failed to fetch schedules for {day}: {e}")
+
+        return [self._row_to_schedule(row) for row in rows]
+
+    def get_firing_at(self, moment: datetime) -> List[Schedule]:
+        """Return the active schedules with a dose at this exact minute."""
+
+        day_number = date_to_epoch_day(moment.date())
+
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+
+        try:
+            # Starts from the schedule_times minute index, then checks
+            # the weekday bit and date range of each candidate schedule.
+            cursor.execute(
+                f"""
+                SELECT {select_list(_COLUMNS, "s")} FROM schedule_times t
+                JOIN schedules s ON s.id = t.schedule_id
+                WHERE t.minute_of_day = ?
+                  AND s.is_active = 1
+                  AND s.weekday_mask & ? != 0
+                  AND s.start_day <= ? AND (s.end_day IS NULL OR s.end_day >= ?)
+                """,
+                (
+                    moment.hour * 60 + moment.minute,
+                    1 << moment.weekday(),
+                    day_number,
+                    day_number,
+                ),
+            )
+            rows = cursor.fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch schedules firing at {moment}: {e}")
+
         return [self._row_to_schedule(row) for row in rows]
 
     def get_by_id(self, schedule_id: str) -> Schedule:
-        """Fetch a schedule from the database."""
+        """Fetch a schedule, from the identity map when it is enabled."""
+
+        # Rows read inside an open transaction may still be rolled back.
+        return self.cache.get_or_load(
+            schedule_id,
+            lambda: self._fetch_by_id(schedule_id),
+            store=not getattr(self.connection, "in_transaction", False),
+        )
+
+    def _fetch_by_id(self, schedule_id: str) -> Schedule:
+        """Load one schedule from the database."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,))
+            cursor.execute(f"{_SELECT} WHERE id = ?", (schedule_id,))
             row = cursor.fetchone()
         except Exception as e:
             raise DatabaseError(f"Failed to fetch schedule: {e}")
@@ -126,17 +268,16 @@ class ScheduleRepository(ScheduleRepositoryProtocol):
             raise NotFoundError(f"Schedule with id {schedule_id} not found")
         
         schedule = self._row_to_schedule(row)
-        ScheduleValidator.validate(schedule)
         return schedule
 
     def get_by_medication(self, medication_id: str) -> List[Schedule]:
         """Return all schedules associated with a medication."""
 
         conn = self.connection
-        cursor = conn.cursor()
+        cursor = tuple_cursor(conn)
 
         try:
-            cursor.execute("SELECT * FROM schedules WHERE medication_id = ?", 
+            cursor.execute(f"{_SELECT} WHERE medication_id = ?", 
                            (medication_id,))
             rows = cursor.fetchall()
         except Exception as e:
@@ -146,6 +287,40 @@ class ScheduleRepository(ScheduleRepositoryProtocol):
         
         return [self._row_to_schedule(row) for row in rows]
 
+    def get_by_medications(
+        self, medication_ids: Iterable[str]
+    ) -> Dict[str, List[Schedule]]:
+        """
+        Return the schedules of many medications at once, grouped by
+        medication ID. Every requested ID is present in the result.
+        """
+
+        ids = list(dict.fromkeys(medication_ids))
+        grouped: Dict[str, List[Schedule]] = {med_id: [] for med_id in ids}
+
+        conn = self.connection
+        cursor = tuple_cursor(conn)
+
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(ids), _MAX_IDS_PER_QUERY):
+            chunk = ids[start:start + _MAX_IDS_PER_QUERY]
+            placeholders = ", ".join("?" for _ in chunk)
+
+            try:
+                cursor.execute(
+                    f"{_SELECT} WHERE medication_id IN ({placeholders})",
+                    chunk,
+                )
+                rows = cursor.fetchall()
+            except Exception as e:
+                raise DatabaseError(f"Failed to fetch schedules for medications: {e}")
+
+            for row in rows:
+                schedule = self._row_to_schedule(row)
+                grouped[schedule.medication_id].append(schedule)
+
+        return grouped
+
     def update(self, schedule: Schedule) -> Schedule:
         """
         Overwrite the stored Schedule with the new state.
@@ -156,89 +331,325 @@ class ScheduleRepository(ScheduleRepositoryProtocol):
         ScheduleValidator.validate(schedule)
 
         conn = self.connection
-        cursor = conn.cursor()
 
-        try:
-            cursor.execute(
-                """
-                UPDATE schedules
-                SET times = ?,
-                    frequency = ?, 
-                    days_of_week = ?, 
-                    start_date = ?, 
-                    end_date = ?, 
-                    is_active = ?
-                WHERE id = ?;
-                """, 
-                (
-                    json.dumps([t.strftime("%H:%M") for t in schedule.times]),
-                    schedule.frequency,
-                    json.dumps(schedule.days_of_week),
-                    schedule.start_date.isoformat(),
-                    schedule.end_date.isoformat() if schedule.end_date else None,
-                    1 if schedule.is_active else 0,
-                    schedule.id,
-                ),
-            )
+        def update() -> None:
+            cursor = conn.cursor()
+            cursor.execute(_UPDATE_SQL, self._update_params(schedule))
+            self._write_times(cursor, [schedule], replace=True)
             conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to update schedule: {e}")
+
+        run_write(conn, update, "update schedule")
         
+        self._publish(schedule.id, "update", schedule.medication_id)
         return schedule
 
+    def add_many(self, schedules: Iterable[Schedule]) -> List[Schedule]:
+        """
+        Save many schedules in one transaction.
+        Every schedule is validated before anything is written.
+        """
+
+        schedules = list(schedules)
+        for schedule in schedules:
+            ScheduleValidator.validate(schedule)
+
+        self._write_many(
+            _INSERT_SQL, [self._insert_params(s) for s in schedules], "insert",
+            schedules=schedules,
+        )
+
+        for schedule in schedules:
+            self._publish(schedule.id, "add", schedule.medication_id)
+        return schedules
+
+    def update_many(self, schedules: Iterable[Schedule]) -> List[Schedule]:
+        """Overwrite many stored schedules in one transaction."""
+
+        schedules = list(schedules)
+        for schedule in schedules:
+            ScheduleValidator.validate(schedule)
+
+        self._write_many(
+            _UPDATE_SQL, [self._update_params(s) for s in schedules], "update",
+            schedules=schedules, replace_times=True,
+        )
+
+        for schedule in schedules:
+            self._publish(schedule.id, "update", schedule.medication_id)
+        return schedules
+
     def delete(self, schedule_id: str) -> None:
         """Delete a schedule from the database."""
 
-        conn = self.connection
-        cursor = conn.cursor()
+        execute_write(
+            self.connection,
+            "DELETE FROM schedules WHERE id = ?;",
+            (schedule_id,),
+            "delete schedule",
+        )
 
-        try:
-            cursor.execute("DELETE FROM schedules WHERE id = ?;", (schedule_id,))
-            conn.commit()
-        except Exception as e:
-            raise DatabaseError(f"Failed to delete schedule: {e}")
+        self._publish(schedule_id, "delete")
         
+    def delete_many(self, schedule_ids: Iterable[str]) -> None:
+        """Delete several schedules in one transaction."""
+
+        ids = list(dict.fromkeys(schedule_ids))
+
+        self._write_many(
+            "DELETE FROM schedules WHERE id = ?;", [(i,) for i in ids], "delete"
+        )
+
+        for schedule_id in ids:
+            self._publish(schedule_id, "delete")
+
     def delete_by_medication(self, medication_id: str) -> None:
         """Delete every entry associated with the given ID"""
 
-        conn = self.connection
-        cursor = conn.cursor()
+        execute_write(
+            self.connection,
+            "DELETE FROM schedules WHERE medication_id = ?",
+            (medication_id,),
+            f"delete schedules for medication {medication_id}",
+        )
+
+        # Several rows may have gone, so only the medication is known.
+        self._publish(None, "delete", medication_id)
+        
+    def check_integrity(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[IntegrityIssue]:
+        """
+        Decode and validate every stored row, yielding one issue per row
+        that fails. Streams the table, so it is safe to run in the background.
+        """
+
+        cursor = tuple_cursor(self.connection)
 
         try:
-            cursor.execute(
-                "DELETE FROM schedules WHERE medication_id = ?",
-                (medication_id,),
-            )
-            conn.commit()
+            cursor.execute(_SELECT)
         except Exception as e:
-            raise DatabaseError(
-                f"Failed to delete schedules for medication {medication_id}: {e}"
-            )
-        
+            raise DatabaseError(f"Failed to scan schedules: {e}")
+
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    try:
+                        ScheduleValidator.validate(self._row_to_schedule(row))
+                    except Exception as e:
+                        yield IntegrityIssue("schedule", row[0], str(e))
+        finally:
+            cursor.close()
+
     # Internal helpers.
+    def _stream(self, sql: str, params: tuple, chunk_size: int) -> Iterator[Schedule]:
+        """Run a query and decode its rows lazily, fetchmany() at a time."""
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+
+        # A private cursor, so other queries can run while this one streams.
+        cursor = tuple_cursor(self.connection)
+
+        try:
+            cursor.execute(sql, params)
+        except Exception as e:
+            raise DatabaseError(f"Failed to fetch schedules: {e}")
+
+        try:
+            while True:
+                try:
+                    rows = cursor.fetchmany(chunk_size)
+                except Exception as e:
+                    raise DatabaseError(f"Failed to fetch schedules: {e}")
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._row_to_schedule(row)
+        finally:
+            cursor.close()
+
+    def _write_many(
+        self,
+        sql: str,
+        params: List[tuple],
+        action: str,
+        schedules: Optional[List[Schedule]] = None,
+        replace_times: bool = False,
+    ) -> None:
+        """
+        Run one statement for every parameter row, then commit once.
+        Pass schedules to write their schedule_times rows in the same batch.
+        """
+
+        if not params:
+            return
+
+        conn = self.connection
+
+        def write() -> None:
+            cursor = conn.cursor()
+            cursor.executemany(sql, params)
+            if schedules:
+                self._write_times(cursor, schedules, replace=replace_times)
+            conn.commit()
+
+        run_write(conn, write, f"{action} schedules")
+
+    @staticmethod
+    def _write_times(cursor, schedules: List[Schedule], replace: bool = False) -> None:
+        """Mirror each schedule's times into schedule_times (no commit)."""
+
+        if replace:
+            cursor.executemany(
+                "DELETE FROM schedule_times WHERE schedule_id = ?",
+                [(s.id,) for s in schedules],
+            )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO schedule_times (schedule_id, minute_of_day) "
+            "VALUES (?, ?)",
+            [
+                (s.id, t.hour * 60 + t.minute)
+                for s in schedules for t in s.times
+            ],
+        )
+
+    @staticmethod
+    def _insert_params(schedule: Schedule) -> tuple:
+        """Column values for _INSERT_SQL."""
+
+        return (
+            schedule.id,
+            schedule.medication_id,
+            json.dumps([t.strftime("%H:%M") for t in schedule.times]),
+            json.dumps(schedule.days_of_week),
+            schedule.frequency,
+            schedule.start_date.isoformat(),
+            schedule.end_date.isoformat() if schedule.end_date else None,
+            1 if schedule.is_active else 0,
+            schedule.created_at.isoformat(),
+            date_to_epoch_day(schedule.start_date),
+            date_to_epoch_day(schedule.end_date),
+            datetime_to_epoch_us(schedule.created_at),
+            weekday_mask(schedule),
+        )
+
+    @staticmethod
+    def _update_params(schedule: Schedule) -> tuple:
+        """Column values for _UPDATE_SQL."""
+
+        return (
+            json.dumps([t.strftime("%H:%M") for t in schedule.times]),
+            schedule.frequency,
+            json.dumps(schedule.days_of_week),
+            schedule.start_date.isoformat(),
+            schedule.end_date.isoformat() if schedule.end_date else None,
+            1 if schedule.is_active else 0,
+            date_to_epoch_day(schedule.start_date),
+            date_to_epoch_day(schedule.end_date),
+            weekday_mask(schedule),
+            schedule.id,
+        )
+
+    def _on_change(self, change: Change) -> None:
+        """
+        Change feed callback: drop schedules that were written (delivered
+        after the commit inside a transaction, so rows another thread
+        cached meanwhile go too) and those of a deleted medication.
+        """
+
+        if change.entity == "database":
+            # Written outside the repositories; anything may be stale.
+            self.cache.clear()
+        elif change.entity == "schedule":
+            if change.entity_id is not None:
+                self.cache.invalidate(change.entity_id)
+            else:
+                self._forget_medication(change.medication_id)
+        elif change.entity == "medication" and change.kind == "delete":
+            self._forget_medication(change.entity_id)
+
+    def _forget_medication(self, medication_id: Optional[str]) -> None:
+        """Drop every cached schedule that belongs to a medication."""
+
+        self.cache.invalidate_where(lambda s: s.medication_id == medication_id)
+
+    def _publish(
+        self, schedule_id: Optional[str], kind: str, medication_id: Optional[str] = None
+    ) -> None:
+        """Announce a committed write on the change feed, if there is one."""
+
+        # Evicted again by _on_change once a surrounding transaction commits.
+        if schedule_id is not None:
+            self.cache.invalidate(schedule_id)
+        else:
+            self._forget_medication(medication_id)
+
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                Change("schedule", schedule_id, kind, medication_id)
+            )
+
     def _row_to_schedule(self, row) -> Schedule:
-        """Build a Schedule object from the row returned by the query."""
+        """Build a Schedule object from a row in _COLUMNS order."""
+
+        (schedule_id, medication_id, raw_times, raw_days, frequency,
+         start_date, end_date, is_active, created_at,
+         start_day, end_day, created_us) = row
 
         # Make app better to identify malformed data - 
         # such as data with missing rows, corrupted DB rows, etc.
-        raw_times =json.loads(row["times"]) or []
-        times = [datetime.strptime(t, "%H:%M").time() for t in raw_times]
-        days = json.loads(row["days_of_week"]) or []
+        raw_times =json.loads(raw_times) or []
+        # Stored as "HH:MM"; slicing is far cheaper than strptime per time.
+        times = [time(int(t[:2]), int(t[3:5])) for t in raw_times]
+        days = json.loads(raw_days) or []
 
         schedule = Schedule(
-            id=row["id"],
-            medication_id=str(row["medication_id"]),
+            id=schedule_id,
+            medication_id=str(medication_id),
             times=times,
-            frequency=row["frequency"],
+            frequency=frequency,
             days_of_week=days,
-            start_date=datetime.fromisoformat(row["start_date"]).date(),
-            end_date=datetime.fromisoformat(row["end_date"]).date() 
-            if row["end_date"] 
-            else None,
-            is_active=bool(row["is_active"]),
-            created_at=datetime.fromisoformat(row["created_at"]),
+            start_date=_read_date(start_date, start_day),
+            end_date=_read_date(end_date, end_day),
+            is_active=bool(is_active),
+            created_at=datetime.fromisoformat(created_at)
+            if created_at
+            else epoch_us_to_datetime(created_us),
         )
 
-        # Run validation rules before saving the Schedule.
-        ScheduleValidator.validate(schedule)
-        return schedule
\ No newline at end of file
+        # Re-validate the stored row only if the read policy asks for it.
+        if self.validation.validate_read():
+            ScheduleValidator.validate(schedule)
+        return schedule
+
+
+def _read_date(text: Optional[str], epoch_day: Optional[int]) -> Optional[date]:
+    """
+    Decode a date from whichever column the row has filled, preferring
+    the ISO text (fastest to decode, see tests/test_epoch.py).
+    """
+
+    if text:
+        return date.fromisoformat(text[:10])
+
+    return epoch_day_to_date(epoch_day)
+
+
+def weekday_mask(schedule: Schedule) -> int:
+    """
+    Encode the weekdays a schedule doses on as bits (bit 0 = Monday).
+    Daily schedules, and weekly ones without days, dose every day;
+    out-of-range days are ignored, as in ScheduleEngine.dose_weekdays.
+    """
+
+    if schedule.frequency == "daily" or not schedule.days_of_week:
+        return ALL_WEEKDAYS_MASK
+
+    mask = 0
+    for day in schedule.days_of_week:
+        if day in range(7):
+            mask |= 1 << day
+    return mask
@@ -1,6 +1,10 @@
 import json
+from typing import Optional
 # Import Models.
 from models.user_profile import UserProfile
+# Import Data.
+from data.change_feed import Change, ChangeFeed
+from data.retry import run_write
 
 class UserProfileRepository:
     """
@@ -8,8 +12,10 @@ class UserProfileRepository:
     Stores these in a JSON format for flexibility and expansion.
     """
 
-    def __init__(self, conn):
+    def __init__(self, conn, change_feed: Optional[ChangeFeed] = None):
         self.conn = conn
+        # Optional channel that announces every write to subscribers.
+        self.change_feed = change_feed
         self._user_table()
 
     def _user_table(self):
@@ -42,22 +48,32 @@ class UserProfileRepository:
         # Turn the profile object into JSON for storage.
         data = json.dumps(profile.to_dict())
 
-        # Check if profile already exists.
-        existing = self.conn.execute(
-            "SELECT id FROM user_profile LIMIT 1"
-        ).fetchone()
+        def save():
+            # Check if profile already exists.
+            existing = self.conn.execute(
+                "SELECT id FROM user_profile LIMIT 1"
+            ).fetchone()
 
-        if existing:
-            # Update existing row.
-            self.conn.execute(
-                "UPDATE user_profile SET data = ? WHERE id = ?",
-                (data, existing["id"]),
-            )
-        else:
-            # Insert new row.
-            self.conn.execute(
-                "INSERT INTO user_profile (id, data) VALUES (?, ?)",
-                (profile.id, data),
-            )
+            if existing:
+                # Update existing row.
+                self.conn.execute(
+                    "UPDATE user_profile SET data = ? WHERE id = ?",
+                    (data, existing["id"]),
+                )
+                result = existing["id"], "update"
+            else:
+                # Insert new row.
+                self.conn.execute(
+                    "INSERT INTO user_profile (id, data) VALUES (?, ?)",
+                    (profile.id, data),
+                )
+                result = profile.id, "add"
+
+            self.conn.commit()
+            return result
+
+        # The check and the write retry together if the database was locked.
+        profile_id, kind = run_write(self.conn, save, "save user profile")
 
-        self.conn.commit()
\ No newline at end of file
+        if self.change_feed is not None:
+            self.change_feed.publish(Change("user_profile", profile_id, kind))
\ No newline at end of file
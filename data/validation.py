@@ -0,0 +1,60 @@
+# When repositories run the model validators.
+# Everything written goes through a validator first, so rows read back
+# are trusted by default. Re-validating on read is opt-in, either for
+# every row or for a random sample; a scheduled integrity check covers
+# data that may have been changed outside the app.
+
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+# Validate on write only (the default).
+ON_WRITE = "on_write"
+# Validate on write and on every read.
+ON_READ = "on_read"
+# Validate on write and on a random fraction of reads.
+SAMPLED = "sampled"
+VALIDATION_MODES = {ON_WRITE, ON_READ, SAMPLED}
+
+
+@dataclass(frozen=True)
+class ValidationPolicy:
+    """Decides which reads re-run the validator."""
+
+    # One of VALIDATION_MODES.
+    mode: str = ON_WRITE
+    # Fraction of reads validated in SAMPLED mode.
+    sample_rate: float = 0.01
+
+    def __post_init__(self):
+        """Reject unknown modes and impossible sample rates."""
+
+        if self.mode not in VALIDATION_MODES:
+            raise ValueError(f"Unsupported validation mode '{self.mode}'.")
+        if not 0.0 <= self.sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1.")
+
+    def validate_read(self) -> bool:
+        """Return True if the row being read should be validated."""
+
+        if self.mode == ON_WRITE:
+            return False
+        if self.mode == ON_READ:
+            return True
+        return random.random() < self.sample_rate
+
+
+# Policy used by the repositories unless a caller asks for something else.
+DEFAULT_VALIDATION = ValidationPolicy()
+
+
+@dataclass(frozen=True)
+class IntegrityIssue:
+    """A stored row that failed to decode or validate."""
+
+    # Which kind of record - "medication", "schedule", etc.
+    entity: str
+    # ID of the row, when it could be read.
+    entity_id: Optional[str]
+    # What went wrong.
+    error: str
@@ -0,0 +1,261 @@
+# Funnels writes through one thread so they can share commits.
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+# Import Data.
+from data.database import Database
+from data.retry import retry_transient
+
+# A batch is committed once it holds this many writes...
+DEFAULT_MAX_BATCH = 200
+# ...or once this long has passed since its first write arrived.
+DEFAULT_MAX_DELAY = timedelta(milliseconds=5)
+
+# Queued by stop(); the writer finishes what is ahead of it, then exits.
+_STOP = object()
+
+# Repository methods that write; callers that route writes through the
+# queue (AsyncDatabase, QueuedRepository) send exactly these.
+WRITE_METHODS = frozenset({
+    "add", "add_many", "update", "update_many", "delete", "delete_many",
+    "delete_by_medication", "save_profile",
+    "ensure_pending", "mark_fired", "acknowledge", "snooze", "close_past",
+})
+
+
+@dataclass
+class _Write:
+    """One queued write and the future its caller is holding."""
+
+    fn: Callable[[], Any]
+    future: Future = field(default_factory=Future)
+    # (repository, row ID) for keyed writes; None for opaque ones.
+    key: Optional[Hashable] = None
+    # "add", "update" or "delete" for keyed writes.
+    kind: Optional[str] = None
+    # What the caller receives if a later write makes this one redundant.
+    superseded_result: Any = None
+    # Earlier writes dropped in favour of this one.
+    superseded: List["_Write"] = field(default_factory=list)
+
+    def resolve(self, result: Any) -> None:
+        self.future.set_result(result)
+        for write in self.superseded:
+            write.future.set_result(write.superseded_result)
+
+    def fail(self, error: BaseException) -> None:
+        self.future.set_exception(error)
+        for write in self.superseded:
+            write.future.set_exception(error)
+
+
+class WriteQueue:
+    """
+    Single writer thread for a Database. Callers queue writes and get a
+    Future back; the writer commits whatever has queued up within
+    max_delay (or max_batch writes) as one transaction, so a burst of
+    saves costs one commit and never contends for the write lock.
+
+    Before committing, a batch is coalesced per row: an update followed
+    by another update or a delete of the same row is dropped, and its
+    future resolves when the write that replaced it commits. If any write
+    in a batch fails, the batch is rolled back and replayed one write per
+    transaction, so only the failing caller sees the error.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: timedelta = DEFAULT_MAX_DELAY,
+    ):
+        """Set up the database to write to and how much to batch."""
+
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1.")
+
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # Counters for monitoring; only the writer thread changes them.
+        self.batches = 0
+        self.writes = 0
+        self.coalesced = 0
+        # Worker state.
+        self.running = False
+        self.thread = None
+        self._queue: "queue.Queue" = queue.Queue()
+
+    # Queueing writes.
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue an arbitrary write; it is never coalesced."""
+
+        return self._put(_Write(lambda: fn(*args, **kwargs)))
+
+    def add(self, repository: Any, item: Any) -> Future:
+        """Queue repository.add(item)."""
+
+        return self._put(_Write(
+            lambda: repository.add(item),
+            key=(id(repository), item.id), kind="add",
+        ))
+
+    def update(self, repository: Any, item: Any) -> Future:
+        """Queue repository.update(item)."""
+
+        return self._put(_Write(
+            lambda: repository.update(item),
+            key=(id(repository), item.id), kind="update",
+            superseded_result=item,
+        ))
+
+    def delete(self, repository: Any, item_id: str) -> Future:
+        """Queue repository.delete(item_id)."""
+
+        return self._put(_Write(
+            lambda: repository.delete(item_id),
+            key=(id(repository), item_id), kind="delete",
+        ))
+
+    # Lifecycle.
+    def start(self) -> None:
+        """Start the writer thread."""
+
+        # Prevent duplicate worker threads.
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Commit everything queued so far, then stop the writer thread."""
+
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(_STOP)
+        if self.thread is not None:
+            self.thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Batches committed, writes run and writes coalesced away."""
+
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+        }
+
+    # Writer thread.
+    def _put(self, write: _Write) -> Future:
+        self._queue.put(write)
+        return write.future
+
+    def _run_loop(self) -> None:
+        """Collect a batch, coalesce it, commit it; repeat until stopped."""
+
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.max_delay.total_seconds()
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    write = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if write is _STOP:
+                    stopping = True
+                    break
+                batch.append(write)
+
+            self._commit(self._coalesce(batch))
+            if stopping:
+                return
+
+    def _coalesce(self, batch: List[_Write]) -> List[_Write]:
+        """Drop updates that a later update or delete of the row replaces."""
+
+        kept: List[_Write] = []
+        # Latest pending update per row since the last opaque write.
+        updates: Dict[Hashable, _Write] = {}
+
+        for write in batch:
+            if write.key is None:
+                # Opaque writes may touch anything; nothing crosses them.
+                updates.clear()
+            else:
+                previous = updates.pop(write.key, None)
+                if previous is not None and write.kind in ("update", "delete"):
+                    kept.remove(previous)
+                    write.superseded.extend([previous, *previous.superseded])
+                    previous.superseded = []
+                    self.coalesced += 1
+                if write.kind == "update":
+                    updates[write.key] = write
+            kept.append(write)
+
+        return kept
+
+    def _commit(self, batch: List[_Write]) -> None:
+        """Run a batch as one transaction, isolating failures if it breaks."""
+
+        def run() -> List[Any]:
+            with self.db.transaction():
+                return [write.fn() for write in batch]
+
+        try:
+            # The writes inside cannot retry on their own, so a locked
+            # database retries the whole batch.
+            results = retry_transient(self.db.conn, run, "commit queued writes")
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].fail(e)
+                return
+            # Replay one by one so only the failing write reports an error.
+            for write in batch:
+                self._commit([write])
+            return
+
+        self.batches += 1
+        self.writes += len(batch)
+        for write, result in zip(batch, results):
+            write.resolve(result)
+
+
+class QueuedRepository:
+    """
+    Blocking view of a repository for a background thread: its write
+    methods run on the WriteQueue and return once their batch commits;
+    reads and everything else go to the repository directly.
+    Never use it from inside a queued write (the writer would wait on itself).
+    """
+
+    def __init__(self, repository: Any, writer: WriteQueue):
+        self._repository = repository
+        self._writer = writer
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._repository, name)
+        if name not in WRITE_METHODS or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return self._writer.submit(attr, *args, **kwargs).result()
+
+        return call
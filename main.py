@@ -2,6 +2,8 @@
 import flet as ft
 # Import Data.
 from data.database import Database
+from data.async_database import AsyncDatabase
+from data.write_queue import WriteQueue
 # Trying to silence the linter as the flet code accpets dynamic attributes.
 from ui_types.typed_page import TypedPage
 
@@ -24,6 +26,8 @@ from services.reminders import ReminderService
 from services.schedule_engine import ScheduleEngine
 from services.schedule_service import ScheduleService
 from services.scheduler_service import SchedulerService
+from services.integrity_check import IntegrityCheckService, log_issue
+from services.view_refresher import ViewRefresher
 
 
 
@@ -41,11 +45,19 @@ def main(page: TypedPage):
 
     # Initialize database (all repos created inside)
     page.db = Database() 
+    # The app's single writer: UI saves and the scheduler's reminder
+    # events queue here and share one commit every few milliseconds.
+    page.writer = WriteQueue(page.db)
+    page.writer.start()
+    # Async handlers await reads run on a database thread and writes
+    # made by the writer.
+    page.adb = AsyncDatabase(page.db, page.writer)
 
     # Initialize services - business logic layer.
     schedule_service = ScheduleService(
         reminder_repo=page.db.reminders,
-        schedule_repo=page.db.schedules 
+        schedule_repo=page.db.schedules,
+        change_feed=page.db.changes,
     )
 
     # Notification service needs the page
@@ -65,27 +77,65 @@ def main(page: TypedPage):
         schedule_engine=schedule_engine
     )
 
-    # Background scheduler (Thread safe)
-    page.scheduler = SchedulerService(notifier=notifier)
+    # Background scheduler (Thread safe). The connection manager gives its
+    # thread its own connection (and counts its commits as ours), and it
+    # wakes up early whenever the repositories announce a write. Its reads
+    # go through a read-only connection, one snapshot per pass.
+    page.scheduler = SchedulerService(
+        notifier=notifier,
+        change_feed=page.db.changes,
+        connection_factory=lambda: page.db.conn,
+        read_connection_factory=lambda: page.db.reader.connection(),
+        writer=page.writer,
+    )
     page.scheduler.start()
 
+    # Writes from other processes reach the same change feed.
+    page.db.external_writes.start()
+
+    # Reads trust what was validated on write; this job re-checks the
+    # stored rows once a day in the background.
+    page.integrity_check = IntegrityCheckService(
+        [
+            page.db.medications,
+            page.db.schedules,
+            page.db.reminders,
+            page.db.intake_logs,
+        ],
+        on_issue=log_issue,
+    )
+    page.integrity_check.start()
+
     # Router - handles navigation.
-    def show(view_func):
-        """Central for rendering views within the navigation flow."""
+    def render(view_func):
+        """Draw a view as the only one on the page."""
 
         view = view_func(page)
         page.views.clear()
         page.views.append(view)
         page.update()
 
+    # Redraws list screens when data they display changes underneath them.
+    page.view_refresher = ViewRefresher(page.db.changes, render)
+    page.view_refresher.start()
+
+    def show(view_func, watches=()):
+        """
+        Central for rendering views within the navigation flow.
+        watches names the entities the view displays; forms leave it empty.
+        """
+
+        render(view_func)
+        page.view_refresher.showing(view_func, watches)
+
     # Expose navigation functions to screens
-    page.show_dashboard = lambda: show(dashboard_view) 
+    page.show_dashboard = lambda: show(dashboard_view, {"medication"})
     page.show_user_profile = lambda: show(user_profile_view)
-    page.show_medications = lambda: show(medications_view)
+    page.show_medications = lambda: show(medications_view, {"medication"})
     page.show_add_medication = lambda: show(add_medication_view) 
     page.show_edit_medication = lambda med_id: show(
         lambda p: edit_medication_view(p, str(med_id)))
-    page.show_appointments = lambda: show(appointments_view) 
+    page.show_appointments = lambda: show(appointments_view, {"appointment"})
     page.show_add_appointment = lambda: show(add_appointment_view)
     page.show_edit_appointment = lambda appt_id: show(
         lambda p: edit_appointment_view(p, str(appt_id)))
@@ -96,7 +146,8 @@ def main(page: TypedPage):
         lambda p: edit_schedule_view(p, str(sched_id))) 
     
     page.show_settings = lambda: show(settings_view) 
-    page.show_analytics = lambda: show(analytics_view)
+    page.show_analytics = lambda: show(
+        analytics_view, {"medication", "intake_log"})
 
     # Show services to screens, so screens can access repos/services if needed.
     page.appointment_repo = page.db.appointments 
@@ -108,8 +159,23 @@ def main(page: TypedPage):
     
 
 
+    def shutdown(_):
+        """Stop the background threads, committing every queued write."""
+
+        page.view_refresher.stop()
+        page.integrity_check.stop()
+        # Let a pass in progress finish queueing its reminder events.
+        page.scheduler.stop()
+        if page.scheduler.thread is not None:
+            page.scheduler.thread.join(timeout=5)
+        # Finish handler calls already handed over, then drain the queue.
+        page.adb.close()
+        page.writer.stop()
+
+    page.on_close = shutdown
+
     # Start at dashboard
-    show(dashboard_view)
+    page.show_dashboard()
    
 # Launch the app.
 ft.app(main)
\ No newline at end of file
@@ -1,6 +1,17 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+# Lifecycle of a persisted reminder event.
+# pending -> fired -> acknowledged | missed, with snoozed re-arming a fire.
+PENDING = "pending"
+FIRED = "fired"
+ACKNOWLEDGED = "acknowledged"
+SNOOZED = "snoozed"
+MISSED = "missed"
+REMINDER_EVENT_STATES = {PENDING, FIRED, ACKNOWLEDGED, SNOOZED, MISSED}
+# States that may still produce a notification.
+OPEN_STATES = {PENDING, SNOOZED}
+
 @dataclass
 class ReminderEvent:
     """Typed data model defining a reminder's timing and metadata."""
@@ -17,6 +28,10 @@ class ReminderEvent:
     is_taken: bool
     # Only True if the scheduled_time has passed and the dose was missed.
     is_overdue: bool
+    # The reminder setting that produced this event (empty if unknown).
+    reminder_id: str = ""
+    # Persisted lifecycle state; see REMINDER_EVENT_STATES.
+    state: str = PENDING
 
     def is_due(self) -> bool:
         """Determin if the scheduled time has passed and the event is due."""
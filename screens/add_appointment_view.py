@@ -14,7 +14,7 @@ def add_appointment_view(page: Any) -> ft.View:
     location_field = ft.TextField(label="Location")
     notes_field = ft.TextField(label="Notes", multiline=True)
 
-    def save_appointment(e):
+    async def save_appointment(e):
         """Trigger when the user submits the appointment form."""
        
         # Create Appointment model instance.
@@ -26,8 +26,8 @@ def add_appointment_view(page: Any) -> ft.View:
            notes=notes_field.value
         )
 
-        # Save to database
-        page.appointment_repo.add(appt)
+        # Save to database without blocking the UI loop.
+        await page.adb.appointments.add(appt)
 
         # Navigate back to the appointments screen
         page.show_appointments()
@@ -13,7 +13,7 @@ def add_medication_view(page: Any):
     notes = ft.TextField(label="Notes", multiline=True, min_lines=3)
     is_active = ft.Switch(label="Active Medication", value=True)
 
-    def save_medication(e):
+    async def save_medication(e):
         """This function saves data to the database."""
 
         # Critical: force Flet to sync TextField values.
@@ -29,8 +29,8 @@ def add_medication_view(page: Any):
             schedule=[]
         )
 
-        # Save to the database.
-        page.medication_repo.add(med)
+        # Save to the database without blocking the UI loop.
+        await page.adb.medications.add(med)
 
         # Navigate back to the medications screen
         page.show_medications()
@@ -20,7 +20,7 @@ def add_schedule_view(page, med_id: str) -> ft.View:
 
     active_switch = ft.Switch(label="Active Schedule", value=True)
 
-    def save_schedule(e):
+    async def save_schedule(e):
         # Parse times
         parsed_times = []
         for t in (times_field.value or "").split(","):
@@ -56,7 +56,7 @@ def add_schedule_view(page, med_id: str) -> ft.View:
             created_at=datetime.datetime.now(datetime.timezone.utc),
         )
 
-        page.schedule_repo.add(schedule_obj)
+        await page.adb.schedules.add(schedule_obj)
 
         page.snack_bar = ft.SnackBar(ft.Text("Schedule created"))
         page.snack_bar.open = True
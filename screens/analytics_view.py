@@ -32,26 +32,32 @@ def fig_to_image(fig) -> ft.Image:
 def build_intake_time_series(page: TypedPage) -> ft.Image:
     """Chart 1: Intake over time (Grouped by medication)."""
 
-    intake_logs = page.db.intake_logs.get_all()
-    medications = {m.id: m for m in page.db.medications.get_all()}
-
-    # Group logs by medication.
     grouped: Dict[str, Dict[str, List]] = {}
-    for log in intake_logs:
-        med = medications.get(log.medication_id)
-        if med is None:
-            # Skip if medication is unknown.
-            continue
-
-        if med.id not in grouped:
-            grouped[med.id] = {
-                "name": med.name,
-                "times": [],
-                "amounts": [],
-            }
-
-        grouped[med.id]["times"].append(log.taken_time)
-        grouped[med.id]["amounts"].append(log.amount_taken)
+
+    # Read-only snapshot: medications and logs agree with each other, and
+    # the scan never delays an intake being saved meanwhile.
+    with page.db.snapshot() as snap:
+        medications = {
+            m.id: m for m in snap.medications.get_all(with_schedules=False)
+        }
+
+        # Group logs by medication, streaming them so only the plotted
+        # values are held in memory, never the full list of logs.
+        for log in snap.intake_logs.iter_all():
+            med = medications.get(log.medication_id)
+            if med is None:
+                # Skip if medication is unknown.
+                continue
+
+            if med.id not in grouped:
+                grouped[med.id] = {
+                    "name": med.name,
+                    "times": [],
+                    "amounts": [],
+                }
+
+            grouped[med.id]["times"].append(log.taken_time)
+            grouped[med.id]["amounts"].append(log.amount_taken)
 
     # Build the figure.
     fig, ax = plt.subplots(figsize=(8, 4))
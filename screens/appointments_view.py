@@ -5,10 +5,9 @@ from ui_types.typed_page import TypedPage
 def appointments_view(page: TypedPage) -> ft.View:
     """Build the main appointments screen."""
 
-    def load_appointments():
-        """Retrieve the appointment records from the appointment repository."""
+    def appointment_controls(appts):
+        """Turn appointment records into list items."""
 
-        appts = page.appointment_repo.get_all()
         items = []
 
         if not appts:
@@ -38,7 +37,9 @@ def appointments_view(page: TypedPage) -> ft.View:
                                     ft.IconButton(
                                         icon=ft.Icons.DELETE,
                                         tooltip="Delete",
-                                        on_click=lambda e, aid=appt.id: delete_appointment(aid)
+                                        on_click=lambda e, aid=appt.id: page.run_task(
+                                            delete_appointment, aid
+                                        )
                                     ),
                                 ]
                             ),
@@ -54,11 +55,23 @@ def appointments_view(page: TypedPage) -> ft.View:
 
         return items
 
-    def delete_appointment(appt_id: str):
+    # Rendered right away with a spinner; load_appointments fills it in.
+    appt_list = ft.Column([ft.ProgressRing()], spacing=10)
+
+    async def load_appointments():
+        """Retrieve the appointment records from the appointment repository."""
+
+        appts = await page.adb.appointments.get_all()
+        appt_list.controls = appointment_controls(appts)
+        page.update()
+
+    async def delete_appointment(appt_id: str):
         """Repository: Delete the appointment record with the given ID."""
         
-        page.appointment_repo.delete(appt_id)
+        await page.adb.appointments.delete(appt_id)
         page.show_appointments()
+
+    page.run_task(load_appointments)
     
     # UI Layout.
     return ft.View(
@@ -72,7 +85,7 @@ def appointments_view(page: TypedPage) -> ft.View:
                     on_click=lambda _: page.show_dashboard()
                 ),
             ),
-            ft.Column(load_appointments(), spacing=10),
+            appt_list,
 
             ft.ElevatedButton(
                 "Add Appointment",
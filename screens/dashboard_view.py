@@ -40,7 +40,7 @@ def dashboard_view(page: Any):
     """
 
     # Pull basic stats from repositories.
-    meds = page.medication_repo.get_all()
+    meds = page.medication_repo.get_all(with_schedules=False)
     active_meds = [m for m in meds if m.is_active]
 
     total_meds = len(meds)
@@ -21,7 +21,7 @@ def edit_appointment_view(page: Any, appointment_id: str) -> ft.View:
     location_field = ft.TextField(label="Location", value=appt.location)
     notes_field = ft.TextField(label="Notes", multiline=True, value=appt.notes)
 
-    def save_changes(e):
+    async def save_changes(e):
         """Triggered when the user submits edited appointment data."""
         
         appt.title = name_field.value
@@ -30,7 +30,7 @@ def edit_appointment_view(page: Any, appointment_id: str) -> ft.View:
         appt.location = location_field.value
         appt.notes = notes_field.value
 
-        page.appointment_repo.update(appt)
+        await page.adb.appointments.update(appt)
         page.show_appointments()
 
         page.snack_bar = ft.SnackBar(ft.Text("Appointment updated"))
@@ -24,7 +24,7 @@ def edit_medication_view(page, med_id: str) -> ft.View:
     notes_field = ft.TextField(label="Notes", multiline=True, value=med.notes or "")
     is_active_switch = ft.Switch(label="Active Medication", value=med.is_active)
 
-    def save_medication(e):
+    async def save_medication(e):
         """Triggered when the user submits edited medication data."""
 
         updated = Medication(
@@ -37,7 +37,7 @@ def edit_medication_view(page, med_id: str) -> ft.View:
             created_at=med.created_at,
         )
 
-        page.medication_repo.update(updated)
+        await page.adb.medications.update(updated)
 
         page.snack_bar = ft.SnackBar(ft.Text("Medication updated"))
         page.snack_bar.open = True
@@ -50,11 +50,15 @@ def edit_medication_view(page, med_id: str) -> ft.View:
 
         page.show_medications()
 
-    def delete_medication():
+    async def delete_medication(e):
         """Handle a removal of a medication and refresh the medication view."""
         
-        page.medication_repo.delete(med.id)
-        page.schedule_repo.delete_by_medication(med.id)
+        def delete_both():
+            page.medication_repo.delete(med.id)
+            page.schedule_repo.delete_by_medication(med.id)
+
+        # One unit of work: both deletes commit together or not at all.
+        await page.adb.transaction(delete_both)
         page.show_medications()
 
     # Show ADD Schedule or Edit Schedule depending on whether a schedule exists.
@@ -115,7 +119,7 @@ def edit_medication_view(page, med_id: str) -> ft.View:
                                     icon=ft.Icons.DELETE,
                                     bgcolor=ft.Colors.RED,
                                     color=ft.Colors.BLACK,
-                                    on_click=lambda _: delete_medication(),
+                                    on_click=delete_medication,
                                 ),
                             ],
                             alignment=ft.MainAxisAlignment.END,
@@ -29,7 +29,7 @@ def edit_schedule_view(page, med_id: str) -> ft.View:
         value=sched.is_active if sched else True,
     )
     
-    def save_schedule(e):
+    async def save_schedule(e):
         """Triggered when the user submits the schedule form."""
 
         # Parse times.
@@ -69,9 +69,9 @@ def edit_schedule_view(page, med_id: str) -> ft.View:
     
         # Save or update the schedule.
         if sched:
-            page.schedule_repo.update(schedule_obj)
+            await page.adb.schedules.update(schedule_obj)
         else:
-            page.schedule_repo.add(schedule_obj)
+            await page.adb.schedules.add(schedule_obj)
 
         page.snack_bar = ft.SnackBar(ft.Text("Schedule saved"))
         page.snack_bar.open = True
@@ -80,10 +80,10 @@ def edit_schedule_view(page, med_id: str) -> ft.View:
         # Go back to the edit medications screen.
         page.show_edit_medication(med_id)
         
-    def delete_schedule(e):
+    async def delete_schedule(e):
         """Delete the schedule for this medication."""
         
-        page.schedule_repo.delete_by_medication(med_id)
+        await page.adb.schedules.delete_by_medication(med_id)
 
         page.snack_bar = ft.SnackBar(ft.Text("Schedule Deleted"))
         page.snack_bar.open = True
@@ -61,10 +61,8 @@ def medication_card(med, on_click):
 def medications_view(page: TypedPage) -> ft.View:
     """Construct the medication view using the typed page context."""
 
-    def load_medications():
-        """Retrieve medication records from the repository."""
-        
-        meds = page.medication_repo.get_all()
+    def medication_controls(meds):
+        """Turn medication records into list items."""
         
         if not meds:
             return [
@@ -83,6 +81,23 @@ def medications_view(page: TypedPage) -> ft.View:
             )
             for med in meds
         ]   
+
+    # Rendered right away with a spinner; load_medications fills it in.
+    med_list = ft.Column(
+        [ft.ProgressRing()],
+        spacing=10,
+        expand=True,
+        scroll=ft.ScrollMode.AUTO,
+    )
+
+    async def load_medications():
+        """Retrieve medication records from the repository."""
+
+        meds = await page.adb.medications.get_all(with_schedules=False)
+        med_list.controls = medication_controls(meds)
+        page.update()
+
+    page.run_task(load_medications)
     
     # UI Layout.
     return ft.View(
@@ -118,12 +133,7 @@ def medications_view(page: TypedPage) -> ft.View:
                             leading_indent=0,
                             trailing_indent=200,
                         ),
-                        ft.Column(
-                            load_medications(),
-                            spacing=10,
-                            expand=True,
-                            scroll=ft.ScrollMode.AUTO,
-                        ),
+                        med_list,
                         ft.FloatingActionButton(
                             icon=ft.Icons.ADD,
                             autofocus=True,
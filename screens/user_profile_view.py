@@ -6,34 +6,17 @@ from models.user_profile import UserProfile
 def user_profile_view(page: Any) -> ft.View:
     """Generates a User profile screen."""
 
-    # Load default profile.
-    profile = page.db.user_profile.get_profile()
-    if profile is None:
-        profile = UserProfile(
-            name=None,
-            timezone="UTC",
-            preferred_units={},
-            date_of_birth=None,
-            emergency_contact=None,
-            notes=None,
-        )
-        page.db.user_profile.save_profile(profile)
-
-
-    # Form fields
+    # Form fields, filled in by load_profile once the profile is read.
     name_field = ft.TextField(
          label="Display Name",
-         value=profile.name or "",
     )
 
     dob_field = ft.TextField(
             label="Date of Birth (YYYY-MM-DD)",
-            value=profile.date_of_birth or "",
     )
         
     timezone_field = ft.TextField(
          label="Timezone",
-         value=profile.timezone,
     )
 
     weight_dropdown = ft.Dropdown(
@@ -42,8 +25,6 @@ def user_profile_view(page: Any) -> ft.View:
             ft.dropdown.Option("kg"),
             ft.dropdown.Option("lbs"),
         ],
-        value=(profile.preferred_units.get("weight") 
-               if profile.preferred_units else "kg"),
     )
 
     height_dropdown = ft.Dropdown(
@@ -52,24 +33,46 @@ def user_profile_view(page: Any) -> ft.View:
             ft.dropdown.Option("cm"),
             ft.dropdown.Option("ft/in"),
         ],
-        value=(profile.preferred_units.get("height") 
-               if profile. preferred_units
-               else "cm"),
     )
 
     emergency_contact_field = ft.TextField(
          label="Emergency Contact",
-         value=profile.emergency_contact or "",
     )
 
     notes_field = ft.TextField(
          label="Health Notes",
-         value=profile.notes or "",
          multiline=True,
     )
 
+    async def load_profile():
+        """Read the profile (saving the default one if there is none)."""
+
+        profile = await page.adb.user_profile.get_profile()
+        if profile is None:
+            profile = UserProfile(
+                name=None,
+                timezone="UTC",
+                preferred_units={},
+                date_of_birth=None,
+                emergency_contact=None,
+                notes=None,
+            )
+            await page.adb.user_profile.save_profile(profile)
+
+        name_field.value = profile.name or ""
+        dob_field.value = profile.date_of_birth or ""
+        timezone_field.value = profile.timezone
+        weight_dropdown.value = (profile.preferred_units.get("weight") 
+                                 if profile.preferred_units else "kg")
+        height_dropdown.value = (profile.preferred_units.get("height") 
+                                 if profile.preferred_units
+                                 else "cm")
+        emergency_contact_field.value = profile.emergency_contact or ""
+        notes_field.value = profile.notes or ""
+        page.update()
+
     # Save logic
-    def save_changes(e):
+    async def save_changes(e):
         """Save the users changes to the database."""
 
         parsed_units = {
@@ -86,7 +89,7 @@ def user_profile_view(page: Any) -> ft.View:
             notes=notes_field.value,
         )
 
-        page.db.user_profile.save_profile(updated)
+        await page.adb.user_profile.save_profile(updated)
 
         page.snack_bar = ft.SnackBar(ft.Text("Profile updated"))
         page.snack_bar.open = True
@@ -115,6 +118,8 @@ def user_profile_view(page: Any) -> ft.View:
             notes="",
         )
 
+    page.run_task(load_profile)
+
     # UI layout
     return ft.View(
         route="/user_profile",
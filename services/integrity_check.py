@@ -0,0 +1,104 @@
+# Reports the rows a scan found to be bad.
+import logging
+# Used to run the check in the background.
+import threading
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Protocol
+
+# Imports from Data.
+from data.validation import IntegrityIssue
+
+# How often the background job rescans the database.
+DEFAULT_INTERVAL = timedelta(hours=24)
+
+logger = logging.getLogger(__name__)
+
+
+def log_issue(issue: IntegrityIssue) -> None:
+    """on_issue handler that logs each bad row as a warning."""
+
+    logger.warning(
+        "Integrity check: %s %s is invalid: %s",
+        issue.entity, issue.entity_id or "(unknown id)", issue.error,
+    )
+
+
+class IntegrityCheckable(Protocol):
+    """A repository that can scan and validate its stored rows."""
+
+    def check_integrity(self) -> Iterator[IntegrityIssue]: ...
+
+
+class IntegrityCheckService:
+    """
+    Background job that re-validates the data already on disk.
+    Repositories only validate on write by default, so this is what
+    catches rows changed outside the app or by an older version.
+    """
+
+    def __init__(
+        self,
+        repositories: Iterable[IntegrityCheckable],
+        on_issue: Optional[Callable[[IntegrityIssue], None]] = None,
+        interval: timedelta = DEFAULT_INTERVAL,
+    ):
+        """Set up the repositories to scan and where to report problems."""
+
+        self.repositories = list(repositories)
+        # Called once per bad row; defaults to doing nothing.
+        self.on_issue = on_issue
+        self.interval = interval
+        # Issues found by the most recent completed scan.
+        self.last_issues: List[IntegrityIssue] = []
+        # Error that aborted the most recent scan, if any.
+        self.last_error: Optional[Exception] = None
+        # Worker state.
+        self.running = False
+        self.thread = None
+        self._stop = threading.Event()
+
+    def run_once(self) -> List[IntegrityIssue]:
+        """Scan every repository now and return the issues found."""
+
+        issues: List[IntegrityIssue] = []
+
+        for repo in self.repositories:
+            for issue in repo.check_integrity():
+                issues.append(issue)
+                if self.on_issue is not None:
+                    self.on_issue(issue)
+
+        self.last_issues = issues
+        self.last_error = None
+        return issues
+
+    def start(self) -> None:
+        """Run a scan now and then once per interval, in a daemon thread."""
+
+        # Prevent duplicate worker threads.
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background loop (after the scan in progress, if any)."""
+
+        self.running = False
+        self._stop.set()
+
+    def _run_loop(self) -> None:
+        """Scan, then sleep until the next interval or stop()."""
+
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                # Keep the job alive; the next interval tries again.
+                self.last_error = e
+
+            # Returns True as soon as stop() is called.
+            if self._stop.wait(self.interval.total_seconds()):
+                return
@@ -1,8 +1,11 @@
+# Binary search over the snapshot's time-sorted event arrays.
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 # Import Models.
 from models.reminder_event import ReminderEvent
 # Import Data.
+from data.epoch import datetime_to_epoch_us
 from data.medication_repository import MedicationRepository
 from data.schedule_repository import ScheduleRepository
 from data.intake_log_repository import IntakeLogRepository
@@ -10,6 +13,74 @@ from data.reminder_repository import ReminderRepository
 # Import Services.
 from services.schedule_engine import ScheduleEngine
 
+# Default windows used when a caller does not pass explicit bounds.
+# Overdue doses are only reported for the recent past, and upcoming ones
+# only for the near future, so a multi-year schedule costs the same as a
+# one-week one.
+DEFAULT_LOOKBACK = timedelta(days=1)
+DEFAULT_LOOKAHEAD = timedelta(days=7)
+# Reminder offsets are capped at 24 hours by ReminderValidator, so a dose
+# more than a day away can never be due yet.
+MAX_REMINDER_OFFSET = timedelta(minutes=1440)
+
+
+class ReminderSnapshot:
+    """
+    Every reminder event around one moment, computed once.
+    The categorized views are cheap filters over shared sorted arrays,
+    so a tick or render can ask for all of them without regenerating.
+    """
+
+    def __init__(self, now: datetime, events: List[ReminderEvent]):
+        """Index the events by reminder time and by scheduled time."""
+
+        self.now = now
+        self.events = events
+
+        # Untaken events ordered by when they should notify.
+        self._pending = sorted(
+            (e for e in events if not e.is_taken), key=lambda e: e.reminder_time
+        )
+        self._pending_times = [e.reminder_time for e in self._pending]
+        # Overdue events ordered by when the dose was due.
+        self._overdue = sorted(
+            (e for e in events if e.is_overdue), key=lambda e: e.schedule_time
+        )
+        # Filled on first use by next_for_medication.
+        self._next_by_medication: Optional[Dict[str, ReminderEvent]] = None
+
+    def upcoming(self) -> List[ReminderEvent]:
+        """Untaken reminders whose reminder_time is still in the future."""
+
+        return self._pending[bisect_right(self._pending_times, self.now):]
+
+    def due(self) -> List[ReminderEvent]:
+        """Untaken reminders that have fired but whose dose is not late yet."""
+
+        # A reminder fires at most MAX_REMINDER_OFFSET before its dose.
+        start = bisect_left(self._pending_times, self.now - MAX_REMINDER_OFFSET)
+        end = bisect_right(self._pending_times, self.now)
+        return [
+            e for e in self._pending[start:end]
+            if self.now <= e.schedule_time
+        ]
+
+    def overdue(self) -> List[ReminderEvent]:
+        """Doses whose scheduled time has passed without being taken."""
+
+        return list(self._overdue)
+
+    def next_for_medication(self, medication_id: str) -> Optional[ReminderEvent]:
+        """The earliest upcoming reminder for one medication."""
+
+        if self._next_by_medication is None:
+            self._next_by_medication = {}
+            # Upcoming is sorted, so the first hit per medication wins.
+            for e in self.upcoming():
+                self._next_by_medication.setdefault(e.medication_id, e)
+
+        return self._next_by_medication.get(medication_id)
+
 
 class ReminderService:
     """
@@ -31,11 +102,29 @@ class ReminderService:
         self.reminder_repo = reminder_repo
         self.schedule_engine = schedule_engine
 
-    def generate_events(self) -> List[ReminderEvent]:
-        """Generate all reminder events for all schedules."""
+    def generate_events(
+        self,
+        window_start: Optional[datetime] = None,
+        window_end: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> List[ReminderEvent]:
+        """
+        Generate reminder events for doses scheduled in
+        [window_start, window_end). Defaults to DEFAULT_LOOKBACK before
+        now through DEFAULT_LOOKAHEAD after it.
+        """
+
+        now = now or datetime.now()
+        if window_start is None:
+            window_start = now - DEFAULT_LOOKBACK
+        if window_end is None:
+            window_end = now + DEFAULT_LOOKAHEAD
 
         events = []
 
+        # One bulk query answers "taken?" for every dose in the window.
+        taken_index = self._build_taken_index(window_start, window_end)
+
         schedules = self.schedule_repo.get_all()
 
         for schedule in schedules:
@@ -45,10 +134,22 @@ class ReminderService:
             if not reminders:
                 continue
 
-            # Expand schedule into actual times
-            dose_times = self.schedule_engine.generate_dose_events(schedule)
+            # Expand only the part of the schedule inside the window.
+            dose_times = self.schedule_engine.iter_dose_events(
+                schedule, window_start, window_end
+            )
 
             for scheduled_time in dose_times:
+                # Check if taken
+                taken = self._is_taken(
+                    taken_index,
+                    medication_id=schedule.medication_id,
+                    scheduled_time=scheduled_time
+                )
+
+                # Determine overdue
+                overdue = (scheduled_time < now) and not taken
+
                 for reminder in reminders:
                     if not reminder.enabled:
                         continue
@@ -57,16 +158,6 @@ class ReminderService:
                         minutes=reminder.reminder_offset_minutes
                     )
 
-                    # Check if taken
-                    taken = self._is_taken(
-                        medication_id=schedule.medication_id,
-                        scheduled_time=scheduled_time
-                    )
-
-                    # Determine overdue
-                    now = datetime.now()
-                    overdue = (scheduled_time < now) and not taken
-
                     events.append(
                         ReminderEvent(
                             medication_id=schedule.medication_id,
@@ -81,52 +172,81 @@ class ReminderService:
         return events
 
     
-    # Helper method.
-    def _is_taken(self, medication_id: str, scheduled_time: datetime) -> bool:
+    # Helper methods.
+    def _build_taken_index(
+        self, window_start: datetime, window_end: datetime
+    ) -> Set[Tuple[str, int]]:
+        """Return the (medication_id, scheduled_us) pairs logged as taken."""
+
+        return self.intake_repo.get_taken_keys(window_start, window_end)
+
+    @staticmethod
+    def _is_taken(
+        taken_index: Set[Tuple[str, int]],
+        medication_id: str,
+        scheduled_time: datetime,
+    ) -> bool:
         """Return True if an intake log exists for this medication/time."""
 
-        logs = self.intake_repo.get_by_medication(medication_id)
-        for log in logs:
-            if log.scheduled_time == scheduled_time:
-                return True
-        return False
+        return (medication_id, datetime_to_epoch_us(scheduled_time)) in taken_index
+
+
+    def snapshot(
+        self,
+        now: Optional[datetime] = None,
+        lookback: timedelta = DEFAULT_LOOKBACK,
+        lookahead: timedelta = DEFAULT_LOOKAHEAD,
+    ) -> ReminderSnapshot:
+        """
+        Generate events once for [now - lookback, now + lookahead).
+        Pass the result to the filtered views below to reuse it.
+        """
 
+        now = now or datetime.now()
+        events = self.generate_events(now - lookback, now + lookahead, now=now)
+        return ReminderSnapshot(now, events)
 
-    # Filtered views
-    def get_upcoming(self) -> List[ReminderEvent]:
+    # Filtered views. Without a snapshot each builds one over just the
+    # window it needs, so every view goes through the same filters.
+    def get_upcoming(
+        self, snapshot: Optional[ReminderSnapshot] = None
+    ) -> List[ReminderEvent]:
         """Return reminders whose reminder_time is in the future."""
 
-        now = datetime.now()
-        return [
-            e for e in self.generate_events()
-            if e.reminder_time > now and not e.is_taken
-        ]
+        if snapshot is None:
+            snapshot = self.snapshot(lookback=timedelta(0))
+        return snapshot.upcoming()
 
-    def get_due(self) -> List[ReminderEvent]:
+    def get_due(
+        self, snapshot: Optional[ReminderSnapshot] = None
+    ) -> List[ReminderEvent]:
         """Return reminders whose reminder_time 
         has passed but scheduled_time has not."""
 
-        now = datetime.now()
-        return [
-            e for e in self.generate_events()
-            if e.reminder_time <= now <= e.schedule_time and not e.is_taken
-        ]
+        if snapshot is None:
+            snapshot = self.snapshot(
+                lookback=timedelta(0), lookahead=MAX_REMINDER_OFFSET
+            )
+        return snapshot.due()
 
-    def get_overdue(self) -> List[ReminderEvent]:
+    def get_overdue(
+        self, snapshot: Optional[ReminderSnapshot] = None
+    ) -> List[ReminderEvent]:
         """
         Return reminders where the scheduled time has passed 
         and the dose was not taken.
         """
-        return [e for e in self.generate_events() if e.is_overdue]
+
+        if snapshot is None:
+            snapshot = self.snapshot(lookahead=timedelta(0))
+        return snapshot.overdue()
     
 
-    def get_next_for_medication(self, medication_id: str):
+    def get_next_for_medication(
+        self, medication_id: str, snapshot: Optional[ReminderSnapshot] = None
+    ):
         """Return the next upcoming reminder for a specific medication."""
-        
-        upcoming = [
-            e for e in self.get_upcoming()
-            if e.medication_id == medication_id
-        ]
-        
-        # Select the next schedule reminder based on the reminder_time.
-        return min(upcoming, key=lambda e: e.reminder_time)if upcoming else None
+
+        if snapshot is None:
+            snapshot = self.snapshot(lookback=timedelta(0))
+        return snapshot.next_for_medication(medication_id)
@@ -1,5 +1,7 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+# Binary search over a schedule's sorted times of day.
+from bisect import bisect_right
+from datetime import datetime, timedelta, time
+from typing import Iterator, List, Optional, Set
 # Import Data.
 from data.medication_repository import MedicationRepository
 from data.schedule_repository import ScheduleRepository
@@ -7,6 +9,8 @@ from data.schedule_repository import ScheduleRepository
 from models.schedule import Schedule
 from models.medication import Medication
 
+# How far back get_overdue_doses looks unless told otherwise.
+DEFAULT_OVERDUE_LOOKBACK = timedelta(days=1)
 
 
 class ScheduleEngine:
@@ -21,23 +25,122 @@ class ScheduleEngine:
 
     def generate_dose_events(self, schedule: Schedule) -> List[datetime]:
         """Generate all dose times between start_date and end_date.
-        supports frequencies: Daily or specific times per day."""
+        supports frequencies: Daily or specific times per day.
+        Open-ended schedules return an empty list; use iter_dose_events
+        with a window for those."""
 
         if schedule.end_date is None:
             return []
 
-        dose_times = []
+        return list(self.iter_dose_events(schedule))
+
+    def iter_dose_events(
+        self,
+        schedule: Schedule,
+        window_start: Optional[datetime] = None,
+        window_end: Optional[datetime] = None,
+    ) -> Iterator[datetime]:
+        """
+        Lazily yield dose times in [window_start, window_end), in order.
+        Starts at the first day of the window instead of start_date, so the
+        cost depends on the window size, not the schedule's lifetime.
+        A missing bound falls back to the schedule's own start/end date;
+        with neither an end_date nor a window_end the generator is unbounded.
+        """
+
+        times = sorted(schedule.times)
+        weekdays = self.dose_weekdays(schedule)
+        # No valid weekday means no doses at all (and no endless loop).
+        if weekdays is not None and not weekdays:
+            return
 
         current = schedule.start_date
-        end = schedule.end_date
-
-        while current <= end:
-            for dt in schedule.times:
-                dose_dt = datetime.combine(current, dt)
-                dose_times.append(dose_dt)
+        if window_start is not None and window_start.date() > current:
+            current = window_start.date()
+
+        last = schedule.end_date
+        if window_end is not None and (last is None or window_end.date() < last):
+            last = window_end.date()
+
+        while last is None or current <= last:
+            if weekdays is None or current.weekday() in weekdays:
+                for t in times:
+                    dose_dt = datetime.combine(current, t)
+                    if window_start is not None and dose_dt < window_start:
+                        continue
+                    if window_end is not None and dose_dt >= window_end:
+                        return
+                    yield dose_dt
             current += timedelta(days=1)
 
-        return sorted(dose_times)
+    @staticmethod
+    def dose_weekdays(schedule: Schedule) -> Optional[Set[int]]:
+        """
+        Return the weekdays (0=Mon, 6=Sun, as in ScheduleValidator) a
+        schedule doses on, or None when it doses every day.
+        """
+
+        if schedule.frequency == "daily" or not schedule.days_of_week:
+            return None
+        return {d for d in schedule.days_of_week if d in range(7)}
+
+    def next_dose_after(
+        self, schedule: Schedule, after: datetime
+    ) -> Optional[datetime]:
+        """
+        Return the first dose strictly after the given moment, or None.
+        Computed directly from start_date, times, days_of_week and end_date,
+        so the cost is O(times per day) however long the schedule runs.
+        """
+
+        if not schedule.times:
+            return None
+
+        times = sorted(schedule.times)
+        weekdays = self.dose_weekdays(schedule)
+        if weekdays is not None and not weekdays:
+            return None
+
+        day = schedule.start_date
+        index = 0
+
+        if after.date() >= day:
+            day = after.date()
+            # First time of day later than `after` on that same day.
+            index = bisect_right(times, after.time())
+            if index == len(times):
+                day += timedelta(days=1)
+                index = 0
+
+        # Jump forward to the next weekday the schedule doses on.
+        if weekdays is not None and day.weekday() not in weekdays:
+            day += timedelta(
+                days=min((w - day.weekday()) % 7 for w in weekdays)
+            )
+            index = 0
+
+        if schedule.end_date is not None and day > schedule.end_date:
+            return None
+
+        return datetime.combine(day, times[index])
+
+    def next_dose_for_medication(
+        self, medication: Medication, after: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """
+        Return the next dose across a medication's loaded schedules,
+        without touching the database.
+        """
+
+        after = after or datetime.now()
+        upcoming = [
+            dt for dt in (
+                self.next_dose_after(schedule, after)
+                for schedule in medication.schedule
+            )
+            if dt is not None
+        ]
+        return min(upcoming) if upcoming else None
 
     def get_next_dose(self, medication_id: int) -> Optional[datetime]:
         """Returns the next upcoming dose datetime for a given medication."""
@@ -48,10 +151,9 @@ class ScheduleEngine:
         upcoming = []
 
         for schedule in schedules:
-            dose_times = self.generate_dose_events(schedule)
-            for dt in dose_times:
-                if dt > now:
-                    upcoming.append(dt)
+            next_dt = self.next_dose_after(schedule, now)
+            if next_dt is not None:
+                upcoming.append(next_dt)
 
         return min(upcoming) if upcoming else None
 
@@ -59,41 +161,58 @@ class ScheduleEngine:
         """Returns a list of all doses scheduled for today."""
 
         today = datetime.now().date()
+        day_start = datetime.combine(today, time.min)
+        day_end = day_start + timedelta(days=1)
         results = []
 
-        medications = self.medication_repo.get_all()
+        # SQL picks only the schedules that dose today (weekday bitmask
+        # and date range), then their medications in one query.
+        schedules = self.schedule_repo.get_for_day(today)
+        medications = {
+            med.id: med
+            for med in self.medication_repo.get_many(
+                {s.medication_id for s in schedules}, with_schedules=False
+            )
+        }
 
-        for med in medications:
-            # Skip medications that have not been saved yet.
-            if med.id is None:
+        for schedule in schedules:
+            med = medications.get(schedule.medication_id)
+            # Skip schedules whose medication is gone.
+            if med is None:
                 continue
 
-            schedules = self.schedule_repo.get_by_medication(med.id)
-            for schedule in schedules:
-                dose_times = self.generate_dose_events(schedule)
-                for dt in dose_times:
-                    if dt.date() == today:
-                        results.append((med, dt))
+            for dt in self.iter_dose_events(schedule, day_start, day_end):
+                results.append((med, dt))
 
         return sorted(results, key=lambda x: x[1])
     
-    def get_overdue_doses(self) -> List[tuple]:
-        """Returns a list of doses that should have occurred already."""
+    def get_overdue_doses(
+        self,
+        since: Optional[datetime] = None,
+        lookback: timedelta = DEFAULT_OVERDUE_LOOKBACK,
+    ) -> List[tuple]:
+        """
+        Returns a list of doses that should have occurred already, in
+        [since, now). since defaults to now - lookback, which is one day
+        (DEFAULT_OVERDUE_LOOKBACK): older missed doses are not reported
+        unless a wider lookback or an earlier since is passed. That keeps
+        a schedule that started years ago as cheap as one from today.
+        """
 
         now = datetime.now()
+        if since is None:
+            since = now - lookback
         results = []
 
+        # get_all loads every medication's schedules in one batched query.
         medications = self.medication_repo.get_all()
 
         for med in medications:
             if med.id is None:
                 continue
-            
-            schedules = self.schedule_repo.get_by_medication(med.id)
-            for schedule in schedules:
-                dose_events = self.generate_dose_events(schedule)
-                for dt in dose_events:
-                    if dt < now:
-                        results.append((med, dt))
+
+            for schedule in med.schedule:
+                for dt in self.iter_dose_events(schedule, since, now):
+                    results.append((med, dt))
 
         return results
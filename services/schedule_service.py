@@ -1,11 +1,29 @@
 from datetime import datetime, timedelta
 # Used to annotate functions returning a listof items.
-from typing import List
+from typing import Dict, List, Optional, Tuple
 # Import Data.
+from data.change_feed import Change, ChangeFeed
 from data.reminder_repository import ReminderRepository
 from data.schedule_repository import ScheduleRepository
 # Import Models.
 from models.reminder import Reminder
+from models.schedule import Schedule
+# Import Services.
+from services.schedule_engine import ScheduleEngine
+
+# Minutes in a day and in a week, for minute-of-week arithmetic.
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Entities whose writes change which reminders fire when. "database"
+# marks a write made outside the repositories (see DataVersionMonitor).
+_INDEXED_ENTITIES = {"schedule", "reminder", "medication", "database"}
+
+
+def minute_of_week(moment: datetime) -> int:
+    """Minutes since Monday 00:00 (weekday 0, as in ScheduleValidator)."""
+
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
 
 
 class ScheduleService:
@@ -14,60 +32,105 @@ class ScheduleService:
     are due at the current moment.
     """
 
-    def __init__(self, reminder_repo: ReminderRepository, schedule_repo: ScheduleRepository):
+    def __init__(
+        self,
+        reminder_repo: ReminderRepository,
+        schedule_repo: ScheduleRepository,
+        change_feed: Optional[ChangeFeed] = None,
+    ):
         """Inject reminders and scheduling files for operations."""
 
         self.reminder_repo = reminder_repo
         self.schedule_repo = schedule_repo
 
+        # Minute-of-week -> (reminder, schedule) pairs that fire then.
+        # None means it must be (re)built before the next lookup.
+        self._index: Optional[Dict[int, List[Tuple[Reminder, Schedule]]]] = None
+        # Bumped by invalidate(); an index built across a bump is not kept.
+        self._version = 0
+
+        # Without a feed we cannot see writes, so rebuild on every call.
+        self._always_rebuild = change_feed is None
+        if change_feed is not None:
+            change_feed.subscribe(self._on_change)
+
+    def invalidate(self) -> None:
+        """Drop the index; the next lookup rebuilds it."""
+
+        self._version += 1
+        self._index = None
+
     def get_due_reminders(self, now: datetime) -> List[Reminder]:
         """Compute which reminder are due based on the provided timestamp."""
 
-        # A list to collect due reminders.
+        # The change feed may clear self._index from another thread at any
+        # point, so only the local reference is used below.
+        index = self._index
+        if index is None or self._always_rebuild:
+            version = self._version
+            index = self._build_index()
+            if version == self._version:
+                self._index = index
+
+        # A collection of due reminders.
         due: List[Reminder] = []
+        # The minute being checked, without seconds.
+        current = now.replace(second=0, microsecond=0)
+
+        for reminder, schedule in index.get(minute_of_week(current), []):
+            # The dose this reminder announces may fall on the next day.
+            dose_date = (
+                current + timedelta(minutes=reminder.reminder_offset_minutes)
+            ).date()
+
+            # Check date range
+            if schedule.start_date > dose_date:
+                continue
+            if schedule.end_date and schedule.end_date < dose_date:
+                continue
+
+            # Collect reminder that are ready to fire.
+            due.append(reminder)
+
+        return due
+
+    # Helper methods.
+    def _on_change(self, change: Change) -> None:
+        """Change feed callback: invalidate on relevant writes only."""
+
+        if change.entity in _INDEXED_ENTITIES:
+            self.invalidate()
+
+    def _build_index(self) -> Dict[int, List[Tuple[Reminder, Schedule]]]:
+        """
+        Map every minute of the week to the reminders that fire in it.
+        Keys are computed from the dose's weekday and time minus the
+        reminder offset, so offsets crossing midnight land on the right day.
+        """
+
+        index: Dict[int, List[Tuple[Reminder, Schedule]]] = {}
 
-        #Fetch all reminders.
-        reminders = self.reminder_repo.get_all()
         # Build a lookup table of schedules.
         schedules = {s.id: s for s in self.schedule_repo.get_all()}
 
-        # Produce the current time in specified format for comparison with reminders.
-        current_time_str = now.strftime("%H:%M")
-        # "Mon", "Tue", etc.
-        current_day = now.strftime("%a")  
-        
-        # Iterate through all reminders.
-        for reminder in reminders:
+        for reminder in self.reminder_repo.get_all():
             # Bypass reminders that are not active.
             if not reminder.enabled:
                 continue
-            
+
             # Lookup schedule for this reminder.
             schedule = schedules.get(reminder.scheduled_id)
             # Ignore reminders that are inactive or missing schedules.
             if not schedule or not schedule.is_active:
                 continue
 
-            # Check date range
-            if schedule.start_date > now.date():
-                continue
-            if schedule.end_date and schedule.end_date < now.date():
-                continue
+            weekdays = ScheduleEngine.dose_weekdays(schedule)
+            days = range(7) if weekdays is None else sorted(weekdays)
 
-            # Check day of week
-            if current_day not in schedule.days_of_week:
-                continue
+            for day in days:
+                for t in schedule.times:
+                    dose_minute = day * MINUTES_PER_DAY + t.hour * 60 + t.minute
+                    key = (dose_minute - reminder.reminder_offset_minutes) % MINUTES_PER_WEEK
+                    index.setdefault(key, []).append((reminder, schedule))
 
-            # Check each scheduled time
-            for t in schedule.times:
-                scheduled_dt = datetime.combine(now.date(), t)
-
-                # Apply reminder offset
-                reminder_dt = scheduled_dt - timedelta(minutes=reminder.reminder_offset_minutes)
-                
-                # Compare scheduled reminder time with current timestamp.
-                if reminder_dt.strftime("%H:%M") == current_time_str:
-                    # Collect reminder that are ready to fire.
-                    due.append(reminder)
-
-        return due
+        return index
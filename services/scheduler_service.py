@@ -1,38 +1,128 @@
 # Used to run the scheduler in the background.
 import threading
-# Provide the sleep() function for the minute by minute loop.
-import time
-from datetime import datetime
+# Priority queue of upcoming reminder fire times.
+import heapq
+# Tie-breaker so heap entries never compare their payloads.
+import itertools
+# Reports passes that failed, without ending the thread.
+import logging
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
 
 # Imports from Data.
-from data.database import get_connection
+from data.database import get_connection, read_snapshot
+from data.change_feed import Change, ChangeFeed
+from data.errors import NotFoundError
 from data.schedule_repository import ScheduleRepository
 from data.reminder_repository import ReminderRepository
 from data.medication_repository import MedicationRepository
 from data.intake_log_repository import IntakeLogRepository
+from data.reminder_event_repository import (
+    ReminderEventRepository, ReminderEventRepositoryProtocol
+)
+from data.write_queue import QueuedRepository, WriteQueue
+
+# Imports from Models.
+from models.reminder import Reminder
+from models.reminder_event import OPEN_STATES, SNOOZED, ReminderEvent
+from models.schedule import Schedule
 
 # Imports from services.
-from services.reminders import ReminderService
 from services.notification_service import NotificationService
 from services.schedule_engine import ScheduleEngine
 
+# Longest single sleep. Guards against wall-clock jumps (suspend/resume,
+# DST, manual changes) without waking on an otherwise idle day.
+MAX_SLEEP = timedelta(hours=1)
+# Wait before trying again after a pass failed.
+ERROR_RETRY = timedelta(seconds=30)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class _FireEntry:
+    """One pending reminder in the scheduler's heap."""
+
+    # When the notification should be shown.
+    fire_time: datetime
+    # Insertion order; keeps heap ordering stable for equal fire times.
+    seq: int
+    # Everything below is payload and never compared.
+    schedule_id: str = field(compare=False)
+    # Schedule generation the entry was built from; stale ones are skipped.
+    generation: int = field(compare=False)
+    reminder: Reminder = field(compare=False)
+    dose_time: datetime = field(compare=False)
+    # Snoozed re-fires do not queue the following dose (the original did).
+    snoozed: bool = field(default=False, compare=False)
+
 
 class SchedulerService:
     """
-    Background scheduler that checks for due reminders every minute
-    and triggers notifications.
+    Background scheduler that sleeps until the next reminder is due,
+    fires it, and wakes early whenever schedules, reminders or intake
+    logs change. Firing state lives in the reminder_events table, so
+    each reminder fires exactly once even across restarts.
     """
 
-    def __init__(self, notifier: NotificationService):
+    def __init__(
+        self,
+        notifier: NotificationService,
+        change_feed: Optional[ChangeFeed] = None,
+        connection_factory: Callable = get_connection,
+        clock: Callable[[], datetime] = datetime.now,
+        read_connection_factory: Optional[Callable] = None,
+        writer: Optional[WriteQueue] = None,
+    ):
         """Set up the object with the notifier used to send notifications."""
         
         # Store notification service.
         self.notifier = notifier
+        # Opens the scheduler thread's own connection.
+        self.connection_factory = connection_factory
+        # Optionally opens a separate read-only connection for everything
+        # except reminder_events, read as one snapshot per pass.
+        self.read_connection_factory = read_connection_factory
+        # Optional single writer that reminder_events writes are sent to,
+        # so they never contend with UI saves for the write lock.
+        self.writer = writer
+        # Source of "now"; injectable so tests can control time.
+        self.clock = clock
         # Engine starts inactive. (False)
         self.running = False
         # Background thread placeholder.
         self.thread = None
 
+        # Set whenever there is something to do before the next fire time.
+        self._wake = threading.Event()
+        # Protects the dirty sets, which the writing threads fill in.
+        self._lock = threading.Lock()
+        self._rebuild_everything = True
+        self._dirty_schedules: Set[str] = set()
+        self._dirty_medications: Set[str] = set()
+        self._dirty_reminders: Set[str] = set()
+
+        # Scheduler-thread state.
+        self._heap: List[_FireEntry] = []
+        self._seq = itertools.count()
+        self._generations: Dict[str, int] = {}
+        # Latest copy of every schedule with entries in the heap.
+        self._schedules: Dict[str, Schedule] = {}
+        self._reminder_schedule: Dict[str, str] = {}
+        # Events queued since the last flush to the reminder_events table.
+        self._new_events: List[ReminderEvent] = []
+        # "now" of the previous pass; doses due since then are fired
+        # before they can be settled.
+        self._last_pass: Optional[datetime] = None
+        # Last exception a pass raised; None once a pass succeeds again.
+        self.last_error: Optional[Exception] = None
+
+        if change_feed is not None:
+            change_feed.subscribe(self._on_change)
+
     def start(self):
         """Starts the background scheduler loop."""
         
@@ -50,18 +140,57 @@ class SchedulerService:
         """Stops the scheduler loop."""
 
         self.running = False
+        self._wake.set()
+
+    def wake(self):
+        """Ask the loop to re-check everything as soon as possible."""
+
+        with self._lock:
+            self._rebuild_everything = True
+        self._wake.set()
+
+    def _on_change(self, change: Change) -> None:
+        """Change feed callback: mark what needs rebuilding and wake up."""
+
+        with self._lock:
+            if change.entity == "schedule":
+                if change.entity_id is not None:
+                    self._dirty_schedules.add(change.entity_id)
+                elif change.medication_id is not None:
+                    self._dirty_medications.add(change.medication_id)
+            elif (
+                change.entity in ("reminder", "reminder_event")
+                and change.entity_id is not None
+            ):
+                self._dirty_reminders.add(change.entity_id)
+            elif change.entity == "medication" and change.entity_id is not None:
+                self._dirty_medications.add(change.entity_id)
+            elif change.entity == "database":
+                # Written by another connection or process; the scheduler
+                # cannot tell what changed, so it reloads everything.
+                self._rebuild_everything = True
+            # Intake logs only need a wake-up: "taken" is checked at fire time.
+        self._wake.set()
 
     def _run_loop(self):
-        """Continuously check for and handle due schedules."""
+        """Sleep until the next fire time or a change, then handle it."""
 
         # All DB objects are created Inside the scheduler thread.
-        conn = get_connection()
+        conn = self.connection_factory()
+        reader = None
+        if self.read_connection_factory is not None:
+            reader = self.read_connection_factory()
 
-        # Thread safe repositories.
-        schedule_repo = ScheduleRepository(conn)
-        medication_repo = MedicationRepository(conn, schedule_repo)
-        reminder_repo = ReminderRepository(conn)
-        intake_repo = IntakeLogRepository(conn)
+        # Thread safe repositories. Only reminder events are written.
+        read_conn = reader if reader is not None else conn
+        schedule_repo = ScheduleRepository(read_conn)
+        medication_repo = MedicationRepository(read_conn, schedule_repo)
+        reminder_repo = ReminderRepository(read_conn)
+        intake_repo = IntakeLogRepository(read_conn)
+        event_repo: Any = ReminderEventRepository(conn)
+        if self.writer is not None:
+            # Writes go through the queue; reads stay on this thread.
+            event_repo = QueuedRepository(event_repo, self.writer)
 
         # Thread safe schedule engine.
         schedule_engine = ScheduleEngine(
@@ -69,28 +198,271 @@ class SchedulerService:
             schedule_repo=schedule_repo
         )
 
-        # Thread safe reminder service.
-        reminder_service = ReminderService(
-            schedule_repo=schedule_repo,
-            reminder_repo=reminder_repo,
-            medication_repo=medication_repo,
-            intake_repo=intake_repo,
-            schedule_engine=schedule_engine
+        self._bind(
+            schedule_repo, reminder_repo, intake_repo, event_repo, schedule_engine
         )
 
         while self.running:
-            
-            # ReminderService already uses datetime.now() internally.
-            due_events = reminder_service.get_due()
+            # Clear first, so a change arriving mid-pass wakes the next wait.
+            self._wake.clear()
+            try:
+                # One snapshot per pass, released before sleeping.
+                with read_snapshot(reader) if reader is not None else nullcontext():
+                    next_fire = self._run_pending()
+                self.last_error = None
+            except Exception as e:
+                # Keep the thread alive so reminders carry on. The failure
+                # may have left the heap half updated, so the next pass
+                # rebuilds it from the database.
+                logger.exception("Scheduler pass failed; retrying.")
+                self.last_error = e
+                with self._lock:
+                    self._rebuild_everything = True
+                next_fire = self.clock() + ERROR_RETRY
+
+            timeout = MAX_SLEEP
+            if next_fire is not None:
+                timeout = min(MAX_SLEEP, max(next_fire - self.clock(), timedelta(0)))
+            self._wake.wait(timeout.total_seconds())
+
+    def _bind(
+        self,
+        schedule_repo: ScheduleRepository,
+        reminder_repo: ReminderRepository,
+        intake_repo: IntakeLogRepository,
+        event_repo: ReminderEventRepositoryProtocol,
+        schedule_engine: ScheduleEngine,
+    ) -> None:
+        """Attach the repositories the loop reads from."""
+
+        self.schedule_repo = schedule_repo
+        self.reminder_repo = reminder_repo
+        self.intake_repo = intake_repo
+        self.event_repo = event_repo
+        self.schedule_engine = schedule_engine
+
+    def _run_pending(self) -> Optional[datetime]:
+        """
+        Apply pending rebuilds, fire every reminder that is due and
+        return the next fire time (None if nothing is scheduled).
+        """
+
+        self._apply_changes()
+        self._flush_new_events()
+
+        now = self.clock()
+        # Settle rows whose dose has passed (including any left over from
+        # before a restart) so they are never fired late. Doses that fell
+        # due since the last pass are left: their reminders fire below.
+        self.event_repo.close_past(now, due_since=self._last_pass)
+
+        while self._heap and self._heap[0].fire_time <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_stale(entry):
+                continue  # Superseded by a rebuild of that schedule.
+
+            try:
+                self._fire(entry, now)
+            except Exception:
+                # One bad reminder (say, its medication was deleted since
+                # the last pass) must not hold back the others; its next
+                # dose is still queued below.
+                logger.exception("Failed to fire reminder %s.", entry.reminder.id)
+            if not entry.snoozed:
+                self._push_next(entry.schedule_id, entry.reminder, entry.dose_time)
+
+        self._flush_new_events()
+        self._last_pass = now
+
+        # Never sleep towards an entry that will be skipped anyway.
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+        return self._heap[0].fire_time if self._heap else None
+
+    def _is_stale(self, entry: _FireEntry) -> bool:
+        """True if the entry's schedule was rebuilt or removed since."""
+
+        return entry.generation != self._generations.get(entry.schedule_id)
+
+    def _apply_changes(self) -> None:
+        """Rebuild heap entries for the schedules touched since last pass."""
+
+        with self._lock:
+            everything = self._rebuild_everything
+            schedule_ids = set(self._dirty_schedules)
+            medication_ids = set(self._dirty_medications)
+            reminder_ids = set(self._dirty_reminders)
+            self._rebuild_everything = False
+            self._dirty_schedules.clear()
+            self._dirty_medications.clear()
+            self._dirty_reminders.clear()
+
+        if everything:
+            self._rebuild_all()
+            return
+
+        for medication_id in medication_ids:
+            schedule_ids.update(
+                sid for sid, s in self._schedules.items()
+                if s.medication_id == medication_id
+            )
+            schedule_ids.update(
+                s.id for s in self.schedule_repo.get_by_medication(medication_id)
+            )
+
+        for reminder_id in reminder_ids:
+            if reminder_id in self._reminder_schedule:
+                schedule_ids.add(self._reminder_schedule[reminder_id])
+            try:
+                schedule_ids.add(self.reminder_repo.get_by_id(reminder_id).scheduled_id)
+            except NotFoundError:
+                pass  # Deleted; its old schedule (if known) is rebuilt above.
 
-            
-            # Process each scheduled due event.
-            for event in due_events:
+        for schedule_id in schedule_ids:
+            self._rebuild_schedule(schedule_id)
 
-                # Trigger UI notifications
-                self.notifier.send_notification(event)
+    def _rebuild_all(self) -> None:
+        """Drop every heap entry and recompute from the database."""
 
-            # Sleep until the next minute
-            time.sleep(60)
+        self._heap = []
+        self._schedules.clear()
+        self._reminder_schedule.clear()
+        for schedule_id in list(self._generations):
+            self._generations[schedule_id] += 1
 
-            
+        reminders: Dict[str, List[Reminder]] = {}
+        for reminder in self.reminder_repo.get_all():
+            reminders.setdefault(reminder.scheduled_id, []).append(reminder)
+
+        for schedule in self.schedule_repo.get_all():
+            self._load_schedule(schedule, reminders.get(schedule.id, []))
+
+    def _rebuild_schedule(self, schedule_id: str) -> None:
+        """Invalidate one schedule's entries and recompute them."""
+
+        # Entries carrying the old generation are skipped when popped.
+        self._generations[schedule_id] = self._generations.get(schedule_id, 0) + 1
+        self._schedules.pop(schedule_id, None)
+        for reminder_id in [
+            rid for rid, sid in self._reminder_schedule.items() if sid == schedule_id
+        ]:
+            del self._reminder_schedule[reminder_id]
+
+        try:
+            schedule = self.schedule_repo.get_by_id(schedule_id)
+        except NotFoundError:
+            self._generations.pop(schedule_id, None)
+            return
+
+        self._load_schedule(schedule, self.reminder_repo.get_by_schedule(schedule_id))
+
+    def _load_schedule(self, schedule: Schedule, reminders: Iterable[Reminder]) -> None:
+        """Push the next fire time of each enabled reminder of a schedule."""
+
+        self._generations.setdefault(schedule.id, 0)
+        self._schedules[schedule.id] = schedule
+
+        if not schedule.is_active:
+            return
+
+        now = self.clock()
+        by_id: Dict[str, Reminder] = {}
+        for reminder in reminders:
+            self._reminder_schedule[reminder.id] = schedule.id
+            if reminder.enabled:
+                by_id[reminder.id] = reminder
+                # Start from the first dose after now. Its reminder may
+                # already be due, in which case it fires on this pass.
+                self._push_next(schedule.id, reminder, now)
+
+        # Re-arm snoozed reminders at their snooze time.
+        for event in self.event_repo.get_open_for_schedule(schedule.id):
+            if event.state == SNOOZED and event.reminder_id in by_id:
+                heapq.heappush(self._heap, _FireEntry(
+                    fire_time=event.reminder_time,
+                    seq=next(self._seq),
+                    schedule_id=schedule.id,
+                    generation=self._generations[schedule.id],
+                    reminder=by_id[event.reminder_id],
+                    dose_time=event.schedule_time,
+                    snoozed=True,
+                ))
+
+    def _push_next(self, schedule_id: str, reminder: Reminder, after: datetime) -> None:
+        """Queue the reminder for the first dose strictly after `after`."""
+
+        schedule = self._schedules.get(schedule_id)
+        if schedule is None:
+            return
+
+        dose_time = self.schedule_engine.next_dose_after(schedule, after)
+        if dose_time is None:
+            return
+
+        fire_time = dose_time - timedelta(minutes=reminder.reminder_offset_minutes)
+        heapq.heappush(
+            self._heap,
+            _FireEntry(
+                fire_time=fire_time,
+                seq=next(self._seq),
+                schedule_id=schedule_id,
+                generation=self._generations[schedule_id],
+                reminder=reminder,
+                dose_time=dose_time,
+            ),
+        )
+        # Persisted as pending on the next flush.
+        self._new_events.append(
+            self._to_event(schedule, reminder, dose_time, fire_time)
+        )
+
+    def _flush_new_events(self) -> None:
+        """Record queued events as pending rows in one batch."""
+
+        if self._new_events:
+            events, self._new_events = self._new_events, []
+            self.event_repo.ensure_pending(events)
+
+    def _fire(self, entry: _FireEntry, now: datetime) -> None:
+        """Show one reminder unless its persisted state says otherwise."""
+
+        schedule = self._schedules[entry.schedule_id]
+        event = self._to_event(
+            schedule, entry.reminder, entry.dose_time, entry.fire_time
+        )
+
+        stored = self.event_repo.get(
+            entry.schedule_id, entry.reminder.id, entry.dose_time
+        )
+        if stored is not None:
+            # Already fired, acknowledged or settled (possibly before a restart).
+            if stored.state not in OPEN_STATES:
+                return
+            # Snoozed to a later time; that entry will fire instead.
+            if stored.state == SNOOZED and stored.reminder_time > now:
+                return
+
+        if self.intake_repo.is_taken(schedule.medication_id, entry.dose_time):
+            self.event_repo.acknowledge(event)
+            return
+
+        # Trigger UI notifications
+        self.notifier.send_notification(event)
+        self.event_repo.mark_fired(event)
+
+    @staticmethod
+    def _to_event(
+        schedule: Schedule, reminder: Reminder, dose_time: datetime, fire_time: datetime
+    ) -> ReminderEvent:
+        """Build the runtime event for one reminder of one dose."""
+
+        return ReminderEvent(
+            medication_id=schedule.medication_id,
+            schedule_id=schedule.id,
+            schedule_time=dose_time,
+            reminder_time=fire_time,
+            is_taken=False,
+            is_overdue=False,
+            reminder_id=reminder.id,
+        )
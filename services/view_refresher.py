@@ -0,0 +1,111 @@
+# Used to refresh the open view in the background.
+import threading
+from datetime import timedelta
+from typing import Callable, Iterable, Optional
+
+# Imports from Data.
+from data.change_feed import Change, ChangeFeed
+
+# Quiet period after a change before re-rendering, so a burst of writes
+# (a bulk save, a medication delete cascading) causes one refresh.
+DEFAULT_DEBOUNCE = timedelta(milliseconds=250)
+
+
+class ViewRefresher:
+    """
+    Re-renders the open view when the data it shows changes, instead of
+    views rescanning everything on every navigation.
+
+    The router calls showing() with the entities a view displays. Forms
+    pass none, so a refresh never wipes out what the user is typing.
+    Rendering happens on the refresher's own thread, never inside the
+    change feed callback.
+    """
+
+    def __init__(
+        self,
+        change_feed: ChangeFeed,
+        render: Callable[[Callable], None],
+        debounce: timedelta = DEFAULT_DEBOUNCE,
+    ):
+        """Set up the feed to listen to and how to re-render a view."""
+
+        # Called with the open view function to draw it again.
+        self.render = render
+        self.debounce = debounce
+        # Worker state.
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # The open view, what it displays, and whether that changed.
+        self._view: Optional[Callable] = None
+        self._watches: frozenset = frozenset()
+        self._dirty = False
+
+        change_feed.subscribe(self._on_change)
+
+    def showing(self, view_func: Callable, watches: Iterable[str] = ()) -> None:
+        """Record the view the router just rendered and what it displays."""
+
+        with self._lock:
+            self._view = view_func
+            self._watches = frozenset(watches)
+            # Freshly rendered, so nothing is pending for it.
+            self._dirty = False
+
+    def refresh_pending(self) -> bool:
+        """Re-render the open view now if it is stale; True if it was."""
+
+        with self._lock:
+            if not self._dirty or self._view is None:
+                return False
+            view, self._dirty = self._view, False
+
+        self.render(view)
+        return True
+
+    def start(self) -> None:
+        """Refresh stale views in a daemon thread."""
+
+        # Prevent duplicate worker threads.
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background loop."""
+
+        self.running = False
+        self._stop.set()
+        self._wake.set()
+
+    def _on_change(self, change: Change) -> None:
+        """Change feed callback: mark the open view stale if it shows this."""
+
+        with self._lock:
+            if not self._watches:
+                return
+            if change.entity not in self._watches and change.entity != "database":
+                return
+            self._dirty = True
+        self._wake.set()
+
+    def _run_loop(self) -> None:
+        """Wait for a change, let the burst settle, then re-render."""
+
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Returns True as soon as stop() is called.
+            if self._stop.wait(self.debounce.total_seconds()):
+                return
+            try:
+                self.refresh_pending()
+            except Exception:
+                # A failed redraw must not end the loop; the next change retries.
+                continue
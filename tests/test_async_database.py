@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from data.async_database import AsyncDatabase
+from data.database import Database
+from models.medication import Medication
+
+# How long the competing connection holds the write lock.
+LOCK_HOLD = 0.3
+# Loop tick used to measure how responsive the UI loop stays.
+TICK = 0.005
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def adb(db):
+    facade = AsyncDatabase(db)
+    yield facade
+    facade.close()
+
+
+def test_calls_run_on_the_database_thread(db, adb):
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+
+    async def scenario():
+        thread = await adb.run(lambda: threading.current_thread().name)
+        meds = await adb.medications.get_all(with_schedules=False)
+        return thread, meds
+
+    thread, meds = asyncio.run(scenario())
+
+    assert thread.startswith("database")
+    assert [m.id for m in meds] == ["m1"]
+
+
+def test_generators_are_drained_off_the_loop(db, adb):
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+
+    logs = asyncio.run(adb.intake_logs.iter_all())
+
+    assert logs == []
+
+
+def test_transaction_rolls_back_as_a_unit(db, adb):
+    def half_done():
+        db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+        raise RuntimeError("abandon")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(adb.transaction(half_done))
+
+    assert db.medications.get_all() == []
+
+
+def test_ui_loop_keeps_ticking_during_a_lock_wait(db, adb, tmp_path):
+    """
+    A save stuck behind another connection's write lock must not stall the
+    event loop: the longest gap between ticks stays within one dispatch
+    (a few ticks), far below the time the save itself waits.
+    """
+
+    blocker = sqlite3.connect(tmp_path / "app.db", check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(LOCK_HOLD, blocker.rollback).start()
+
+    async def scenario():
+        gaps = []
+        done = asyncio.Event()
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(TICK)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await adb.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+        waited = time.perf_counter() - started
+        done.set()
+        await ticker
+        return waited, max(gaps)
+
+    waited, longest_gap = asyncio.run(scenario())
+    blocker.close()
+
+    assert waited >= LOCK_HOLD * 0.9
+    assert longest_gap < LOCK_HOLD / 3
+    assert db.medications.get_by_id("m1").name == "A"
@@ -0,0 +1,143 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from data.database import Database
+from data.errors import DatabaseError
+from models.appointment import Appointment
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+from validators.intake_log_validator import IntakeLogValidationError
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def commits(db):
+    statements = []
+    db.conn.connection().set_trace_callback(statements.append)
+    yield lambda: sum(1 for s in statements if s.strip().upper() == "COMMIT")
+    db.conn.connection().set_trace_callback(None)
+
+
+def _logs(count):
+    base = datetime(2024, 1, 1, 8, 0)
+    return [
+        IntakeLog(
+            medication_id="m1",
+            scheduled_time=base + timedelta(days=i),
+            taken_time=base + timedelta(days=i, minutes=5),
+            created_at=base + timedelta(days=i, minutes=5),
+            amount_taken=1,
+        )
+        for i in range(count)
+    ]
+
+
+def test_intake_add_many_commits_once(db, commits):
+    db.intake_logs.add_many(_logs(200))
+
+    assert len(db.intake_logs.get_all()) == 200
+    assert commits() == 1
+
+
+def test_intake_add_many_validates_before_writing(db):
+    logs = _logs(3)
+    logs[2].amount_taken = -1
+
+    with pytest.raises(IntakeLogValidationError):
+        db.intake_logs.add_many(logs)
+    assert db.intake_logs.get_all() == []
+
+
+def test_intake_add_many_rolls_back_whole_batch(db):
+    logs = _logs(3)
+    # Same dose twice violates the unique (medication, scheduled_time) index.
+    logs[2].scheduled_time = logs[0].scheduled_time
+
+    with pytest.raises(DatabaseError):
+        db.intake_logs.add_many(logs)
+    assert db.intake_logs.get_all() == []
+
+
+def test_intake_update_many(db, commits):
+    logs = db.intake_logs.add_many(_logs(5))
+    for log in logs:
+        log.notes = "paper log"
+
+    db.intake_logs.update_many(logs)
+
+    assert {log.notes for log in db.intake_logs.get_all()} == {"paper log"}
+    assert commits() == 2
+
+
+def test_schedule_and_reminder_add_many(db, commits):
+    schedules = [
+        Schedule(id=f"s{i}", medication_id="m1", times=[time(8, 0)],
+                 start_date=date(2024, 1, 1))
+        for i in range(10)
+    ]
+    reminders = [
+        Reminder(id=f"r{i}", medication_id="m1", scheduled_id=f"s{i}")
+        for i in range(10)
+    ]
+
+    db.schedules.add_many(schedules)
+    db.reminders.add_many(reminders)
+    for s in schedules:
+        s.is_active = False
+    for r in reminders:
+        r.reminder_offset_minutes = 30
+    db.schedules.update_many(schedules)
+    db.reminders.update_many(reminders)
+
+    assert not any(s.is_active for s in db.schedules.get_all())
+    assert {r.reminder_offset_minutes for r in db.reminders.get_all()} == {30}
+    assert commits() == 4
+
+
+def test_appointment_add_many_returns_assigned_ids(db, commits):
+    db.appointments.add(Appointment(title="First", date="2024-01-01", time="09:00"))
+
+    saved = db.appointments.add_many(
+        Appointment(title=f"Visit {i}", date="2024-02-01", time="10:00")
+        for i in range(3)
+    )
+
+    assert [db.appointments.get_by_id(a.id).title for a in saved] == [
+        "Visit 0", "Visit 1", "Visit 2"
+    ]
+    assert commits() == 2
+
+
+def test_appointment_add_many_reads_back_non_consecutive_ids(db):
+    # A trigger that uses up an ID per insert leaves gaps between them.
+    db.conn.execute(
+        "CREATE TRIGGER skip_ids AFTER INSERT ON appointments "
+        "WHEN NEW.title != 'gap' BEGIN "
+        "INSERT INTO appointments (title, date, time) VALUES ('gap', '', ''); "
+        "DELETE FROM appointments WHERE title = 'gap'; END"
+    )
+    db.conn.commit()
+
+    saved = db.appointments.add_many(
+        Appointment(title=f"Visit {i}", date="2024-02-01", time="10:00")
+        for i in range(3)
+    )
+
+    assert [db.appointments.get_by_id(a.id).title for a in saved] == [
+        "Visit 0", "Visit 1", "Visit 2"
+    ]
+
+
+def test_appointment_update_many_requires_ids(db):
+    with pytest.raises(ValueError):
+        db.appointments.update_many([Appointment(id="", title="X", date="d", time="t")])
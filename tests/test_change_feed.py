@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from data.change_feed import Change
+from data.database import Database
+from models.appointment import Appointment
+from models.medication import Medication
+from models.user_profile import UserProfile
+from services.view_refresher import ViewRefresher
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def changes(db):
+    received = []
+    db.changes.subscribe(received.append)
+    return received
+
+
+def test_appointment_writes_are_published(db, changes):
+    appt = db.appointments.add(Appointment(title="GP", date="2024-05-01", time="09:00"))
+    appt.title = "Dentist"
+    db.appointments.update(appt)
+    db.appointments.delete(appt.id)
+
+    assert [(c.entity, c.entity_id, c.kind) for c in changes] == [
+        ("appointment", appt.id, "add"),
+        ("appointment", appt.id, "update"),
+        ("appointment", appt.id, "delete"),
+    ]
+
+
+def test_user_profile_saves_are_published(db, changes):
+    profile = UserProfile(name="Sam")
+    db.user_profile.save_profile(profile)
+    db.user_profile.save_profile(UserProfile(name="Sam B"))
+
+    assert [(c.entity, c.entity_id, c.kind) for c in changes] == [
+        ("user_profile", profile.id, "add"),
+        ("user_profile", profile.id, "update"),
+    ]
+
+
+def test_data_version_ignores_our_own_writes(db, changes):
+    monitor = db.external_writes
+    monitor.poll()  # Baseline.
+
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+
+    assert monitor.poll() is False
+    assert all(c.entity != "database" for c in changes)
+
+
+def test_data_version_reports_writes_from_other_connections(db, changes, tmp_path):
+    monitor = db.external_writes
+    monitor.poll()
+
+    other = sqlite3.connect(tmp_path / "app.db")
+    other.execute(
+        "INSERT INTO medications (id, name, is_active, created_at) "
+        "VALUES ('m9', 'Elsewhere', 1, '2024-01-01T00:00:00+00:00')"
+    )
+    other.commit()
+    other.close()
+
+    assert monitor.poll() is True
+    assert changes[-1] == Change("database", None, "external")
+    assert monitor.poll() is False
+
+
+def test_external_write_clears_the_caches(db):
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    db.medications.get_by_id("m1")
+
+    db.changes.publish(Change("database", None, "external"))
+
+    assert len(db.medications.cache) == 0
+
+
+def test_view_refresher_redraws_only_views_that_watch_the_entity(db):
+    rendered = []
+    refresher = ViewRefresher(db.changes, rendered.append)
+
+    def medications_view(page):
+        return None
+
+    refresher.showing(medications_view, {"medication"})
+    db.appointments.add(Appointment(title="GP", date="2024-05-01", time="09:00"))
+    assert refresher.refresh_pending() is False
+
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    assert refresher.refresh_pending() is True
+    assert rendered == [medications_view]
+
+
+def test_view_refresher_leaves_forms_alone(db):
+    rendered = []
+    refresher = ViewRefresher(db.changes, rendered.append)
+
+    refresher.showing(lambda page: None)
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+
+    assert refresher.refresh_pending() is False
+    assert rendered == []
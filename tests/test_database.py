@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from data.database import ConnectionManager, Database, StorageProfile, get_connection
+
+
+def test_get_connection_enables_wal_and_profile(tmp_path):
+    profile = StorageProfile(cache_size=-2000, synchronous="FULL", busy_timeout_ms=1234)
+    conn = get_connection(tmp_path / "app.db", profile)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+    # FULL == 2
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    conn.close()
+
+
+def test_storage_profile_rejects_unknown_synchronous_level():
+    with pytest.raises(ValueError):
+        StorageProfile(synchronous="SOMETIMES")
+
+
+def test_connection_manager_reuses_connection_within_a_thread(tmp_path):
+    manager = ConnectionManager(tmp_path / "app.db")
+
+    assert manager.connection() is manager.connection()
+    manager.close()
+
+
+def test_connection_manager_gives_each_thread_its_own_connection(tmp_path):
+    manager = ConnectionManager(tmp_path / "app.db")
+    main_conn = manager.connection()
+    seen = []
+
+    worker = threading.Thread(target=lambda: seen.append(manager.connection()))
+    worker.start()
+    worker.join()
+
+    assert seen and seen[0] is not main_conn
+    manager.close()
+
+
+def test_reader_is_not_blocked_by_open_write_transaction(tmp_path):
+    db = Database(tmp_path / "app.db")
+    db.conn.execute("INSERT INTO appointments (title, date, time) VALUES ('a', 'd', 't')")
+    db.conn.commit()
+
+    # Hold a write transaction open on the main thread's connection.
+    db.conn.execute("INSERT INTO appointments (title, date, time) VALUES ('b', 'd', 't')")
+    counts = []
+
+    def read():
+        counts.append(len(db.appointments.get_all()))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    reader.join(timeout=5)
+
+    # Under WAL the reader sees the last committed state without waiting.
+    assert counts == [1]
+    db.conn.rollback()
+    db.close()
@@ -0,0 +1,210 @@
+import sqlite3
+import time as clock
+import timeit
+from datetime import date, datetime, timedelta, timezone, time
+
+import pytest
+
+from data.database import Database
+from data.epoch import (
+    date_to_epoch_day, datetime_to_epoch_us, epoch_day_to_date, epoch_us_to_datetime
+)
+from data.errors import DuplicateIntakeLogError
+from data.migrations import MIGRATIONS, migrate
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from models.schedule import Schedule
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    """Switch the process time zone for one test."""
+
+    def use(name):
+        monkeypatch.setenv("TZ", name)
+        clock.tzset()
+
+    yield use
+    monkeypatch.undo()
+    clock.tzset()
+
+
+def test_naive_datetimes_round_trip_as_wall_clock_across_dst(local_tz):
+    local_tz("America/New_York")
+    # 2024-03-10 02:30 does not exist in New York: clocks jump to 03:00.
+    skipped = datetime(2024, 3, 10, 2, 30)
+    after = datetime(2024, 3, 10, 3, 30)
+    value = datetime(2024, 3, 1, 8, 5, 12, 345678)
+
+    assert epoch_us_to_datetime(datetime_to_epoch_us(value)) == value
+    assert epoch_us_to_datetime(datetime_to_epoch_us(skipped)) == skipped
+    assert datetime_to_epoch_us(after) - datetime_to_epoch_us(skipped) == 3_600_000_000
+
+
+def test_naive_encoding_does_not_depend_on_the_time_zone(local_tz):
+    value = datetime(2024, 7, 1, 8, 0)
+    local_tz("UTC")
+    in_utc = datetime_to_epoch_us(value)
+    local_tz("America/New_York")
+
+    assert datetime_to_epoch_us(value) == in_utc
+
+
+def test_doses_written_in_one_time_zone_read_the_same_in_another(tmp_path, local_tz):
+    local_tz("UTC")
+    db = Database(tmp_path / "app.db")
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(IntakeLog(
+        medication_id="m1", scheduled_time=scheduled,
+        taken_time=scheduled, created_at=scheduled, amount_taken=1,
+    ))
+    db.close()
+
+    local_tz("America/New_York")
+    db = Database(tmp_path / "app.db")
+    keys = db.intake_logs.get_taken_keys(datetime(2024, 3, 1), datetime(2024, 3, 2))
+    logs = db.intake_logs.get_between(datetime(2024, 3, 1), datetime(2024, 3, 2))
+    with pytest.raises(DuplicateIntakeLogError):
+        db.intake_logs.add(IntakeLog(
+            medication_id="m1", scheduled_time=scheduled,
+            taken_time=scheduled, created_at=scheduled, amount_taken=1,
+        ))
+    taken = db.intake_logs.is_taken("m1", scheduled)
+    db.close()
+
+    assert taken is True
+    assert keys == {("m1", datetime_to_epoch_us(scheduled))}
+    assert [log.scheduled_time for log in logs] == [scheduled]
+
+
+def test_migration_re_encodes_local_time_columns(tmp_path):
+    path = tmp_path / "app.db"
+    db = Database(path)
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(IntakeLog(
+        id="l1", medication_id="m1", scheduled_time=scheduled,
+        taken_time=scheduled, created_at=scheduled, amount_taken=1,
+    ))
+    db.close()
+
+    # Rewind to schema 7 with integers encoded five hours off, as a
+    # machine in New York would have written them.
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA user_version = 7")
+    conn.execute(
+        "UPDATE intake_logs SET scheduled_us = scheduled_us + 18000000000, "
+        "taken_us = taken_us + 18000000000"
+    )
+    conn.commit()
+    assert migrate(conn) == MIGRATIONS[-1].version
+    row = conn.execute("SELECT scheduled_us, taken_us FROM intake_logs").fetchone()
+    conn.close()
+
+    assert row["scheduled_us"] == datetime_to_epoch_us(scheduled)
+    assert row["taken_us"] == datetime_to_epoch_us(scheduled)
+
+
+def test_aware_datetimes_encode_the_same_instant():
+    utc = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+    plus_two = utc.astimezone(timezone(timedelta(hours=2)))
+
+    assert datetime_to_epoch_us(utc) == datetime_to_epoch_us(plus_two)
+    assert epoch_us_to_datetime(datetime_to_epoch_us(plus_two), aware=True) == utc
+
+
+def test_dates_round_trip_as_epoch_days():
+    assert date_to_epoch_day(date(1970, 1, 2)) == 1
+    assert epoch_day_to_date(date_to_epoch_day(date(2024, 2, 29))) == date(2024, 2, 29)
+    assert date_to_epoch_day(None) is None
+
+
+def test_migration_backfills_text_rows(tmp_path):
+    path = tmp_path / "app.db"
+    db = Database(path)
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    db.close()
+
+    # Rewind to schema 4 and write a row the way the old code did.
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA user_version = 4")
+    conn.execute("DROP INDEX ux_intake_logs_medication_scheduled_us")
+    conn.execute("DROP INDEX idx_reminder_events_state_dose_us")
+    conn.execute("ALTER TABLE reminder_events DROP COLUMN dose_us")
+    conn.execute("DROP TABLE schedule_times")
+    conn.execute("ALTER TABLE schedules DROP COLUMN weekday_mask")
+    for index in ("medication_taken_us", "taken_us", "scheduled_us"):
+        conn.execute(f"DROP INDEX idx_intake_logs_{index}")
+    for table, columns in [
+        ("intake_logs", ("taken_us", "scheduled_us", "created_us")),
+        ("schedules", ("start_day", "end_day", "created_us")),
+        ("medications", ("created_us",)),
+    ]:
+        for column in columns:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+    conn.execute(
+        "INSERT INTO intake_logs (id, medication_id, scheduled_time, taken_time, "
+        "amount_taken, notes, created_at) VALUES "
+        "('l1', 'm1', '2024-03-01T08:00:00', '2024-03-01T08:05:00', 1, '', "
+        "'2024-03-01T08:05:00')"
+    )
+    conn.execute(
+        "INSERT INTO schedules (id, medication_id, times, days_of_week, frequency, "
+        "start_date, end_date, is_active, created_at) VALUES "
+        "('s1', 'm1', '[\"08:00\"]', '[]', 'daily', '2024-01-01', NULL, 1, "
+        "'2024-01-01T00:00:00')"
+    )
+    conn.commit()
+    assert migrate(conn) == MIGRATIONS[-1].version
+    conn.close()
+
+    db = Database(path)
+    row = db.conn.execute("SELECT taken_us FROM intake_logs").fetchone()
+    logs = db.intake_logs.get_between(datetime(2024, 3, 1), datetime(2024, 3, 2))
+    schedules = list(db.schedules.iter_range(date(2024, 2, 1), date(2024, 3, 1)))
+    db.close()
+
+    assert row["taken_us"] == datetime_to_epoch_us(datetime(2024, 3, 1, 8, 5))
+    assert [log.id for log in logs] == ["l1"]
+    assert [s.id for s in schedules] == ["s1"]
+
+
+def test_rows_without_text_decode_from_integers(tmp_path):
+    db = Database(tmp_path / "app.db")
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(IntakeLog(
+        id="l1", medication_id="m1", scheduled_time=scheduled,
+        taken_time=scheduled, created_at=scheduled, amount_taken=1,
+    ))
+    db.schedules.add(Schedule(id="s1", medication_id="m1", times=[time(8, 0)],
+                              start_date=date(2024, 1, 1)))
+    db.conn.execute("UPDATE intake_logs SET scheduled_time = NULL")
+    db.conn.execute("UPDATE schedules SET start_date = ''")
+    db.conn.commit()
+
+    assert db.intake_logs.get_by_id("l1").scheduled_time == scheduled
+    assert db.schedules.get_by_id("s1").start_date == date(2024, 1, 1)
+    db.close()
+
+
+def test_decode_microbenchmark():
+    """
+    Per-row timestamp decode cost, text column vs integer column.
+    Run with -s to see the numbers; only agreement is asserted, since
+    timings vary by machine.
+    """
+
+    value = datetime(2024, 3, 1, 8, 5, 12, 345678)
+    text, epoch = value.isoformat(), datetime_to_epoch_us(value)
+    rows = 50_000
+
+    iso_ns = timeit.timeit(lambda: datetime.fromisoformat(text), number=rows) / rows * 1e9
+    epoch_ns = timeit.timeit(lambda: epoch_us_to_datetime(epoch), number=rows) / rows * 1e9
+
+    print(f"\ndecode per row: iso text {iso_ns:.0f} ns, epoch int {epoch_ns:.0f} ns")
+
+    assert datetime.fromisoformat(text) == epoch_us_to_datetime(epoch)
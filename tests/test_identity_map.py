@@ -0,0 +1,147 @@
+import threading
+from datetime import date, time
+
+import pytest
+
+from data.database import Database
+from data.errors import NotFoundError
+from data.identity_map import IdentityMap
+from models.medication import Medication
+from models.schedule import Schedule
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    database.schedules.add(_schedule("s1", time(8, 0)))
+    yield database
+    database.close()
+
+
+def _schedule(schedule_id, at, medication_id="m1"):
+    return Schedule(
+        id=schedule_id, medication_id=medication_id, times=[at],
+        start_date=date(2024, 1, 1),
+    )
+
+
+def test_lru_evicts_least_recently_used():
+    cache = IdentityMap(capacity=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 1)  # "a" is now the most recent.
+    cache.get_or_load("c", lambda: 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats() == {"size": 2, "capacity": 2, "hits": 1, "misses": 3}
+
+
+def test_load_overlapping_an_invalidation_is_not_stored():
+    cache = IdentityMap()
+
+    def loader():
+        cache.invalidate("a")  # A write lands while the read is running.
+        return "old"
+
+    assert cache.get_or_load("a", loader) == "old"
+    assert "a" not in cache
+
+
+def test_zero_capacity_disables_caching():
+    cache = IdentityMap(capacity=0)
+    cache.get_or_load("a", lambda: 1)
+
+    assert len(cache) == 0
+
+
+def test_medication_get_by_id_hits_the_cache(db):
+    first = db.medications.get_by_id("m1")
+    second = db.medications.get_by_id("m1")
+
+    assert first is second
+    assert db.medications.cache.hits == 1
+    assert db.medications.cache.misses == 1
+
+
+def test_missing_ids_are_not_cached(db):
+    for _ in range(2):
+        with pytest.raises(NotFoundError):
+            db.medications.get_by_id("nope")
+
+    assert db.medications.cache.misses == 2
+
+
+def test_medication_update_invalidates(db):
+    db.medications.get_by_id("m1")
+    db.medications.update(Medication(id="m1", name="B", dosage="2mg"))
+
+    assert db.medications.get_by_id("m1").name == "B"
+
+
+def test_schedule_write_invalidates_its_medication(db):
+    assert len(db.medications.get_by_id("m1").schedule) == 1
+
+    db.schedules.add(_schedule("s2", time(20, 0)))
+    assert len(db.medications.get_by_id("m1").schedule) == 2
+
+    db.schedules.delete("s1")
+    assert [s.id for s in db.medications.get_by_id("m1").schedule] == ["s2"]
+
+
+def test_schedule_update_invalidates(db):
+    db.schedules.get_by_id("s1")
+    db.schedules.update(_schedule("s1", time(9, 30)))
+
+    assert db.schedules.get_by_id("s1").times == [time(9, 30)]
+
+
+def test_medication_delete_drops_cascaded_schedules(db):
+    db.schedules.get_by_id("s1")
+    db.medications.delete("m1")
+
+    with pytest.raises(NotFoundError):
+        db.schedules.get_by_id("s1")
+
+
+def test_reads_inside_a_transaction_are_not_cached(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.medications.update(Medication(id="m1", name="Draft", dosage="1mg"))
+            assert db.medications.get_by_id("m1").name == "Draft"
+            raise RuntimeError("abandon")
+
+    assert db.medications.get_by_id("m1").name == "A"
+
+
+def test_read_on_another_thread_during_a_transaction_is_not_kept(db):
+    result = {}
+    medication = db.medications.get_by_id("m1")
+
+    with db.transaction():
+        medication.name = "New"
+        db.medications.update(medication)
+        # Another thread only sees the committed row and caches it.
+        reader = threading.Thread(
+            target=lambda: result.update(seen=db.medications.get_by_id("m1").name)
+        )
+        reader.start()
+        reader.join()
+
+    assert result["seen"] == "A"
+    assert db.medications.get_by_id("m1").name == "New"
+
+
+def test_schedule_read_during_a_transaction_is_not_kept(db):
+    result = {}
+
+    with db.transaction():
+        db.schedules.update(_schedule("s1", time(9, 0)))
+        reader = threading.Thread(
+            target=lambda: result.update(seen=db.schedules.get_by_id("s1").times)
+        )
+        reader.start()
+        reader.join()
+
+    assert result["seen"] == [time(8, 0)]
+    assert db.schedules.get_by_id("s1").times == [time(9, 0)]
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from data.database import Database
+from data.epoch import datetime_to_epoch_us
+from data.errors import DatabaseError, DuplicateIntakeLogError
+from data.intake_log_repository import _INSERT_SQL, IntakeLogRepository
+from models.intake_log import IntakeLog
+from models.medication import Medication
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    database.medications.add(Medication(id="m2", name="B", dosage="2mg"))
+    yield database
+    database.close()
+
+
+def _log(med_id, scheduled_time, **kwargs):
+    taken = kwargs.pop("taken_time", scheduled_time + timedelta(minutes=5))
+    return IntakeLog(
+        medication_id=med_id,
+        scheduled_time=scheduled_time,
+        taken_time=taken,
+        created_at=taken,
+        amount_taken=1,
+        **kwargs,
+    )
+
+
+def test_get_taken_keys_returns_only_window(db):
+    base = datetime(2024, 3, 1, 8, 0)
+    for day in range(5):
+        db.intake_logs.add(_log("m1", base + timedelta(days=day)))
+    db.intake_logs.add(_log("m2", base + timedelta(days=1)))
+
+    keys = db.intake_logs.get_taken_keys(base + timedelta(days=1), base + timedelta(days=3))
+
+    assert keys == {
+        ("m1", datetime_to_epoch_us(base + timedelta(days=1))),
+        ("m1", datetime_to_epoch_us(base + timedelta(days=2))),
+        ("m2", datetime_to_epoch_us(base + timedelta(days=1))),
+    }
+
+
+def test_is_taken_is_an_index_point_lookup(db):
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(_log("m1", scheduled))
+
+    assert db.intake_logs.is_taken("m1", scheduled) is True
+    assert db.intake_logs.is_taken("m2", scheduled) is False
+
+    plan = " ".join(
+        row[3] for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM intake_logs "
+            "WHERE medication_id = ? AND scheduled_us = ?",
+            ("m1", 0),
+        )
+    )
+    assert "ux_intake_logs_medication_scheduled_us" in plan
+
+
+def test_doses_match_by_instant_not_by_text(db):
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    # The same moment, written elsewhere with a different UTC offset.
+    elsewhere = scheduled.astimezone().astimezone(timezone(timedelta(hours=5, minutes=30)))
+    db.conn.execute(
+        "INSERT INTO intake_logs (id, medication_id, scheduled_time, taken_time, "
+        "amount_taken, created_at, scheduled_us) VALUES (?, ?, ?, ?, 1, ?, ?)",
+        ("l1", "m1", elsewhere.isoformat(), elsewhere.isoformat(),
+         elsewhere.isoformat(), datetime_to_epoch_us(elsewhere)),
+    )
+    db.conn.commit()
+
+    assert db.intake_logs.is_taken("m1", scheduled) is True
+    with pytest.raises(DuplicateIntakeLogError):
+        db.intake_logs.add(_log("m1", scheduled))
+
+
+def test_second_log_for_same_dose_is_rejected(db):
+    scheduled = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(_log("m1", scheduled))
+
+    with pytest.raises(DuplicateIntakeLogError, match="already has an intake log"):
+        db.intake_logs.add(_log("m1", scheduled))
+
+
+def test_missing_medication_id_is_not_reported_as_a_duplicate(db):
+    # The validator normally stops this; go straight to the statement.
+    params = list(IntakeLogRepository._insert_params(_log("m1", datetime(2024, 3, 1, 8, 0))))
+    params[1] = None
+
+    with pytest.raises(DatabaseError, match="NOT NULL") as info:
+        db.intake_logs._write(_INSERT_SQL, tuple(params), "insert intake log")
+
+    assert not isinstance(info.value, DuplicateIntakeLogError)
+
+
+def test_manual_logs_without_scheduled_time_do_not_collide(db):
+    taken = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(IntakeLog(medication_id="m1", taken_time=taken, created_at=taken))
+    db.intake_logs.add(IntakeLog(medication_id="m1", taken_time=taken, created_at=taken))
+
+    assert len(db.intake_logs.get_by_medication("m1")) == 2
+
+
+def test_iter_all_streams_in_chunks(db):
+    base = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add_many(_log("m1", base + timedelta(days=d)) for d in range(10))
+
+    stream = db.intake_logs.iter_all(chunk_size=3)
+    first = next(stream)
+    # Other queries can run while the stream is open.
+    assert db.intake_logs.is_taken("m1", base)
+    rest = list(stream)
+
+    assert len([first] + rest) == 10
+
+
+def test_iter_range_is_half_open_and_ordered(db):
+    base = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add_many(
+        _log("m1", base + timedelta(days=d)) for d in (4, 0, 2, 1, 3)
+    )
+
+    logs = list(db.intake_logs.iter_range(
+        base + timedelta(days=1), base + timedelta(days=3, minutes=5), chunk_size=2
+    ))
+
+    assert [log.scheduled_time.day for log in logs] == [2, 3]
+
+
+def test_iter_rejects_empty_chunks(db):
+    with pytest.raises(ValueError):
+        list(db.intake_logs.iter_all(chunk_size=0))
+
+
+def test_get_between_filters_orders_and_counts(db):
+    base = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add_many(_log("m1", base + timedelta(days=d)) for d in range(5))
+    db.intake_logs.add_many(_log("m2", base + timedelta(days=d, hours=1)) for d in range(5))
+    start, end = base + timedelta(days=1), base + timedelta(days=3)
+
+    both = db.intake_logs.get_between(start, end)
+    newest_m2 = db.intake_logs.get_between(start, end, medication_ids=["m2"], order="desc")
+
+    assert [log.taken_time for log in both] == sorted(log.taken_time for log in both)
+    assert len(both) == 4
+    assert [log.medication_id for log in newest_m2] == ["m2", "m2"]
+    assert newest_m2[0].taken_time > newest_m2[1].taken_time
+    assert db.intake_logs.count_between(start, end) == 4
+    assert db.intake_logs.count_between(start, end, medication_ids=["m1"]) == 2
+    assert db.intake_logs.get_between(start, end, medication_ids=[]) == []
+
+
+def test_get_between_rejects_unknown_order(db):
+    with pytest.raises(ValueError):
+        db.intake_logs.get_between(datetime(2024, 1, 1), datetime(2024, 2, 1), order="up")
+
+
+def test_latest_per_medication(db):
+    base = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add_many(_log("m1", base + timedelta(days=d)) for d in (2, 0, 1))
+    db.intake_logs.add(_log("m2", base))
+
+    latest = db.intake_logs.latest_per_medication()
+
+    assert latest["m1"].scheduled_time == base + timedelta(days=2)
+    assert latest["m2"].scheduled_time == base
+
+
+def test_range_queries_use_an_index(db):
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM intake_logs "
+        "WHERE medication_id IN (?) AND taken_us >= ? AND taken_us < ?",
+        ("m1", 0, 1),
+    ).fetchall()
+
+    assert any("idx_intake_logs_medication_taken_us" in row[-1] for row in plan)
@@ -0,0 +1,124 @@
+from datetime import date, time
+
+import pytest
+
+from data.database import Database
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    yield database
+    database.close()
+
+
+def _add_medication(db, med_id, schedule_times=()):
+    db.medications.add(Medication(id=med_id, name=f"Med {med_id}", dosage="1mg"))
+    for t in schedule_times:
+        db.schedules.add(
+            Schedule(medication_id=med_id, times=[t], start_date=date(2025, 1, 1))
+        )
+
+
+def _count_selects(db):
+    statements = []
+    db.conn.connection().set_trace_callback(statements.append)
+    return statements
+
+
+def test_get_all_loads_schedules_in_one_query(db):
+    for i in range(5):
+        _add_medication(db, f"m{i}", [time(8, 0), time(20, 0)])
+
+    statements = _count_selects(db)
+    meds = db.medications.get_all()
+
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+    assert all(len(m.schedule) == 2 for m in meds)
+    assert {s.medication_id for m in meds for s in m.schedule} == {m.id for m in meds}
+
+
+def test_get_all_without_schedules_skips_schedule_query(db):
+    _add_medication(db, "m1", [time(8, 0)])
+
+    statements = _count_selects(db)
+    meds = db.medications.get_all(with_schedules=False)
+
+    assert [m.schedule for m in meds] == [[]]
+    assert not any("schedules" in s for s in statements)
+
+
+def test_get_many_returns_requested_order_and_skips_unknown(db):
+    _add_medication(db, "m1", [time(8, 0)])
+    _add_medication(db, "m2")
+    _add_medication(db, "m3", [time(9, 0)])
+
+    meds = db.medications.get_many(["m3", "missing", "m1"])
+
+    assert [m.id for m in meds] == ["m3", "m1"]
+    assert [len(m.schedule) for m in meds] == [1, 1]
+
+
+def test_get_many_with_no_ids_returns_empty_list(db):
+    assert db.medications.get_many([]) == []
+
+
+def _with_reminder(db, schedule):
+    db.schedules.add(schedule)
+    db.reminders.add(
+        Reminder(id=f"r-{schedule.id}", medication_id=schedule.medication_id,
+                 scheduled_id=schedule.id)
+    )
+
+
+def test_update_syncs_schedules_by_id_and_keeps_reminders(db):
+    _add_medication(db, "m1")
+    keep = Schedule(id="keep", medication_id="m1", times=[time(8, 0)],
+                    start_date=date(2025, 1, 1))
+    edit = Schedule(id="edit", medication_id="m1", times=[time(12, 0)],
+                    start_date=date(2025, 1, 1))
+    drop = Schedule(id="drop", medication_id="m1", times=[time(20, 0)],
+                    start_date=date(2025, 1, 1))
+    for s in (keep, edit, drop):
+        _with_reminder(db, s)
+
+    med = db.medications.get_by_id("m1")
+    edit.times = [time(13, 0)]
+    new = Schedule(id="new", medication_id="m1", times=[time(22, 0)],
+                   start_date=date(2025, 1, 1))
+    med.schedule = [keep, edit, new]
+
+    statements = _count_selects(db)
+    db.medications.update(med)
+
+    # executemany may trace a statement more than once, so dedupe.
+    writes = {
+        " ".join(s.split()) for s in statements
+        if "schedules" in s and s.split()[0].upper() in {"INSERT", "UPDATE", "DELETE"}
+    }
+    assert sorted(w.split()[0] for w in writes) == ["DELETE", "INSERT", "UPDATE"]
+    stored = {s.id: s for s in db.schedules.get_by_medication("m1")}
+    assert set(stored) == {"keep", "edit", "new"}
+    assert stored["edit"].times == [time(13, 0)]
+    # Only the dropped schedule's reminder cascaded away.
+    assert {r.id for r in db.reminders.get_by_medication("m1")} == {"r-keep", "r-edit"}
+
+
+def test_schedule_iter_range_returns_overlapping_schedules(db):
+    _add_medication(db, "m1")
+    for sid, start, end in [
+        ("past", date(2024, 1, 1), date(2024, 6, 1)),
+        ("open", date(2024, 1, 1), None),
+        ("future", date(2026, 1, 1), None),
+        ("edge", date(2024, 12, 1), date(2025, 1, 1)),
+    ]:
+        db.schedules.add(Schedule(id=sid, medication_id="m1", times=[time(8, 0)],
+                                  start_date=start, end_date=end))
+
+    found = db.schedules.iter_range(date(2025, 1, 1), date(2025, 2, 1), chunk_size=1)
+
+    assert sorted(s.id for s in found) == ["edge", "open"]
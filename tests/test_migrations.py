@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+from data.database import Database
+from data.errors import DatabaseError
+from data.migrations import MIGRATIONS, Migration, get_schema_version, migrate
+
+
+def _index_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def _query_plan(conn, sql, params=()):
+    return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_fresh_database_is_migrated_to_latest_version(tmp_path):
+    db = Database(tmp_path / "app.db")
+
+    assert db.schema_version == MIGRATIONS[-1].version
+    assert get_schema_version(db.conn) == MIGRATIONS[-1].version
+    db.close()
+
+
+def test_hot_foreign_keys_are_indexed(tmp_path):
+    db = Database(tmp_path / "app.db")
+
+    assert "idx_schedules_medication_id" in _index_names(db.conn, "schedules")
+    assert "idx_reminders_schedule_id" in _index_names(db.conn, "reminders")
+    assert "ux_intake_logs_medication_scheduled_us" in _index_names(db.conn, "intake_logs")
+
+    plan = _query_plan(db.conn, "SELECT * FROM schedules WHERE medication_id = ?", ("m",))
+    assert "USING INDEX" in plan
+    db.close()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    db = Database(tmp_path / "app.db")
+    version = db.schema_version
+
+    assert migrate(db.conn) == version
+    db.close()
+
+
+def test_legacy_intake_logs_foreign_key_is_repaired(tmp_path):
+    path = tmp_path / "app.db"
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        """
+        CREATE TABLE medications (id TEXT PRIMARY KEY, name TEXT NOT NULL,
+            description TEXT, dosage TEXT, notes TEXT,
+            is_active INTEGER NOT NULL DEFAULT 1, created_at TEXT NOT NULL);
+        CREATE TABLE intake_logs (id TEXT PRIMARY KEY, medication_id TEXT NOT NULL,
+            scheduled_time TEXT, taken_time TEXT, amount_taken REAL NOT NULL,
+            notes TEXT, created_at TEXT NOT NULL,
+            FOREIGN KEY (medication_id) REFERENCES medication(id) ON DELETE CASCADE);
+        INSERT INTO medications VALUES ('m1', 'A', '', '1mg', '', 1, '2025-01-01T00:00:00');
+        INSERT INTO intake_logs VALUES ('l1', 'm1', NULL, '2025-01-01T08:00:00', 1, NULL,
+            '2025-01-01T08:00:00');
+        """
+    )
+    legacy.close()
+
+    db = Database(path)
+    parents = {row[2] for row in db.conn.execute("PRAGMA foreign_key_list(intake_logs)")}
+
+    assert parents == {"medications"}
+    assert [log.id for log in db.intake_logs.get_all()] == ["l1"]
+    db.close()
+
+
+def test_duplicate_dose_logs_are_set_aside_not_deleted(tmp_path):
+    path = tmp_path / "app.db"
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        """
+        CREATE TABLE medications (id TEXT PRIMARY KEY, name TEXT NOT NULL,
+            description TEXT, dosage TEXT, notes TEXT,
+            is_active INTEGER NOT NULL DEFAULT 1, created_at TEXT NOT NULL);
+        CREATE TABLE intake_logs (id TEXT PRIMARY KEY, medication_id TEXT NOT NULL,
+            scheduled_time TEXT, taken_time TEXT, amount_taken REAL NOT NULL,
+            notes TEXT, created_at TEXT NOT NULL,
+            FOREIGN KEY (medication_id) REFERENCES medications(id) ON DELETE CASCADE);
+        INSERT INTO medications VALUES ('m1', 'A', '', '1mg', '', 1, '2025-01-01T00:00:00');
+        INSERT INTO intake_logs VALUES ('l1', 'm1', '2025-01-01T08:00:00',
+            '2025-01-01T08:01:00', 1, NULL, '2025-01-01T08:01:00');
+        INSERT INTO intake_logs VALUES ('l2', 'm1', '2025-01-01T08:00:00',
+            '2025-01-01T08:02:00', 1, 'double tap', '2025-01-01T08:02:00');
+        """
+    )
+    legacy.close()
+
+    db = Database(path)
+    set_aside = db.conn.execute("SELECT id, notes FROM intake_logs_duplicates").fetchall()
+
+    assert [log.id for log in db.intake_logs.get_all()] == ["l1"]
+    assert [tuple(row) for row in set_aside] == [("l2", "double tap")]
+    db.close()
+
+
+def test_failed_migration_rolls_back_and_raises(tmp_path):
+    db = Database(tmp_path / "app.db")
+    version = db.schema_version
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    with pytest.raises(DatabaseError):
+        migrate(db.conn, [Migration(version + 1, "Broken", broken)])
+
+    assert get_schema_version(db.conn) == version
+    tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master")}
+    assert "half_done" not in tables
+    db.close()
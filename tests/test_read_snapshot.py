@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.database import Database, StorageProfile
+from models.intake_log import IntakeLog
+from models.medication import Medication
+
+
+@pytest.fixture
+def db(tmp_path):
+    # No busy wait: a write that had to wait for a reader would fail.
+    database = Database(tmp_path / "app.db", profile=StorageProfile(busy_timeout_ms=0))
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+def _log(minute):
+    taken = datetime(2024, 3, 1, 8, 0) + timedelta(minutes=minute)
+    return IntakeLog(
+        medication_id="m1", scheduled_time=taken, taken_time=taken, created_at=taken
+    )
+
+
+def test_snapshot_is_stable_while_writers_commit(db):
+    db.intake_logs.add(_log(0))
+
+    with db.snapshot() as snap:
+        before = list(snap.intake_logs.iter_all())
+        # Saves go straight through while the snapshot is open...
+        db.intake_logs.add(_log(1))
+        db.medications.add(Medication(id="m2", name="B", dosage="2mg"))
+        # ...and the snapshot keeps seeing the state it started with.
+        assert len(list(snap.intake_logs.iter_all())) == len(before) == 1
+        assert [m.id for m in snap.medications.get_all()] == ["m1"]
+
+    with db.snapshot() as snap:
+        assert len(snap.intake_logs.get_all()) == 2
+        assert len(snap.medications.get_all()) == 2
+
+
+def test_writes_are_not_delayed_by_a_long_scan(db):
+    db.intake_logs.add_many([_log(i) for i in range(500)])
+
+    with db.snapshot() as snap:
+        scan = snap.intake_logs.iter_all(chunk_size=10)
+        next(scan)
+        # Writers commit while the scan is mid-way.
+        for i in range(500, 510):
+            db.intake_logs.add(_log(i))
+        assert sum(1 for _ in scan) == 499
+
+    assert len(db.intake_logs.get_all()) == 510
+
+
+def test_reader_connection_refuses_writes(db):
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        db.reader.connection().execute("DELETE FROM medications")
+
+    assert [m.id for m in db.medications.get_all()] == ["m1"]
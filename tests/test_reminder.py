@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, date, time
 
+from data.epoch import datetime_to_epoch_us
 from services.reminders import ReminderService
 from services.schedule_engine import ScheduleEngine
 from models.schedule import Schedule
@@ -60,6 +61,14 @@ class FakeIntakeRepo:
     def get_by_medication(self, med_id):
         return self._data.get(med_id, [])
 
+    def get_taken_keys(self, window_start, window_end):
+        return {
+            (med_id, datetime_to_epoch_us(log.scheduled_time))
+            for med_id, logs in self._data.items()
+            for log in logs
+            if log.scheduled_time and window_start <= log.scheduled_time < window_end
+        }
+
 
 # -------------------------
 # Tests
@@ -207,3 +216,111 @@ def test_get_next_for_medication_returns_earliest():
     next_event = service.get_next_for_medication("med1")
     assert next_event is not None
     assert next_event.schedule_time.time() == s2.times[0]
+
+
+class CountingScheduleRepo(FakeScheduleRepo):
+    def __init__(self, schedules):
+        super().__init__(schedules)
+        self.calls = 0
+
+    def get_all(self):
+        self.calls += 1
+        return super().get_all()
+
+
+def test_snapshot_generates_once_for_all_views():
+    now = datetime.combine(date.today(), time(12, 0))
+
+    schedule = Schedule(
+        id="sched1",
+        medication_id="med1",
+        times=[time(8, 0), time(12, 20), time(18, 0)],
+        start_date=date.today(),
+        end_date=date.today()
+    )
+    schedule_repo = CountingScheduleRepo([schedule])
+
+    service = ReminderService(
+        medication_repo=FakeMedicationRepo([]),
+        schedule_repo=schedule_repo,
+        intake_repo=FakeIntakeRepo({}),
+        reminder_repo=FakeReminderRepo({"sched1": [FakeReminder(offset_minutes=30)]}),
+        schedule_engine=ScheduleEngine(None, None)
+    )
+
+    snapshot = service.snapshot(now=now)
+    overdue = service.get_overdue(snapshot)
+    due = service.get_due(snapshot)
+    upcoming = service.get_upcoming(snapshot)
+    next_event = service.get_next_for_medication("med1", snapshot)
+
+    assert schedule_repo.calls == 1
+    assert [e.schedule_time.time() for e in overdue] == [time(8, 0)]
+    assert [e.schedule_time.time() for e in due] == [time(12, 20)]
+    assert [e.schedule_time.time() for e in upcoming] == [time(18, 0)]
+    assert next_event is upcoming[0]
+    assert service.get_next_for_medication("other", snapshot) is None
+
+
+def test_snapshot_excludes_taken_doses_from_pending_views():
+    now = datetime.combine(date.today(), time(12, 0))
+    taken_dt = datetime.combine(date.today(), time(12, 10))
+
+    schedule = Schedule(
+        id="sched1",
+        medication_id="med1",
+        times=[time(12, 10)],
+        start_date=date.today(),
+        end_date=date.today()
+    )
+
+    service = ReminderService(
+        medication_repo=FakeMedicationRepo([]),
+        schedule_repo=FakeScheduleRepo([schedule]),
+        intake_repo=FakeIntakeRepo({"med1": [FakeIntakeLog(taken_dt)]}),
+        reminder_repo=FakeReminderRepo({"sched1": [FakeReminder(offset_minutes=15)]}),
+        schedule_engine=ScheduleEngine(None, None)
+    )
+
+    snapshot = service.snapshot(now=now)
+
+    assert len(snapshot.events) == 1
+    assert snapshot.due() == []
+    assert snapshot.upcoming() == []
+    assert snapshot.overdue() == []
+
+
+def test_views_without_a_snapshot_expand_only_their_window():
+    now = datetime.now()
+    schedule = Schedule(
+        id="sched1",
+        medication_id="med1",
+        times=[time(h, 0) for h in range(24)],
+        start_date=date.today() - timedelta(days=30),
+    )
+    schedule_repo = CountingScheduleRepo([schedule])
+    windows = []
+
+    class RecordingService(ReminderService):
+        def generate_events(self, window_start=None, window_end=None, now=None):
+            windows.append((window_start, window_end))
+            return super().generate_events(window_start, window_end, now=now)
+
+    service = RecordingService(
+        medication_repo=FakeMedicationRepo([]),
+        schedule_repo=schedule_repo,
+        intake_repo=FakeIntakeRepo({}),
+        reminder_repo=FakeReminderRepo({"sched1": [FakeReminder(offset_minutes=30)]}),
+        schedule_engine=ScheduleEngine(None, None)
+    )
+
+    assert service.get_next_for_medication("med1") is not None
+    assert service.get_overdue()
+    due, upcoming = service.get_due(), service.get_upcoming()
+    assert due or upcoming
+
+    # One expansion per call, each bounded on the side it does not need.
+    assert schedule_repo.calls == len(windows) == 4
+    next_start, _ = windows[0]
+    _, overdue_end = windows[1]
+    assert next_start >= now and overdue_end <= datetime.now()
@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.database import Database, StorageProfile
+from data.errors import DatabaseError
+from data.retry import RetryPolicy, RetryStats, is_transient, run_write
+from models.intake_log import IntakeLog
+from models.medication import Medication
+
+# Short budget so give-up paths finish quickly.
+FAST = RetryPolicy(
+    initial_delay=timedelta(milliseconds=1),
+    max_delay=timedelta(milliseconds=20),
+    max_wait=timedelta(milliseconds=200),
+)
+
+
+class FakeConnection:
+    """Just enough of a connection for run_write."""
+
+    def __init__(self, in_transaction=False):
+        self.retry_policy = FAST
+        self.retry_stats = RetryStats()
+        self.in_transaction = in_transaction
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _locked():
+    return sqlite3.OperationalError("database is locked")
+
+
+def _failing(times, error=_locked):
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) <= times:
+            raise error()
+        return "done"
+
+    return work, calls
+
+
+def test_delays_grow_exponentially_with_full_jitter():
+    policy = RetryPolicy()
+
+    assert [policy.delay(n, rand=lambda: 1.0) for n in range(8)] == [
+        0.01, 0.02, 0.04, 0.08, 0.16, 0.32, 0.5, 0.5
+    ]
+    assert policy.delay(3, rand=lambda: 0.0) == 0.0
+
+
+def test_policy_rejects_settings_that_never_back_off():
+    with pytest.raises(ValueError):
+        RetryPolicy(multiplier=0.5)
+    with pytest.raises(ValueError):
+        RetryPolicy(max_delay=timedelta(0))
+
+
+def test_lock_errors_are_retried_until_they_clear():
+    conn = FakeConnection()
+    work, calls = _failing(3)
+    sleeps = []
+
+    assert run_write(conn, work, "save", sleep=sleeps.append) == "done"
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+    assert conn.rollbacks == 3
+    assert conn.retry_stats.snapshot() == {"retries": 3, "give_ups": 0}
+
+
+def test_gives_up_once_the_wait_budget_is_spent():
+    conn = FakeConnection()
+    work, _ = _failing(10_000)
+    sleeps = []
+
+    with pytest.raises(DatabaseError) as info:
+        run_write(conn, work, "save", sleep=sleeps.append)
+
+    assert is_transient(info.value)
+    assert sum(sleeps) <= FAST.max_wait.total_seconds()
+    assert conn.retry_stats.give_ups == 1
+
+
+def test_other_errors_fail_at_once():
+    conn = FakeConnection()
+    work, calls = _failing(1, lambda: sqlite3.IntegrityError("UNIQUE constraint failed"))
+
+    with pytest.raises(DatabaseError, match="Failed to save"):
+        run_write(conn, work, "save", sleep=lambda s: None)
+
+    assert len(calls) == 1
+    assert conn.retry_stats.snapshot() == {"retries": 0, "give_ups": 0}
+
+
+def test_writes_inside_a_transaction_leave_the_retry_to_its_owner():
+    conn = FakeConnection(in_transaction=True)
+    work, calls = _failing(1)
+
+    with pytest.raises(DatabaseError):
+        run_write(conn, work, "save", sleep=lambda s: None)
+
+    assert len(calls) == 1
+
+
+def test_save_waits_out_a_write_lock_held_past_busy_timeout(tmp_path):
+    """
+    busy_timeout alone would turn this into a failed save; the retry
+    policy keeps waiting until the other writer lets go.
+    """
+
+    db = Database(
+        tmp_path / "app.db",
+        profile=StorageProfile(busy_timeout_ms=20),
+        retry=RetryPolicy(max_wait=timedelta(seconds=5)),
+    )
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+
+    blocker = sqlite3.connect(tmp_path / "app.db", check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.2, blocker.rollback).start()
+
+    taken = datetime(2024, 3, 1, 8, 0)
+    db.intake_logs.add(IntakeLog(medication_id="m1", taken_time=taken, created_at=taken))
+
+    assert len(db.intake_logs.get_by_medication("m1")) == 1
+    assert db.conn.retry_stats.retries > 0
+    assert db.conn.retry_stats.give_ups == 0
+    blocker.close()
+    db.close()
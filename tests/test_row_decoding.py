@@ -0,0 +1,98 @@
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from data.database import Database
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+
+ROWS = 2_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def seeded(db):
+    base = datetime(2024, 1, 1, 8, 0)
+
+    with db.transaction():
+        for i in range(ROWS):
+            db.medications.add(Medication(id=f"m{i}", name=f"Med {i}", dosage="1mg"))
+
+    db.schedules.add_many(
+        Schedule(
+            id=f"s{i}", medication_id=f"m{i}", times=[time(8, 0), time(20, 0)],
+            days_of_week=[0, 2, 4], frequency="weekly", start_date=date(2024, 1, 1),
+        )
+        for i in range(ROWS)
+    )
+    db.reminders.add_many(
+        Reminder(id=f"r{i}", medication_id=f"m{i}", scheduled_id=f"s{i}")
+        for i in range(ROWS)
+    )
+    db.intake_logs.add_many(
+        IntakeLog(
+            id=f"l{i}",
+            medication_id=f"m{i}",
+            scheduled_time=base + timedelta(minutes=i),
+            taken_time=base + timedelta(minutes=i, seconds=30),
+            created_at=base + timedelta(minutes=i, seconds=30),
+            amount_taken=1,
+        )
+        for i in range(ROWS)
+    )
+    return db
+
+
+def test_decoders_ignore_columns_added_later(seeded):
+    # Explicit column lists keep positional decoding stable when a
+    # migration appends a column the models do not know about.
+    for table in ("medications", "schedules", "reminders", "intake_logs"):
+        seeded.conn.execute(f"ALTER TABLE {table} ADD COLUMN extra TEXT DEFAULT 'x'")
+    seeded.conn.commit()
+
+    assert seeded.medications.get_by_id("m1").name == "Med 1"
+    assert seeded.schedules.get_by_id("s1").times == [time(8, 0), time(20, 0)]
+    assert seeded.reminders.get_by_id("r1").scheduled_id == "s1"
+    assert seeded.intake_logs.get_by_id("l1").amount_taken == 1
+
+
+def test_latest_per_medication_drops_the_aggregate_column(seeded):
+    latest = seeded.intake_logs.latest_per_medication()
+
+    assert len(latest) == ROWS
+    assert latest["m7"].id == "l7"
+
+
+def test_get_all_throughput(seeded):
+    """
+    Rows per second decoded by each repository's get_all.
+    Run with -s to see the numbers; only row counts are asserted, since
+    timings vary by machine.
+    """
+
+    repositories = {
+        "medications": lambda: seeded.medications.get_all(with_schedules=False),
+        "schedules": seeded.schedules.get_all,
+        "reminders": seeded.reminders.get_all,
+        "intake_logs": seeded.intake_logs.get_all,
+    }
+
+    lines = []
+    for name, get_all in repositories.items():
+        start = clock.perf_counter()
+        rows = get_all()
+        elapsed = clock.perf_counter() - start
+
+        assert len(rows) == ROWS
+        lines.append(f"{name} {ROWS / elapsed:,.0f} rows/s")
+
+    print("\nget_all: " + ", ".join(lines))
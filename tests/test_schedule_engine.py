@@ -14,6 +14,9 @@ class FakeMedicationRepo:
     def get_all(self):
         return self._medications
 
+    def get_many(self, ids, with_schedules=True):
+        return [m for m in self._medications if m.id in set(ids)]
+
 
 class FakeScheduleRepo:
     def __init__(self, schedules_by_med_id):
@@ -22,6 +25,10 @@ class FakeScheduleRepo:
     def get_by_medication(self, med_id):
         return self._data.get(med_id, [])
 
+    def get_for_day(self, day):
+        # The real query filters by weekday and dates; the engine rechecks.
+        return [s for schedules in self._data.values() for s in schedules]
+
 
 # Tests
 def test_generate_dose_events_basic():
@@ -96,8 +103,8 @@ def test_get_next_dose_returns_none_if_no_future():
 def test_get_today_schedule_returns_sorted_results():
     today = date.today()
 
-    s1 = Schedule(times=[time(20, 0)], start_date=today, end_date=today)
-    s2 = Schedule(times=[time(8, 0)], start_date=today, end_date=today)
+    s1 = Schedule(medication_id="1", times=[time(20, 0)], start_date=today, end_date=today)
+    s2 = Schedule(medication_id="1", times=[time(8, 0)], start_date=today, end_date=today)
 
     med = Medication(id="1", name="TestMed")
 
@@ -122,13 +129,161 @@ def test_get_overdue_doses_returns_past_only():
         end_date=date.today()
     )
 
-    med = Medication(id="1")
+    med = Medication(id="1", schedule=[schedule])
 
     med_repo = FakeMedicationRepo([med])
-    sched_repo = FakeScheduleRepo({"1": [schedule]})
 
-    engine = ScheduleEngine(med_repo, sched_repo)
+    # Schedules come with the medications; no per-medication lookups.
+    engine = ScheduleEngine(med_repo, None)
     overdue = engine.get_overdue_doses()
 
     assert len(overdue) == 1
     assert overdue[0][1] < datetime.now()
+
+
+def test_get_overdue_doses_only_looks_back_a_day_by_default():
+    schedule = Schedule(
+        times=[time(hour, 0) for hour in range(24)],
+        start_date=date(2000, 1, 1),
+    )
+    engine = ScheduleEngine(
+        FakeMedicationRepo([Medication(id="1", schedule=[schedule])]), None
+    )
+
+    overdue = engine.get_overdue_doses()
+
+    # One day of hourly doses, not twenty-odd years of them.
+    assert 23 <= len(overdue) <= 24
+    assert min(dt for _, dt in overdue) >= datetime.now() - timedelta(days=1)
+    assert len(engine.get_overdue_doses(lookback=timedelta(days=7))) >= 7 * 24 - 1
+    since = datetime.now() - timedelta(days=3)
+    assert min(dt for _, dt in engine.get_overdue_doses(since=since)) >= since
+
+
+def test_iter_dose_events_only_expands_window():
+    schedule = Schedule(
+        times=[time(20, 0), time(8, 0)],
+        start_date=date(2000, 1, 1),
+        end_date=date(2099, 12, 31)
+    )
+
+    engine = ScheduleEngine(None, None)
+    events = list(engine.iter_dose_events(
+        schedule,
+        datetime(2030, 6, 1, 12, 0),
+        datetime(2030, 6, 3, 8, 0),
+    ))
+
+    # Ordered, start-inclusive and end-exclusive.
+    assert events == [
+        datetime(2030, 6, 1, 20, 0),
+        datetime(2030, 6, 2, 8, 0),
+        datetime(2030, 6, 2, 20, 0),
+    ]
+
+
+def test_iter_dose_events_respects_schedule_bounds():
+    schedule = Schedule(
+        times=[time(9, 0)],
+        start_date=date(2030, 1, 10),
+        end_date=date(2030, 1, 11)
+    )
+
+    engine = ScheduleEngine(None, None)
+    events = list(engine.iter_dose_events(
+        schedule, datetime(2030, 1, 1), datetime(2030, 2, 1)
+    ))
+
+    assert events == [datetime(2030, 1, 10, 9, 0), datetime(2030, 1, 11, 9, 0)]
+
+
+def test_iter_dose_events_handles_open_ended_schedule():
+    schedule = Schedule(times=[time(9, 0)], start_date=date(2030, 1, 1))
+
+    engine = ScheduleEngine(None, None)
+    events = list(engine.iter_dose_events(
+        schedule, datetime(2031, 1, 1), datetime(2031, 1, 3)
+    ))
+
+    assert events == [datetime(2031, 1, 1, 9, 0), datetime(2031, 1, 2, 9, 0)]
+
+
+def test_iter_dose_events_weekly_uses_days_of_week():
+    # 2030-01-07 is a Monday.
+    schedule = Schedule(
+        times=[time(9, 0)],
+        frequency="weekly",
+        days_of_week=[0, 2],
+        start_date=date(2030, 1, 7),
+        end_date=date(2030, 1, 13)
+    )
+
+    engine = ScheduleEngine(None, None)
+    events = engine.generate_dose_events(schedule)
+
+    assert events == [datetime(2030, 1, 7, 9, 0), datetime(2030, 1, 9, 9, 0)]
+
+
+def _brute_force_next(engine, schedule, after):
+    return min((dt for dt in engine.generate_dose_events(schedule) if dt > after), default=None)
+
+
+def test_next_dose_after_matches_brute_force_expansion():
+    import random
+
+    rng = random.Random(1234)
+    engine = ScheduleEngine(None, None)
+    base = date(2030, 1, 1)
+
+    for _ in range(300):
+        start = base + timedelta(days=rng.randint(0, 30))
+        frequency = rng.choice(["daily", "weekly", "custom"])
+        schedule = Schedule(
+            times=[time(rng.randint(0, 23), rng.choice([0, 15, 30, 45]))
+                   for _ in range(rng.randint(1, 4))],
+            frequency=frequency,
+            days_of_week=rng.sample(range(7), rng.randint(1, 3)),
+            start_date=start,
+            end_date=start + timedelta(days=rng.randint(0, 40)),
+        )
+        schedule.times = sorted(set(schedule.times))
+        after = datetime.combine(
+            base + timedelta(days=rng.randint(-5, 80)),
+            time(rng.randint(0, 23), rng.randint(0, 59)),
+        )
+
+        assert engine.next_dose_after(schedule, after) == _brute_force_next(
+            engine, schedule, after
+        )
+
+
+def test_next_dose_after_exact_dose_time_is_excluded():
+    schedule = Schedule(
+        times=[time(8, 0), time(20, 0)],
+        start_date=date(2030, 1, 1),
+        end_date=date(2030, 1, 2)
+    )
+
+    engine = ScheduleEngine(None, None)
+
+    assert engine.next_dose_after(schedule, datetime(2030, 1, 1, 8, 0)) == datetime(2030, 1, 1, 20, 0)
+    assert engine.next_dose_after(schedule, datetime(2030, 1, 2, 20, 0)) is None
+
+
+def test_next_dose_after_open_ended_schedule():
+    schedule = Schedule(times=[time(9, 0)], start_date=date(2030, 1, 1))
+
+    engine = ScheduleEngine(None, None)
+
+    assert engine.next_dose_after(schedule, datetime(2045, 5, 5, 10, 0)) == datetime(2045, 5, 6, 9, 0)
+
+
+def test_next_dose_for_medication_uses_loaded_schedules():
+    s1 = Schedule(times=[time(20, 0)], start_date=date(2030, 1, 1))
+    s2 = Schedule(times=[time(8, 0)], start_date=date(2030, 1, 1))
+    med = Medication(id="1", schedule=[s1, s2])
+
+    engine = ScheduleEngine(None, None)
+
+    assert engine.next_dose_for_medication(med, datetime(2030, 1, 1, 12, 0)) == datetime(2030, 1, 1, 20, 0)
+    assert engine.next_dose_for_medication(Medication(id="2")) is None
@@ -0,0 +1,119 @@
+import sqlite3
+from datetime import date, datetime, time
+
+import pytest
+
+from data.database import Database
+from data.migrations import migrate
+from data.schedule_repository import ALL_WEEKDAYS_MASK, weekday_mask
+from models.medication import Medication
+from models.schedule import Schedule
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+def _schedule(schedule_id, times, **kwargs):
+    return Schedule(
+        id=schedule_id, medication_id="m1", times=times,
+        start_date=kwargs.pop("start_date", date(2024, 1, 1)), **kwargs
+    )
+
+
+def _minutes(db, schedule_id):
+    rows = db.conn.execute(
+        "SELECT minute_of_day FROM schedule_times WHERE schedule_id = ? "
+        "ORDER BY minute_of_day",
+        (schedule_id,),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def test_weekday_mask():
+    assert weekday_mask(Schedule(frequency="daily", days_of_week=[1])) == ALL_WEEKDAYS_MASK
+    assert weekday_mask(Schedule(frequency="weekly", days_of_week=[])) == ALL_WEEKDAYS_MASK
+    assert weekday_mask(Schedule(frequency="weekly", days_of_week=[0, 2, 9])) == 0b101
+
+
+def test_schedule_times_follow_writes(db):
+    db.schedules.add(_schedule("s1", [time(8, 0), time(20, 30)]))
+    assert _minutes(db, "s1") == [480, 1230]
+
+    db.schedules.update(_schedule("s1", [time(9, 15)]))
+    assert _minutes(db, "s1") == [555]
+
+    db.schedules.add_many([_schedule("s2", [time(7, 0)])])
+    db.schedules.update_many([_schedule("s2", [time(6, 0), time(7, 0)])])
+    assert _minutes(db, "s2") == [360, 420]
+
+    db.schedules.delete("s1")
+    assert _minutes(db, "s1") == []
+
+
+def test_get_for_day_uses_weekday_and_dates(db):
+    # 2024-01-02 is a Tuesday (1).
+    db.schedules.add_many([
+        _schedule("daily", [time(8, 0)]),
+        _schedule("tuesday", [time(8, 0)], frequency="weekly", days_of_week=[1]),
+        _schedule("monday", [time(8, 0)], frequency="weekly", days_of_week=[0]),
+        _schedule("ended", [time(8, 0)], end_date=date(2024, 1, 1)),
+        _schedule("later", [time(8, 0)], start_date=date(2024, 2, 1)),
+    ])
+
+    found = db.schedules.get_for_day(date(2024, 1, 2))
+
+    assert sorted(s.id for s in found) == ["daily", "tuesday"]
+
+
+def test_get_firing_at_matches_minute(db):
+    db.schedules.add_many([
+        _schedule("tue-8", [time(8, 0)], frequency="weekly", days_of_week=[1]),
+        _schedule("daily-8", [time(8, 0), time(20, 0)]),
+        _schedule("daily-9", [time(9, 0)]),
+        _schedule("inactive", [time(8, 0)], is_active=False),
+    ])
+
+    tuesday = db.schedules.get_firing_at(datetime(2024, 1, 2, 8, 0, 30))
+    wednesday = db.schedules.get_firing_at(datetime(2024, 1, 3, 8, 0))
+
+    assert sorted(s.id for s in tuesday) == ["daily-8", "tue-8"]
+    assert [s.id for s in wednesday] == ["daily-8"]
+
+
+def test_firing_query_starts_from_minute_index(db):
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT s.* FROM schedule_times t "
+        "JOIN schedules s ON s.id = t.schedule_id WHERE t.minute_of_day = ?",
+        (480,),
+    ).fetchall()
+
+    assert any("idx_schedule_times_minute" in row[-1] for row in plan)
+
+
+def test_migration_backfills_existing_schedules(tmp_path):
+    path = tmp_path / "app.db"
+    db = Database(path)
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    db.schedules.add(_schedule("s1", [time(8, 0)], frequency="weekly", days_of_week=[4]))
+    db.close()
+
+    # Rewind to schema 5 as if the schedule had been written before 6.
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("DROP INDEX ux_intake_logs_medication_scheduled_us")
+    conn.execute("DROP INDEX idx_reminder_events_state_dose_us")
+    conn.execute("ALTER TABLE reminder_events DROP COLUMN dose_us")
+    conn.execute("DROP TABLE schedule_times")
+    conn.execute("ALTER TABLE schedules DROP COLUMN weekday_mask")
+    conn.execute("PRAGMA user_version = 5")
+    migrate(conn)
+    conn.close()
+
+    db = Database(path)
+    assert [s.id for s in db.schedules.get_firing_at(datetime(2024, 1, 5, 8, 0))] == ["s1"]
+    db.close()
@@ -0,0 +1,115 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from data.database import Database
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+from services.schedule_service import ScheduleService
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+class CountingScheduleRepo:
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+
+    def get_all(self):
+        self.calls += 1
+        return self.inner.get_all()
+
+
+def _add(db, schedule_id, times, offset=10, **kwargs):
+    db.schedules.add(Schedule(
+        id=schedule_id, medication_id="m1", times=times,
+        start_date=kwargs.pop("start_date", date(2024, 1, 1)), **kwargs
+    ))
+    db.reminders.add(Reminder(
+        id=f"r-{schedule_id}", medication_id="m1", scheduled_id=schedule_id,
+        reminder_offset_minutes=offset,
+    ))
+
+
+def _ids(reminders):
+    return [r.id for r in reminders]
+
+
+def test_due_at_fire_minute_only(db):
+    _add(db, "s1", [time(8, 0)])
+    service = ScheduleService(db.reminders, db.schedules, db.changes)
+
+    assert _ids(service.get_due_reminders(datetime(2024, 1, 1, 7, 50, 30))) == ["r-s1"]
+    assert service.get_due_reminders(datetime(2024, 1, 1, 7, 51)) == []
+
+
+def test_weekly_schedule_uses_integer_weekdays(db):
+    # 2024-01-01 is a Monday (0), 2024-01-03 a Wednesday (2).
+    _add(db, "s1", [time(9, 0)], frequency="weekly", days_of_week=[2])
+    service = ScheduleService(db.reminders, db.schedules, db.changes)
+
+    assert service.get_due_reminders(datetime(2024, 1, 1, 8, 50)) == []
+    assert _ids(service.get_due_reminders(datetime(2024, 1, 3, 8, 50))) == ["r-s1"]
+
+
+def test_offset_crossing_midnight_fires_previous_day(db):
+    _add(db, "s1", [time(0, 10)], offset=30, frequency="weekly", days_of_week=[1])
+    service = ScheduleService(db.reminders, db.schedules, db.changes)
+
+    # Tuesday 00:10 dose -> Monday 23:40 reminder.
+    assert _ids(service.get_due_reminders(datetime(2024, 1, 1, 23, 40))) == ["r-s1"]
+    assert service.get_due_reminders(datetime(2024, 1, 2, 23, 40)) == []
+
+
+def test_date_range_applies_to_dose_date(db):
+    _add(db, "s1", [time(8, 0)], start_date=date(2024, 1, 2), end_date=date(2024, 1, 3))
+    service = ScheduleService(db.reminders, db.schedules, db.changes)
+
+    assert service.get_due_reminders(datetime(2024, 1, 1, 7, 50)) == []
+    assert len(service.get_due_reminders(datetime(2024, 1, 3, 7, 50))) == 1
+    assert service.get_due_reminders(datetime(2024, 1, 4, 7, 50)) == []
+
+
+def test_index_rebuilt_only_after_writes(db):
+    _add(db, "s1", [time(8, 0)])
+    schedules = CountingScheduleRepo(db.schedules)
+    service = ScheduleService(db.reminders, schedules, db.changes)
+
+    for minute in range(60):
+        service.get_due_reminders(datetime(2024, 1, 1, 7, minute))
+    assert schedules.calls == 1
+
+    _add(db, "s2", [time(9, 0)])
+    assert _ids(service.get_due_reminders(datetime(2024, 1, 1, 8, 50))) == ["r-s2"]
+    assert schedules.calls == 2
+
+
+def test_without_change_feed_rebuilds_each_call(db):
+    _add(db, "s1", [time(8, 0)])
+    schedules = CountingScheduleRepo(db.schedules)
+    service = ScheduleService(db.reminders, schedules)
+
+    service.get_due_reminders(datetime(2024, 1, 1, 7, 50))
+    service.get_due_reminders(datetime(2024, 1, 1, 7, 51))
+    assert schedules.calls == 2
+
+
+def test_invalidation_during_a_lookup_is_safe(db):
+    _add(db, "s1", [time(8, 0)])
+    schedules = CountingScheduleRepo(db.schedules)
+    service = ScheduleService(db.reminders, schedules, db.changes)
+
+    # A write on another thread lands while the index is being built.
+    get_all = schedules.get_all
+    schedules.get_all = lambda: (service.invalidate(), get_all())[1]
+
+    assert _ids(service.get_due_reminders(datetime(2024, 1, 1, 7, 50))) == ["r-s1"]
+    # The index may predate that write, so it was not kept.
+    assert service._index is None
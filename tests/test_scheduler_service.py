@@ -0,0 +1,344 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from data.database import Database
+from data.epoch import datetime_to_epoch_us
+from data.errors import DatabaseError, NotFoundError
+from data.write_queue import WriteQueue
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+from services.schedule_engine import ScheduleEngine
+from services.scheduler_service import SchedulerService
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, event):
+        self.sent.append(event)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+def _scheduler(db, clock):
+    notifier = FakeNotifier()
+    scheduler = SchedulerService(notifier, change_feed=db.changes, clock=clock)
+    scheduler._bind(
+        db.schedules, db.reminders, db.intake_logs, db.reminder_events,
+        ScheduleEngine(db.medications, db.schedules),
+    )
+    return scheduler, notifier
+
+
+def _add_schedule(db, schedule_id, times, offset=10):
+    db.schedules.add(Schedule(
+        id=schedule_id, medication_id="m1", times=times, start_date=date(2024, 1, 1)
+    ))
+    db.reminders.add(Reminder(
+        id=f"r-{schedule_id}", medication_id="m1", scheduled_id=schedule_id,
+        reminder_offset_minutes=offset,
+    ))
+
+
+def test_idle_scheduler_has_nothing_to_wait_for(db):
+    scheduler, notifier = _scheduler(db, FakeClock(datetime(2024, 1, 1, 7, 0)))
+
+    assert scheduler._run_pending() is None
+    assert notifier.sent == []
+
+
+def test_sleeps_until_exact_next_fire_time(db):
+    _add_schedule(db, "s1", [time(8, 0), time(20, 0)])
+    scheduler, notifier = _scheduler(db, FakeClock(datetime(2024, 1, 1, 7, 0)))
+
+    assert scheduler._run_pending() == datetime(2024, 1, 1, 7, 50)
+    assert notifier.sent == []
+
+
+def test_fires_once_then_schedules_following_dose(db):
+    _add_schedule(db, "s1", [time(8, 0), time(20, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 0))
+    scheduler, notifier = _scheduler(db, clock)
+    scheduler._run_pending()
+
+    clock.now = datetime(2024, 1, 1, 7, 50)
+    assert scheduler._run_pending() == datetime(2024, 1, 1, 19, 50)
+
+    clock.now = datetime(2024, 1, 1, 7, 55)
+    scheduler.wake()
+    scheduler._run_pending()
+
+    assert [e.schedule_time for e in notifier.sent] == [datetime(2024, 1, 1, 8, 0)]
+    assert notifier.sent[0].medication_id == "m1"
+
+
+def test_taken_dose_is_not_fired(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 0))
+    scheduler, notifier = _scheduler(db, clock)
+    scheduler._run_pending()
+
+    db.intake_logs.add(IntakeLog(
+        medication_id="m1",
+        scheduled_time=datetime(2024, 1, 1, 8, 0),
+        taken_time=datetime(2024, 1, 1, 8, 5),
+        created_at=datetime(2024, 1, 1, 8, 5),
+    ))
+    clock.now = datetime(2024, 1, 1, 7, 50)
+    scheduler._run_pending()
+
+    assert notifier.sent == []
+
+
+def test_write_wakes_and_rebuilds_only_affected_schedule(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    _add_schedule(db, "s2", [time(9, 0)])
+    scheduler, _ = _scheduler(db, FakeClock(datetime(2024, 1, 1, 7, 0)))
+    scheduler._run_pending()
+    scheduler._wake.clear()
+    generations = dict(scheduler._generations)
+
+    db.schedules.update(Schedule(
+        id="s2", medication_id="m1", times=[time(7, 30)], start_date=date(2024, 1, 1)
+    ))
+
+    assert scheduler._wake.is_set()
+    assert scheduler._run_pending() == datetime(2024, 1, 1, 7, 20)
+    assert scheduler._generations["s1"] == generations["s1"]
+    assert scheduler._generations["s2"] == generations["s2"] + 1
+
+
+def test_deleted_schedule_is_dropped(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    scheduler, notifier = _scheduler(db, FakeClock(datetime(2024, 1, 1, 7, 0)))
+    scheduler._run_pending()
+
+    db.schedules.delete("s1")
+
+    assert scheduler._run_pending() is None
+
+
+def test_stop_interrupts_the_wait(db, tmp_path):
+    scheduler = SchedulerService(
+        FakeNotifier(), change_feed=db.changes, connection_factory=db.conn.connection
+    )
+    scheduler.start()
+    scheduler.stop()
+    scheduler.thread.join(timeout=5)
+
+    assert not scheduler.thread.is_alive()
+
+
+def test_thread_reads_through_a_read_only_snapshot(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    notifier = FakeNotifier()
+    scheduler = SchedulerService(
+        notifier,
+        change_feed=db.changes,
+        connection_factory=lambda: db.conn,
+        clock=FakeClock(datetime(2024, 1, 1, 7, 50)),
+        read_connection_factory=lambda: db.reader.connection(),
+    )
+    scheduler.start()
+    deadline = datetime.now() + timedelta(seconds=5)
+    while not notifier.sent and datetime.now() < deadline:
+        scheduler._wake.wait(0.01)
+    scheduler.stop()
+    scheduler.thread.join(timeout=5)
+
+    assert [e.schedule_time for e in notifier.sent] == [datetime(2024, 1, 1, 8, 0)]
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "fired"
+
+
+def test_thread_records_events_through_the_write_queue(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    writer = WriteQueue(db)
+    writer.start()
+    notifier = FakeNotifier()
+    scheduler = SchedulerService(
+        notifier,
+        change_feed=db.changes,
+        connection_factory=lambda: db.conn,
+        clock=FakeClock(datetime(2024, 1, 1, 7, 50)),
+        writer=writer,
+    )
+    scheduler.start()
+    deadline = datetime.now() + timedelta(seconds=5)
+    while not notifier.sent and datetime.now() < deadline:
+        scheduler._wake.wait(0.01)
+    scheduler.stop()
+    scheduler.thread.join(timeout=5)
+    writer.stop()
+
+    assert len(notifier.sent) == 1
+    assert writer.stats()["writes"] >= 2  # Pending row, then "fired".
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "fired"
+
+
+def test_failed_pass_is_logged_and_the_loop_carries_on(db, caplog):
+    _add_schedule(db, "s1", [time(8, 0)])
+    notifier = FakeNotifier()
+    scheduler = SchedulerService(
+        notifier,
+        change_feed=db.changes,
+        connection_factory=lambda: db.conn,
+        clock=FakeClock(datetime(2024, 1, 1, 7, 50)),
+    )
+    run_pending = scheduler._run_pending
+    passes = []
+
+    def flaky_pass():
+        passes.append(1)
+        if len(passes) == 1:
+            raise DatabaseError("Failed to settle reminder events: database is locked")
+        return run_pending()
+
+    scheduler._run_pending = flaky_pass
+    scheduler.start()
+    deadline = datetime.now() + timedelta(seconds=5)
+    while not passes and datetime.now() < deadline:
+        scheduler._wake.wait(0.01)
+    # Skip the retry delay.
+    scheduler.wake()
+    while not notifier.sent and datetime.now() < deadline:
+        scheduler._wake.wait(0.01)
+    scheduler.stop()
+    scheduler.thread.join(timeout=5)
+
+    assert [e.schedule_time for e in notifier.sent] == [datetime(2024, 1, 1, 8, 0)]
+    assert scheduler.last_error is None
+    assert "Scheduler pass failed" in caplog.text
+
+
+def test_failing_reminder_does_not_hold_back_the_others(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    _add_schedule(db, "s2", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 0))
+    scheduler, notifier = _scheduler(db, clock)
+    scheduler._run_pending()
+
+    sent = notifier.sent
+
+    def send_notification(event):
+        if event.schedule_id == "s1":
+            raise NotFoundError("Medication m1 not found.")
+        sent.append(event)
+
+    notifier.send_notification = send_notification
+    clock.now = datetime(2024, 1, 1, 7, 50)
+
+    assert scheduler._run_pending() == datetime(2024, 1, 2, 7, 50)
+    assert [e.schedule_id for e in sent] == ["s2"]
+
+
+@pytest.mark.parametrize("late", [timedelta(0), timedelta(seconds=2)])
+def test_reminder_at_offset_zero_fires_at_its_dose(db, late):
+    _add_schedule(db, "s1", [time(8, 0)], offset=0)
+    clock = FakeClock(datetime(2024, 1, 1, 7, 0))
+    scheduler, notifier = _scheduler(db, clock)
+    assert scheduler._run_pending() == datetime(2024, 1, 1, 8, 0)
+
+    # The loop wakes at the fire time, or a moment after it.
+    clock.now = datetime(2024, 1, 1, 8, 0) + late
+    scheduler._run_pending()
+
+    assert [e.schedule_time for e in notifier.sent] == [datetime(2024, 1, 1, 8, 0)]
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "fired"
+
+
+def test_restart_does_not_refire_shown_reminder(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 50))
+    first, first_sent = _scheduler(db, clock)
+    first._run_pending()
+
+    clock.now = datetime(2024, 1, 1, 7, 55)
+    restarted, restarted_sent = _scheduler(db, clock)
+    restarted._run_pending()
+
+    assert len(first_sent.sent) == 1
+    assert restarted_sent.sent == []
+    stored = db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0))
+    assert stored.state == "fired"
+
+
+def test_reminders_missed_while_closed_are_settled_not_fired(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 0))
+    first, _ = _scheduler(db, clock)
+    first._run_pending()
+
+    clock.now = datetime(2024, 1, 1, 9, 0)
+    restarted, sent = _scheduler(db, clock)
+    restarted._run_pending()
+
+    assert sent.sent == []
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "missed"
+
+
+def test_snoozed_reminder_fires_again(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 50))
+    scheduler, notifier = _scheduler(db, clock)
+    scheduler._run_pending()
+
+    db.reminder_events.snooze(notifier.sent[0], until=datetime(2024, 1, 1, 7, 58))
+    assert scheduler._run_pending() == datetime(2024, 1, 1, 7, 58)
+
+    clock.now = datetime(2024, 1, 1, 7, 58)
+    scheduler._run_pending()
+
+    assert len(notifier.sent) == 2
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "fired"
+
+
+def test_close_past_acknowledges_taken_doses(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    clock = FakeClock(datetime(2024, 1, 1, 7, 50))
+    scheduler, _ = _scheduler(db, clock)
+    scheduler._run_pending()
+
+    db.intake_logs.add(IntakeLog(
+        medication_id="m1",
+        scheduled_time=datetime(2024, 1, 1, 8, 0),
+        taken_time=datetime(2024, 1, 1, 8, 1),
+        created_at=datetime(2024, 1, 1, 8, 1),
+    ))
+
+    assert db.reminder_events.close_past(datetime(2024, 1, 1, 8, 30)) == 1
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "acknowledged"
+
+
+def test_close_past_matches_logs_written_with_another_offset(db):
+    _add_schedule(db, "s1", [time(8, 0)])
+    scheduler, _ = _scheduler(db, FakeClock(datetime(2024, 1, 1, 7, 50)))
+    scheduler._run_pending()
+
+    dose = datetime(2024, 1, 1, 8, 0).astimezone().astimezone(timezone.utc)
+    db.conn.execute(
+        "INSERT INTO intake_logs (id, medication_id, scheduled_time, taken_time, "
+        "amount_taken, created_at, scheduled_us) VALUES ('l1', 'm1', ?, ?, 1, ?, ?)",
+        (dose.isoformat(), dose.isoformat(), dose.isoformat(), datetime_to_epoch_us(dose)),
+    )
+    db.conn.commit()
+
+    assert db.reminder_events.close_past(datetime(2024, 1, 1, 8, 30)) == 1
+    assert db.reminder_events.get("s1", "r-s1", datetime(2024, 1, 1, 8, 0)).state == "acknowledged"
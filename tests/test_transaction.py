@@ -0,0 +1,137 @@
+import sqlite3
+from datetime import date, time
+
+import pytest
+
+from data.database import Database
+from data.errors import DatabaseError
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+from validators.reminder_validator import ReminderValidationError
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def commits(db):
+    statements = []
+    db.conn.connection().set_trace_callback(statements.append)
+    yield lambda: sum(1 for s in statements if s.strip().upper() == "COMMIT")
+    db.conn.connection().set_trace_callback(None)
+
+
+def _schedule(schedule_id, medication_id="m1"):
+    return Schedule(
+        id=schedule_id, medication_id=medication_id, times=[time(8, 0)],
+        start_date=date(2024, 1, 1),
+    )
+
+
+def test_transaction_commits_once_on_exit(db, commits):
+    with db.transaction():
+        for i in range(5):
+            db.schedules.add(_schedule(f"s{i}"))
+            db.reminders.add(Reminder(medication_id="m1", scheduled_id=f"s{i}"))
+
+    assert commits() == 1
+    assert len(db.schedules.get_all()) == 5
+
+
+def test_validation_error_rolls_back_everything(db):
+    with pytest.raises(ReminderValidationError):
+        with db.transaction():
+            db.schedules.add(_schedule("s1"))
+            db.reminders.add(
+                Reminder(medication_id="m1", scheduled_id="s1", reminder_offset_minutes=-1)
+            )
+
+    assert db.schedules.get_all() == []
+
+
+def test_database_error_rolls_back_everything(db):
+    with pytest.raises(DatabaseError):
+        with db.transaction():
+            db.schedules.add(_schedule("s1"))
+            db.schedules.add(_schedule("s1"))
+
+    assert db.schedules.get_all() == []
+
+
+def test_swallowed_write_error_still_rolls_back(db):
+    with pytest.raises(DatabaseError):
+        with db.transaction():
+            db.schedules.add(_schedule("s1"))
+            try:
+                db.schedules.add_many([_schedule("s2"), _schedule("s2")])
+            except DatabaseError:
+                pass
+
+    assert db.schedules.get_all() == []
+
+
+def test_nested_transactions_join_the_outer_one(db, commits):
+    with db.transaction():
+        db.schedules.add(_schedule("s1"))
+        with db.transaction():
+            db.schedules.add(_schedule("s2"))
+        assert commits() == 0
+
+    assert commits() == 1
+
+
+def test_changes_are_published_only_after_commit(db):
+    seen = []
+    db.changes.subscribe(seen.append)
+
+    with pytest.raises(DatabaseError):
+        with db.transaction():
+            db.schedules.add(_schedule("s1"))
+            assert seen == []
+            db.schedules.add(_schedule("s1"))
+    assert seen == []
+
+    with db.transaction():
+        db.schedules.add(_schedule("s2"))
+        assert seen == []
+    assert [c.entity_id for c in seen] == ["s2"]
+
+
+def test_medication_add_saves_schedules_atomically(db, commits):
+    med = Medication(id="m2", name="B", dosage="1mg", schedule=[_schedule("s1", "m2")])
+
+    db.medications.add(med)
+
+    assert [s.id for s in db.schedules.get_by_medication("m2")] == ["s1"]
+    assert commits() == 1
+
+
+def test_failed_medication_update_keeps_old_schedules(db):
+    db.schedules.add(_schedule("s1"))
+    db.medications.add(Medication(id="m2", name="B", dosage="1mg"))
+    db.schedules.add(_schedule("taken", "m2"))
+    med = db.medications.get_by_id("m1")
+    # The insert hits another medication's ID after the delete ran.
+    med.schedule = [_schedule("taken")]
+
+    with pytest.raises(DatabaseError):
+        db.medications.update(med)
+
+    assert [s.id for s in db.schedules.get_by_medication("m1")] == ["s1"]
+
+
+def test_transaction_takes_the_write_lock_up_front(db, tmp_path):
+    other = sqlite3.connect(tmp_path / "app.db", timeout=0)
+
+    with db.transaction():
+        # Nothing written yet, but another writer is already shut out.
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("BEGIN IMMEDIATE")
+
+    other.close()
@@ -0,0 +1,120 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from data.database import Database
+from data.validation import ON_READ, SAMPLED, ValidationPolicy
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from models.reminder import Reminder
+from models.schedule import Schedule
+from services.integrity_check import IntegrityCheckService, log_issue
+from validators.reminder_validator import ReminderValidationError
+
+
+def _seed(db):
+    db.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    db.schedules.add(Schedule(id="s1", medication_id="m1", times=[time(8, 0)],
+                              start_date=date(2024, 1, 1)))
+    db.reminders.add(Reminder(id="r1", medication_id="m1", scheduled_id="s1"))
+    db.intake_logs.add(IntakeLog(
+        id="l1", medication_id="m1", scheduled_time=datetime(2024, 1, 1, 8, 0),
+        taken_time=datetime(2024, 1, 1, 8, 5), created_at=datetime(2024, 1, 1, 8, 5),
+        amount_taken=1,
+    ))
+
+
+def _corrupt_reminder(db):
+    # Written behind the repository's back, so never validated.
+    db.conn.execute("UPDATE reminders SET reminder_offset_minutes = -5 WHERE id = 'r1'")
+    db.conn.commit()
+
+
+def test_policy_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        ValidationPolicy(mode="sometimes")
+    with pytest.raises(ValueError):
+        ValidationPolicy(mode=SAMPLED, sample_rate=2)
+
+
+def test_default_policy_trusts_reads(tmp_path):
+    db = Database(tmp_path / "app.db")
+    _seed(db)
+    _corrupt_reminder(db)
+
+    assert db.reminders.get_by_id("r1").reminder_offset_minutes == -5
+    db.close()
+
+
+def test_on_read_policy_validates_every_row(tmp_path):
+    db = Database(tmp_path / "app.db", validation=ValidationPolicy(mode=ON_READ))
+    _seed(db)
+    _corrupt_reminder(db)
+
+    with pytest.raises(ReminderValidationError):
+        db.reminders.get_all()
+    db.close()
+
+
+def test_sampled_policy_with_full_rate_validates(tmp_path):
+    db = Database(tmp_path / "app.db",
+                  validation=ValidationPolicy(mode=SAMPLED, sample_rate=1.0))
+    _seed(db)
+    _corrupt_reminder(db)
+
+    with pytest.raises(ReminderValidationError):
+        db.reminders.get_by_id("r1")
+    db.close()
+
+
+def test_integrity_check_reports_bad_rows(tmp_path):
+    db = Database(tmp_path / "app.db")
+    _seed(db)
+    reported = []
+    checker = IntegrityCheckService(
+        [db.medications, db.schedules, db.reminders, db.intake_logs],
+        on_issue=reported.append,
+    )
+
+    assert checker.run_once() == []
+
+    _corrupt_reminder(db)
+    db.conn.execute("UPDATE schedules SET times = 'not json' WHERE id = 's1'")
+    db.conn.commit()
+    issues = checker.run_once()
+
+    assert sorted((i.entity, i.entity_id) for i in issues) == [
+        ("reminder", "r1"), ("schedule", "s1")
+    ]
+    assert reported == issues
+    db.close()
+
+
+def test_integrity_check_runs_in_background(tmp_path):
+    db = Database(tmp_path / "app.db")
+    _seed(db)
+    _corrupt_reminder(db)
+    found = []
+    checker = IntegrityCheckService([db.reminders], on_issue=found.append)
+
+    checker.start()
+    checker.stop()
+    checker.thread.join(timeout=5)
+
+    assert [i.entity_id for i in found] == ["r1"]
+    db.close()
+
+
+def test_log_issue_reports_each_bad_row(tmp_path, caplog):
+    db = Database(tmp_path / "app.db")
+    _seed(db)
+    _corrupt_reminder(db)
+    checker = IntegrityCheckService([db.reminders], on_issue=log_issue)
+
+    checker.start()
+    checker.stop()
+    checker.thread.join(timeout=5)
+
+    assert [r.levelname for r in caplog.records] == ["WARNING"]
+    assert "reminder r1 is invalid" in caplog.text
+    db.close()
@@ -0,0 +1,184 @@
+import asyncio
+import sqlite3
+import threading
+import time as clock
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.async_database import AsyncDatabase
+from data.database import Database, StorageProfile
+from data.retry import RetryPolicy
+from data.write_queue import QueuedRepository, WriteQueue
+from models.intake_log import IntakeLog
+from models.medication import Medication
+from validators.intake_log_validator import IntakeLogValidationError
+
+LOGS = 1_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "app.db")
+    database.medications.add(Medication(id="m1", name="A", dosage="1mg"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def writer(db):
+    queue = WriteQueue(db, max_delay=timedelta(milliseconds=20))
+    yield queue
+    queue.stop()
+
+
+def _logs(count, prefix="l", first_day=1):
+    base = datetime(2024, 1, first_day, 8, 0)
+    return [
+        IntakeLog(
+            id=f"{prefix}{i}",
+            medication_id="m1",
+            scheduled_time=base + timedelta(minutes=i),
+            taken_time=base + timedelta(minutes=i, seconds=30),
+            created_at=base + timedelta(minutes=i, seconds=30),
+            amount_taken=1,
+        )
+        for i in range(count)
+    ]
+
+
+def test_queued_writes_share_commits(db, writer):
+    # Queue everything before the writer starts, so batching is certain.
+    futures = [writer.add(db.intake_logs, log) for log in _logs(500)]
+    commits_before = db.conn.commits
+    writer.start()
+
+    assert all(f.result(timeout=5).id for f in futures)
+    assert db.intake_logs.count_between(datetime(2024, 1, 1), datetime(2024, 1, 2)) == 500
+    assert db.conn.commits - commits_before == 500 // writer.max_batch + 1
+    assert writer.stats()["writes"] == 500
+
+
+def test_delete_after_update_is_coalesced(db, writer):
+    log = _logs(1)[0]
+    db.intake_logs.add(log)
+
+    log.notes = "edited"
+    updated = writer.update(db.intake_logs, log)
+    deleted = writer.delete(db.intake_logs, log.id)
+    writer.start()
+
+    assert deleted.result(timeout=5) is None
+    assert updated.result(timeout=5) is log
+    assert writer.stats()["coalesced"] == 1
+    assert writer.stats()["writes"] == 1
+
+
+def test_a_failing_write_only_fails_its_own_future(db, writer):
+    good, bad = _logs(2)
+    bad.amount_taken = -1
+
+    ok = writer.add(db.intake_logs, good)
+    broken = writer.add(db.intake_logs, bad)
+    writer.start()
+
+    assert ok.result(timeout=5) is good
+    with pytest.raises(IntakeLogValidationError):
+        broken.result(timeout=5)
+    assert [l.id for l in db.intake_logs.get_all()] == [good.id]
+
+
+def test_change_events_follow_the_commit(db, writer):
+    seen = []
+    db.changes.subscribe(seen.append)
+
+    future = writer.add(db.intake_logs, _logs(1)[0])
+    writer.start()
+    future.result(timeout=5)
+
+    assert [(c.entity, c.kind) for c in seen] == [("intake_log", "add")]
+
+
+def test_async_writes_go_through_the_queue(db, writer):
+    writer.start()
+    adb = AsyncDatabase(db, writer)
+    log = _logs(1)[0]
+
+    async def scenario():
+        await adb.intake_logs.add(log)
+        await adb.transaction(lambda: db.intake_logs.delete(log.id))
+        # Reads still run on the facade's own thread.
+        return await adb.intake_logs.get_all()
+
+    assert asyncio.run(scenario()) == []
+    adb.close()
+    assert writer.stats()["writes"] == 2
+
+
+def test_queued_repository_returns_once_committed(db, writer):
+    writer.start()
+    logs = QueuedRepository(db.intake_logs, writer)
+
+    log = logs.add(_logs(1)[0])
+
+    assert writer.stats()["writes"] == 1
+    assert [l.id for l in logs.get_all()] == [log.id]
+
+
+def test_stop_commits_queued_writes(db, writer):
+    future = writer.add(db.intake_logs, _logs(1)[0])
+    writer.start()
+    writer.stop()
+
+    assert future.done()
+    assert len(db.intake_logs.get_all()) == 1
+
+
+def test_batches_wait_out_a_locked_database(tmp_path):
+    db = Database(
+        tmp_path / "app.db",
+        profile=StorageProfile(busy_timeout_ms=50),
+        retry=RetryPolicy(max_wait=timedelta(seconds=5)),
+    )
+    writer = WriteQueue(db)
+    writer.start()
+
+    blocker = sqlite3.connect(tmp_path / "app.db", check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, blocker.rollback).start()
+
+    medication = writer.add(db.medications, Medication(id="m1", name="A", dosage="1mg"))
+
+    assert medication.result(timeout=10).id == "m1"
+    assert db.medications.get_by_id("m1") is not None
+    assert db.conn.retry_stats.retries > 0
+    assert db.conn.retry_stats.give_ups == 0
+    writer.stop()
+    blocker.close()
+    db.close()
+
+
+def test_intake_logging_throughput(db, writer):
+    """
+    Sustained intake logging, one commit per save vs the write queue.
+    Run with -s to see the numbers; only the row counts are asserted.
+    """
+
+    start = clock.perf_counter()
+    for log in _logs(LOGS, prefix="direct"):
+        db.intake_logs.add(log)
+    direct = LOGS / (clock.perf_counter() - start)
+
+    writer.start()
+    start = clock.perf_counter()
+    futures = [
+        writer.add(db.intake_logs, log)
+        for log in _logs(LOGS, prefix="queued", first_day=10)
+    ]
+    for future in futures:
+        future.result(timeout=10)
+    queued = LOGS / (clock.perf_counter() - start)
+
+    print(f"\nintake logs: direct {direct:,.0f}/s, write queue {queued:,.0f}/s")
+
+    assert len(db.intake_logs.get_all()) == 2 * LOGS
@@ -7,6 +7,10 @@ class TypedPage(ft.Page):
 
     # Database
     db: Any = None
+    # Awaitable facade over db for async handlers.
+    adb: Any = None
+    # Batched single-writer queue (data.write_queue.WriteQueue).
+    writer: Any = None
 
     # Navigation callbacks
     show_dashboard: Optional[Callable] = None
@@ -36,6 +40,8 @@ class TypedPage(ft.Page):
     # Services
     schedule_service: Any = None
     scheduler: Any = None
+    integrity_check: Any = None
+    view_refresher: Any = None
     notifier: Any = None
 
     # UI elements